@@ -1,56 +1,1042 @@
+from __future__ import annotations
+
 import os
 import re
-import yaml
-import requests
 import json
-from bs4 import BeautifulSoup
 import sys
 import random
 import urllib.parse
+import time
+import threading
+import hashlib
+import pickle
+import subprocess
+import shutil
+import tempfile
+import io
+import csv
+import contextlib
+import functools
+import operator
+import datetime
+import mmap
+import zlib
+import struct
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed, FIRST_COMPLETED
+
+# requests and yaml are imported inside the functions that use them, so -h/-v, query and match do not pay for them
+
+# Runtime settings, filled in by HandleSysArgs
+settings = {
+    "workers": 8,       # max concurrently running sources
+    "timeout": None,    # per-source timeout in seconds (None = no limit)
+    "crawl_per_host": 4,    # max parallel requests to one host while crawling detail pages
+    "crawl_rate": 5.0,      # max requests per second to one host while crawling detail pages
+    "crawl_retries": 2,     # rounds of retrying failed detail pages on their own before giving up on them
+    "journal": ".cache/journal",    # directory of crawl journals, interrupted crawls resume from them (None = disabled)
+    "http_cache": ".cache/http",    # directory for conditional GET cache (None = disabled)
+    "parse_cache": ".cache/parse",  # directory for per-file parse cache of git sources (None = disabled)
+    "parse_engine": "serial",       # "serial" or "parallel" (process pool) YAML loading
+    "streaming": False,             # spool records to temp file instead of keeping them in memory
+    "metrics": None,                # path of JSON metrics report (None = no report)
+    "profile": None,                # directory for per-source cProfile dumps (None = no profiling)
+    "formats": ["csv"],             # export formats: csv, ndjson, parquet, sqlite
+    "index": "export/lotcsv.sqlite",    # consolidated SQLite index with full text search (None = not updated)
+    "merge": "export/merged_entities.csv",  # cross-source entities merged from exports (None = not built)
+    "hash_index": True,             # write memory-mapped hash indexes of LOLDrivers and Bootloaders hashes next to exports
+    "delta": None,                  # directory of delta manifests, set by -d to ".cache/delta" (None = no delta exports)
+    "markdown_body": False,         # add "Body" column with markdown body to exports of markdown sources
+    "snapshot": None,               # path of snapshot bundle written from inputs of this run (None = no snapshot)
+    "from_snapshot": None,          # path of snapshot bundle sources read from instead of network (None = live)
+    "daemon": False,                # keep refreshing sources on their schedule and serve exports over HTTP
+    "interval": None,               # daemon refresh interval in seconds for every source (None = DAEMON_INTERVALS)
+    "bind": "127.0.0.1",            # address of export server in daemon mode
+    "port": 8080,                   # port of export server in daemon mode
+}
+
+# Bump when parsing changes so stale parse caches are not reused
+PARSE_CACHE_VERSION = 6
+# Rows per pickle of parse cache, memo of one pickle (every pickled object) is dropped before next one
+PARSE_CACHE_CHUNK = 2000
+
+# Where every source is fetched from, git repositories or HTTP endpoints. Can be pointed to mirrors or local stand-ins
+SOURCE_URLS = {
+    "bootloaders": "https://www.bootloaders.io/api/bootloaders.csv",
+    "gtfobins": "https://github.com/GTFOBins/GTFOBins.github.io",
+    "hijacklibs": "https://github.com/wietze/HijackLibs",
+    "lolapps": "https://github.com/LOLAPPS-Project/LOLAPPS/",
+    "lolc2": "https://github.com/lolc2/lolc2.github.io",
+    "lolcerts": "https://github.com/ReversecLabs/lolcerts/",
+    "loflcab": "https://github.com/LOFL-Project/LOFLCAB/",
+    "lolad": "https://lolad-project.github.io/",
+    "lolbas": "https://github.com/LOLBAS-Project/LOLBAS",
+    "loldrivers": "https://www.loldrivers.io/api/drivers.csv",
+    "lolrmm": "https://lolrmm.io/api/rmm_tools.csv",
+    "lottunnels": "https://github.com/LOTTunnels/LOTTunnels.github.io",
+    "lolesxi": "https://github.com/LOLESXi-Project/LOLESXi/",
+    "lots_project": "https://lots-project.com",
+    "loobins": "https://github.com/infosecB/LOOBins",
+    "lotwebhooks": "https://lotwebhooks.github.io",
+    "wadcoms": "https://github.com/WADComs/WADComs.github.io",
+}
+
+# Sources dominated by YAML/markdown parsing, these run in a process pool instead of a thread pool
+CPU_BOUND_SOURCES = ["gtfobins", "hijacklibs", "lolapps", "lolbas"]
+
+@functools.cache
+def ProcessContext():
+    """
+    Start method of worker processes. Workers are started while source threads are running, forked children could inherit
+    locks (metrics, stdio, imports) held by them, so fresh interpreters are used: forkserver where available, spawn otherwise.
+    """
+    import multiprocessing
+    return multiprocessing.get_context("forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+_metrics_local = threading.local()
+_metrics_lock = threading.Lock()
+source_metrics = {}
+
+def CurrentMetrics() -> dict | None:
+    """
+    Returns metrics record of source running in current thread, None outside of RunSources.
+    """
+    return getattr(_metrics_local, "record", None)
+
+def CountMetric(key: str, amount: int = 1) -> None:
+    record = CurrentMetrics()
+    if record is not None:
+        with _metrics_lock: record[key] = record.get(key, 0) + amount
+
+def PeakRss() -> int | None:
+    """
+    Peak resident set size of this process in KiB.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
 
-def check_connectivity() -> bool:
+@contextlib.contextmanager
+def Stage(name: str):
     """
-    Checks basic internet connectivity by trying to reach a reliable host.
-    Returns True if connectivity is available, False otherwise.
+    Adds time spent in block to stage of currently running source.
     """
+    start = time.perf_counter()
     try:
-        response = requests.get("https://httpbin.org/get", timeout=5)
-        return response.status_code == 200
-    except:
-        return False
+        yield
+    finally:
+        record = CurrentMetrics()
+        if record is not None:
+            with _metrics_lock: record["stages"][name] = record["stages"].get(name, 0) + time.perf_counter() - start
 
-def safe_request(url: str, timeout: int = 10) -> str | None:
+def Timed(func):
     """
-    Makes a safe HTTP request with proper error handling and timeout.
-    Returns the response text on success, None on failure.
+    Records each call of decorated function as stage named after the function.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with Stage(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+_progress_last = 0.0
+
+def Progress(message: str, interval: float = 0.2) -> None:
+    """
+    Prints progress line overwritten in place, at most once per interval so big corpora do not flood the terminal.
+    """
+    global _progress_last
+    now = time.monotonic()
+    if now - _progress_last >= interval:
+        _progress_last = now
+        print(f" \033[1;90m[\033[1;36m~\033[1;90m] \033[0m{message}                                  ", end="\r")
+
+def RecordOutput(output: str, rows: int, columns: int) -> None:
+    """
+    Adds written export file to metrics of currently running source.
     """
+    record = CurrentMetrics()
+    if record is not None:
+        size = os.path.getsize(output) if os.path.exists(output) else 0
+        with _metrics_lock:
+            record["outputs"][output] = {"rows": rows, "columns": columns, "bytes": size}
+            record["bytes_out"] += size
+
+def WriteMetrics(path: str, started: float) -> None:
+    """
+    Writes JSON report of per-source stage timings, traffic, output sizes and peak memory.
+    """
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss if resource else None
+    report = {
+        "started": datetime.datetime.fromtimestamp(started).isoformat(),
+        "seconds": round(time.time() - started, 3),
+        "peak_rss_kb": PeakRss(),
+        "peak_rss_children_kb": children // 1024 if children and sys.platform == "darwin" else children,
+        "hosts": dict(host_health),
+        "http_cache": {"hits": sum(i.get("cache_hits", 0) for i in source_metrics.values()), "misses": sum(i.get("cache_misses", 0) for i in source_metrics.values())},
+        "sources": source_metrics,
+    }
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f" \033[1;90m[\033[1;32m+\033[1;90m]\033[0m Metrics\033[1;90m:\033[0m \033[1;93m{path}\033[0m")
+
+_session = None
+_session_lock = threading.Lock()
+cache_stats = {"hits": 0, "misses": 0}
+host_health = {}
+
+def SourceHosts(names: list[str]) -> dict[str, str]:
+    """
+    Returns {host: url} of sources, first url of every distinct host is kept.
+    """
+    hosts = {}
+    for name in names:
+        url = SOURCE_URLS.get(name.removesuffix("_additional"))
+        host = urllib.parse.urlsplit(url or "").netloc
+        if host: hosts.setdefault(host, url)
+    return hosts
+
+def CheckHost(host: str, url: str, timeout: float = 5) -> dict:
+    """
+    Sends HEAD request to url through shared session, the opened connection stays in the pool and is reused by the source.
+    Any HTTP response counts as reachable. Result is stored in host_health, unreachable hosts are reported right away.
+    """
+    import requests
+    start = time.perf_counter()
     try:
-        response = requests.get(url, timeout=timeout)
-        response.raise_for_status()  # Raise an exception for bad status codes
-        return response.text
-    except requests.exceptions.ConnectionError as e:
-        print(f" \033[1;90m[\033[1;31mERROR\033[1;90m]\033[0m Connection error for {url}: {e}")
+        response = GetSession().head(url, timeout=timeout, allow_redirects=False)
+        result = {"ok": True, "status": response.status_code}
+    except requests.exceptions.RequestException as e:
+        result = {"ok": False, "error": type(e).__name__}
+        print(f" \033[1;90m[\033[1;31mWARNING\033[1;90m]\033[0m {host} is not reachable ({type(e).__name__}), its sources will probably fail")
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    with _session_lock: host_health[host] = result
+    return result
+
+def StartHealthCheck(names: list[str], timeout: float = 5) -> list[threading.Thread]:
+    """
+    Checks every host used by given sources in background (daemon) threads, so neither sources nor exit wait for it.
+    Returns the started threads.
+    """
+    threads = [threading.Thread(target=CheckHost, args=(host, url, timeout), name=f"health-{host}", daemon=True) for host, url in SourceHosts(names).items()]
+    for thread in threads: thread.start()
+    return threads
+
+
+def GetSession() -> requests.Session:
+    """
+    Returns shared HTTP session with connection pooling and retry/backoff on transient errors.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+            retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET", "HEAD"])
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry)
+            _session = requests.Session()
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+def _ResetSession() -> None:
+    # Sockets of the parent's pool must not be shared with forked workers
+    global _session, _session_lock
+    _session = None
+    _session_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_ResetSession)
+
+def _CachePaths(url: str) -> tuple[str, str]:
+    key = hashlib.sha256(url.encode()).hexdigest()
+    return os.path.join(settings["http_cache"], key + ".json"), os.path.join(settings["http_cache"], key + ".body")
+
+def _CacheLookup(url: str) -> tuple[dict, dict | None]:
+    """
+    Returns (conditional request headers, cache metadata) for url, metadata is None when nothing usable is cached.
+    """
+    if not settings["http_cache"]:
+        return {}, None
+    meta_path, body_path = _CachePaths(url)
+    try:
+        with open(meta_path, "r") as f: meta = json.load(f)
+        if not os.path.exists(body_path): return {}, None
+    except (OSError, ValueError):
+        return {}, None
+    headers = {}
+    if meta.get("etag"): headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"): headers["If-Modified-Since"] = meta["last_modified"]
+    return headers, meta
+
+def _CacheMeta(url: str, response: requests.Response, encoding: str | None) -> dict | None:
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if not settings["http_cache"] or not (etag or last_modified):
         return None
-    except requests.exceptions.Timeout as e:
+    return {"url": url, "etag": etag, "last_modified": last_modified, "encoding": encoding}
+
+def _CacheCommit(url: str, meta: dict, body_tmp: str) -> None:
+    # Body and metadata are written to temp files first and renamed, parallel workers may read the same entry
+    meta_path, body_path = _CachePaths(url)
+    os.replace(body_tmp, body_path)
+    tmp = f"{meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w") as f: json.dump(meta, f)
+    os.replace(tmp, meta_path)
+
+def _CacheTemp(url: str) -> str:
+    os.makedirs(settings["http_cache"], exist_ok=True)
+    return f"{_CachePaths(url)[1]}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+def _CacheStore(url: str, response: requests.Response) -> None:
+    meta = _CacheMeta(url, response, response.encoding)
+    if meta is None:
+        return
+    tmp = _CacheTemp(url)
+    with open(tmp, "wb") as f: f.write(response.content)
+    _CacheCommit(url, meta, tmp)
+
+def _PrintRequestError(url: str, e: Exception) -> None:
+    import requests
+    if isinstance(e, requests.exceptions.ConnectionError):
+        print(f" \033[1;90m[\033[1;31mERROR\033[1;90m]\033[0m Connection error for {url}: {e}")
+    elif isinstance(e, requests.exceptions.Timeout):
         print(f" \033[1;90m[\033[1;31mERROR\033[1;90m]\033[0m Timeout error for {url}: {e}")
-        return None
-    except requests.exceptions.HTTPError as e:
+    elif isinstance(e, requests.exceptions.HTTPError):
         print(f" \033[1;90m[\033[1;31mERROR\033[1;90m]\033[0m HTTP error for {url}: {e}")
-        return None
-    except requests.exceptions.RequestException as e:
+    elif isinstance(e, requests.exceptions.RequestException):
         print(f" \033[1;90m[\033[1;31mERROR\033[1;90m]\033[0m Request error for {url}: {e}")
+    else:
+        print(f" \033[1;90m[\033[1;31mERROR\033[1;90m]\033[0m Cache error for {url}: {e}")
+
+@Timed
+def safe_request(url: str, timeout: int = 10) -> str | None:
+    """
+    Makes a safe HTTP request with proper error handling and timeout.
+    Uses shared session and sends If-None-Match/If-Modified-Since when cached copy exists, on 304 cached body is reused.
+    Returns the response text on success, None on failure.
+    """
+    if SnapshotSource():
+        entry = SnapshotSource().http(url)
+        if entry is None: return None
+        text = SnapshotSource().read(entry["blob"]).decode(entry["encoding"], errors="replace")
+        if snapshot_writer: snapshot_writer.add_http(url, entry["blob"], entry["encoding"])
+        return text
+    import requests
+    headers, meta = _CacheLookup(url)
+    try:
+        response = GetSession().get(url, timeout=timeout, headers=headers)
+        if response.status_code == 304 and meta:
+            with open(_CachePaths(url)[1], "rb") as f: body = f.read()
+            with _session_lock: cache_stats["hits"] += 1
+            CountMetric("cache_hits")
+            text = body.decode(meta.get("encoding") or "utf-8", errors="replace")
+        else:
+            response.raise_for_status()  # Raise an exception for bad status codes
+            with _session_lock: cache_stats["misses"] += 1
+            CountMetric("cache_misses")
+            CountMetric("bytes_in", len(response.content))
+            _CacheStore(url, response)
+            text = response.text
+        # Decoded text is stored, so rebuild from snapshot gets exactly what the sources got
+        if snapshot_writer: snapshot_writer.add_http(url, snapshot_writer.add(text.encode("utf-8")), "utf-8")
+        return text
+    except (requests.exceptions.RequestException, OSError) as e:
+        _PrintRequestError(url, e)
         return None
 
-def GetRepository(url: str) -> None:
-    directory = url.split("/")[4]
-    if not os.path.exists(directory):
-        print(" \033[1;90m[\033[1;33m+\033[1;90m]\033[0m Cloning repository...")
-        os.system(f"git clone {url}")
+class _TeeReader(io.RawIOBase):
+    """
+    Raw reader over streamed response body, copies every chunk into sink (cache file) and record (snapshot blob) as it is read.
+    urllib3 1.x can return more than asked for compressed bodies, rest is kept for next read.
+    """
+    def __init__(self, response: requests.Response, sink, record=None) -> None:
+        self.response = response
+        self.sink = sink
+        self.record = record
+        self.finished = False
+        self.count = 0
+        self.rest = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self.rest
+        if not data:
+            data = self.response.raw.read(len(buffer), decode_content=True)
+            if not data:
+                self.finished = True
+                return 0
+            self.count += len(data)
+            if self.sink: self.sink.write(data)
+            if self.record: self.record.write(data)
+        data, self.rest = data[:len(buffer)], data[len(buffer):]
+        buffer[:len(data)] = data
+        return len(data)
+
+@contextlib.contextmanager
+def safe_stream(url: str, timeout: int = 10):
+    """
+    Streaming variant of safe_request for big downloads. Yields text stream of response body (decoded chunk by chunk,
+    newlines untranslated as csv module expects) or None on failure. Body is cached same way as in safe_request.
+    """
+    if SnapshotSource():
+        entry = SnapshotSource().http(url)
+        if entry is None:
+            yield None
+            return
+        if snapshot_writer: snapshot_writer.add_http(url, entry["blob"], entry["encoding"])
+        with io.TextIOWrapper(io.BufferedReader(SnapshotSource().open(entry["blob"]), 1 << 16), encoding=entry["encoding"], errors="replace", newline="") as stream:
+            yield stream
+        return
+    import requests
+    headers, meta = _CacheLookup(url)
+    try:
+        response = GetSession().get(url, timeout=timeout, headers=headers, stream=True)
+        if response.status_code == 304 and meta:
+            response.close()
+            cached = open(_CachePaths(url)[1], "rb")
+        else:
+            cached = None
+            response.raise_for_status()
+    except (requests.exceptions.RequestException, OSError) as e:
+        _PrintRequestError(url, e)
+        yield None
+        return
+
+    if cached:
+        with _session_lock: cache_stats["hits"] += 1
+        CountMetric("cache_hits")
+        if snapshot_writer:
+            blob = snapshot_writer.blob()
+            try:
+                for chunk in iter(functools.partial(cached.read, 1 << 20), b""): blob.write(chunk)
+            except BaseException:
+                blob.discard()
+                cached.close()
+                raise
+            snapshot_writer.add_http(url, blob.commit(), meta.get("encoding") or "utf-8")
+            cached.seek(0)
+        with io.TextIOWrapper(cached, encoding=meta.get("encoding") or "utf-8", errors="replace", newline="") as stream:
+            yield stream
+        return
+
+    with _session_lock: cache_stats["misses"] += 1
+    CountMetric("cache_misses")
+    content_type = response.headers.get("Content-Type", "")
+    encoding = content_type.split("charset=")[1].split(";")[0].strip(' "') if "charset=" in content_type else "utf-8"
+    new_meta = _CacheMeta(url, response, encoding)
+    sink_path = _CacheTemp(url) if new_meta else None
+    sink = open(sink_path, "wb") if sink_path else None
+    record = snapshot_writer.blob() if snapshot_writer else None
+    tee = _TeeReader(response, sink, record)
+    try:
+        with io.TextIOWrapper(io.BufferedReader(tee, 1 << 16), encoding=encoding, errors="replace", newline="") as stream:
+            yield stream
+    finally:
+        response.close()
+        CountMetric("bytes_in", tee.count)
+        # Body read only partly (consumer stopped early or failed) is not snapshotted
+        if record:
+            if tee.finished: snapshot_writer.add_http(url, record.commit(), encoding)
+            else: record.discard()
+        if sink:
+            sink.close()
+            if tee.finished: _CacheCommit(url, new_meta, sink_path)
+            else: os.remove(sink_path)
+
+class TokenBucket:
+    """
+    Thread safe token bucket. Allows `rate` acquisitions per second with bursts up to `capacity`.
+    """
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+@Timed
+def CrawlPages(urls: list[str], per_host: int = 4, rate: float = 5.0, retries: int = 0, callback=None) -> dict[str, str | None]:
+    """
+    Fetches many pages concurrently with safe_request. Every host gets its own concurrency cap (per_host) and token bucket rate limit (rate requests per second).
+    Pages that failed are retried on their own up to `retries` more rounds with growing delay. callback(url, content) is called
+    for every page as soon as it is finished, in completion order.
+    Returns {url: content}, content is None for pages that failed.
+    """
+    limits = {}
+    for url in urls:
+        host = urllib.parse.urlsplit(url).netloc
+        if host not in limits: limits[host] = (threading.BoundedSemaphore(max(1, per_host)), TokenBucket(rate, max(1, per_host)))
+
+    record = CurrentMetrics()
+
+    def fetch(url: str) -> str | None:
+        _metrics_local.record = record
+        if SnapshotSource(): return safe_request(url)  # nothing goes to the host, no need to be polite
+        semaphore, bucket = limits[urllib.parse.urlsplit(url).netloc]
+        with semaphore:
+            bucket.acquire()
+            return safe_request(url)
+
+    results = {}
+    pending = list(dict.fromkeys(urls))
+    total = len(pending)
+    delay = 1.0
+    for attempt in range(retries + 1):
+        failed = []
+        with ThreadPoolExecutor(max_workers=max(1, per_host * len(limits))) as executor:
+            futures = {executor.submit(fetch, url): url for url in pending}
+            for future in as_completed(futures):
+                url = futures[future]
+                content = future.result()
+                if content is None and attempt < retries:
+                    failed.append(url)
+                    continue
+                results[url] = content
+                if callback: callback(url, content)
+                Progress(f"Getting ({len(results)}/{total}): {url}")
+        if not failed: break
+        print(f"\n \033[1;90m[\033[1;33mWARNING\033[1;90m]\033[0m Retrying {len(failed)} failed pages in {delay:.0f}s")
+        time.sleep(delay)
+        delay *= 2
+        pending = failed
+    return results
+
+# Crawl journals older than this are not resumed, their pages may have changed in the meantime
+JOURNAL_MAX_AGE = 86400
+
+class CrawlJournal:
+    """
+    On-disk journal of long crawl, one NDJSON line per finished unit (detail page, ...) with its parsed data, or a failure.
+    Lines are flushed as soon as units finish, so crawl that was interrupted or had failures resumes next run with only
+    missing and failed units. Journal is removed once every unit is done. Starts over when key (crawl parameters) or
+    PARSE_CACHE_VERSION changes or journal is older than JOURNAL_MAX_AGE. Disabled in snapshot runs, bundle has to
+    contain every page.
+    """
+    def __init__(self, name: str, key: str = "") -> None:
+        self.name = name
+        self.path = os.path.join(settings["journal"], f"{name}.ndjson") if settings["journal"] and not SnapshotSource() and not snapshot_writer else None
+        self.header = {"version": PARSE_CACHE_VERSION, "key": key, "started": time.time()}
+        self.done = {}
+        self.failures = {}
+        self.lock = threading.Lock()
+        self.file = None
+        if self.path is None: return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                header = json.loads(f.readline())
+                if header.get("version") == PARSE_CACHE_VERSION and header.get("key") == key and time.time() - header.get("started", 0) < JOURNAL_MAX_AGE:
+                    self.header = header
+                    for line in f:
+                        entry = json.loads(line)
+                        if "data" in entry:
+                            self.done[entry["unit"]] = entry["data"]
+                            self.failures.pop(entry["unit"], None)
+                        else:
+                            self.failures[entry["unit"]] = entry["failures"]
+        except (OSError, ValueError, AttributeError):
+            pass  # missing, stale or torn last line of killed run, whatever was read is kept
+        # Journal is compacted on every start, torn lines and repeated failures are dropped
+        os.makedirs(settings["journal"], exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.header) + "\n")
+            for unit, data in self.done.items(): f.write(json.dumps({"unit": unit, "data": data}) + "\n")
+            for unit, count in self.failures.items(): f.write(json.dumps({"unit": unit, "failures": count}) + "\n")
+        os.replace(tmp, self.path)
+        self.file = open(self.path, "a", encoding="utf-8")
+        if self.done or self.failures:
+            print(f" \033[1;90m[\033[1;33m+\033[1;90m]\033[0m {name}: resuming crawl journal, {len(self.done)} units done, {len(self.failures)} failed before")
+
+    def __enter__(self) -> CrawlJournal:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.file: self.file.close()
+
+    def pending(self, units: list[str]) -> list[str]:
+        return [unit for unit in units if unit not in self.done]
+
+    def record(self, unit: str, data) -> None:
+        with self.lock:
+            self.done[unit] = data
+            self.failures.pop(unit, None)
+            self.write({"unit": unit, "data": data})
+
+    def fail(self, unit: str) -> None:
+        with self.lock:
+            self.failures[unit] = self.failures.get(unit, 0) + 1
+            self.write({"unit": unit, "failures": self.failures[unit]})
+
+    def write(self, entry: dict) -> None:
+        if self.file:
+            self.file.write(json.dumps(entry) + "\n")
+            self.file.flush()
+
+    def finish(self, units: list[str]) -> None:
+        """
+        Removes journal when every unit is done, next run crawls fresh. Otherwise it is kept and failed units are retried next run.
+        """
+        if self.file is None: return
+        self.file.close()
+        self.file = None
+        missing = len(self.pending(units))
+        if missing:
+            print(f" \033[1;90m[\033[1;33mWARNING\033[1;90m]\033[0m {self.name}: {missing} units failed, kept in crawl journal and retried next run")
+        else:
+            os.remove(self.path)
+
+HTML_VOID = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+HTML_IMPLIED_END = {"tr": {"tr"}, "td": {"td", "th"}, "th": {"td", "th"}, "li": {"li"}, "p": {"p"}}
+
+class HtmlElement:
+    """
+    Element captured by ExtractHtml. Text of the element is joined once when first read, every descendant is kept
+    in document order with its own text, so cells, links and nested divs are found without building a full tree.
+    """
+    __slots__ = ("tag", "attrs", "parts", "descendants", "_text")
+
+    def __init__(self, tag: str, attrs: dict) -> None:
+        self.tag = tag
+        self.attrs = attrs
+        self.parts = []
+        self.descendants = []
+        self._text = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = "".join(self.parts)
+            self.parts = None
+        return self._text
+
+    def find_all(self, tag: str, cls: str | None = None) -> list[HtmlElement]:
+        return [i for i in self.descendants if i.tag == tag and (cls is None or cls in i.attrs.get("class", "").split())]
+
+    def find(self, tag: str, cls: str | None = None) -> HtmlElement | None:
+        found = self.find_all(tag, cls)
+        return found[0] if found else None
+
+class _HtmlCollector:
+    """
+    Parser target (start/end/data/close, as lxml calls it) collecting every tag/class element, optionally only inside first
+    `within` element. Only elements being collected are tracked, done is set once nothing more can match.
+    """
+    def __init__(self, tag: str, cls: str | None, within: str | None) -> None:
+        self.tag = tag
+        self.cls = cls
+        self.within = within
+        self.inside = within is None
+        self.depth = 0
+        self.stack = []
+        self.found = []
+        self.done = False
+
+    def start(self, tag: str, attrs) -> None:
+        if self.done: return
+        tag = tag.lower()
+        if not self.inside:
+            if tag == self.within: self.inside = True
+            return
+        if tag == self.within: self.depth += 1
+        if tag in HTML_VOID:
+            if self.stack: self.stack[-1].descendants.append(HtmlElement(tag, dict(attrs)))
+            return
+        implied = HTML_IMPLIED_END.get(tag)
+        if implied:
+            for i in range(len(self.stack) - 1, -1, -1):
+                if self.stack[i].tag in implied:
+                    del self.stack[i:]
+                    break
+                if self.stack[i].tag in ("table", "tr", "ul", "ol", "div"): break
+        if self.stack:
+            element = HtmlElement(tag, dict(attrs))
+            for i in self.stack: i.descendants.append(element)
+            self.stack.append(element)
+        elif tag == self.tag and (self.cls is None or self.cls in dict(attrs).get("class", "").split()):
+            element = HtmlElement(tag, dict(attrs))
+            self.found.append(element)
+            self.stack.append(element)
+
+    def end(self, tag: str) -> None:
+        if self.done or not self.inside: return
+        tag = tag.lower()
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i].tag == tag:
+                del self.stack[i:]
+                break
+        if tag == self.within:
+            if self.depth: self.depth -= 1
+            else:
+                self.done = True
+                self.stack.clear()
+
+    def data(self, data: str) -> None:
+        for i in self.stack: i.parts.append(data)
+
+    def close(self) -> list[HtmlElement]:
+        return self.found
+
+@functools.cache
+def _HtmlParserFeed() -> type:
+    """
+    Returns html.parser.HTMLParser subclass passing events to parser target the way lxml does (imported on first use).
+    """
+    import html.parser
+
+    class Feed(html.parser.HTMLParser):
+        def __init__(self, target: _HtmlCollector) -> None:
+            super().__init__(convert_charrefs=True)
+            self.target = target
+
+        def handle_starttag(self, tag: str, attrs: list) -> None:
+            self.target.start(tag, [(k, v or "") for k, v in attrs])
+
+        def handle_startendtag(self, tag: str, attrs: list) -> None:
+            self.handle_starttag(tag, attrs)
+            if tag not in HTML_VOID: self.target.end(tag)
+
+        def handle_endtag(self, tag: str) -> None:
+            self.target.end(tag)
+
+        def handle_data(self, data: str) -> None:
+            self.target.data(data)
+
+    return Feed
+
+@functools.cache
+def HtmlEngine() -> str:
+    """
+    Returns "lxml" when lxml is installed (libxml2 based, several times faster), "html.parser" otherwise.
+    """
+    try:
+        import lxml.etree
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+@Timed
+def ExtractHtml(content: str, tag: str, cls: str | None = None, within: str | None = None, engine: str | None = None, chunk_size: int = 65536) -> list[HtmlElement]:
+    """
+    Extracts every `tag` element (having class `cls`) from HTML page without building tree of the whole page. With `within`
+    (e.g. "table") parsing starts at first such element and stops when it is closed. Page is fed incrementally, so nothing
+    after the last interesting element is parsed. Engine is "lxml" or "html.parser", by default lxml when installed.
+    """
+    collector = _HtmlCollector(tag, cls, within)
+    start = 0
+    if within:
+        start = content.find(f"<{within}")
+        if start == -1: start = max(0, content.lower().find(f"<{within}"))
+    if (engine or HtmlEngine()) == "lxml":
+        import lxml.etree
+        parser = lxml.etree.HTMLParser(target=collector)
     else:
-        print(" \033[1;90m[\033[1;33m+\033[1;90m]\033[0m Pulling repository...")
-        os.system(f"cd {directory} && git pull")
-    print()
+        parser = _HtmlParserFeed()(collector)
+    for i in range(start, len(content), chunk_size):
+        parser.feed(content[i:i + chunk_size])
+        if collector.done: break
+    if not collector.done: parser.close()
+    return collector.found
+
+# Snapshot bundle: header, zlib compressed blobs named by sha256 of content (each stored once), compressed JSON manifest, footer with manifest offset
+SNAPSHOT_MAGIC = b"LOTSNAP1"
+SNAPSHOT_MARKER = ".lotcsv-snapshot"
+
+class _SnapshotBlob:
+    """
+    Blob being added to SnapshotWriter, written chunk by chunk (compressed into spooled temp file) and stored by commit(),
+    discard() drops it when it is not complete.
+    """
+    def __init__(self, writer: SnapshotWriter) -> None:
+        self.writer = writer
+        self.digest = hashlib.sha256()
+        self.compressor = zlib.compressobj(6)
+        self.spool = tempfile.SpooledTemporaryFile(max_size=1 << 23)
+        self.size = 0
+
+    def write(self, data: bytes) -> None:
+        self.digest.update(data)
+        self.spool.write(self.compressor.compress(data))
+        self.size += len(data)
+
+    def commit(self) -> str:
+        self.spool.write(self.compressor.flush())
+        return self.writer.store(self.digest.hexdigest(), self.spool, self.size)
+
+    def discard(self) -> None:
+        self.spool.close()
+
+class SnapshotWriter:
+    """
+    Writes snapshot bundle of everything sources read: HTTP bodies (add_http/http) and git checkouts (add_tree). Blobs are
+    content addressed, so files and bodies that are the same in several places are stored once. Bundle is written to temp file
+    and renamed by close(), abort() drops it.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.tmp = f"{path}.{os.getpid()}.tmp"
+        self.file = open(self.tmp, "wb")
+        self.file.write(SNAPSHOT_MAGIC)
+        self.lock = threading.Lock()
+        self.blobs = {}
+        self.http = {}
+        self.trees = {}
+        self.stored = 0
+        self.deduplicated = 0
+
+    def blob(self) -> _SnapshotBlob:
+        return _SnapshotBlob(self)
+
+    def store(self, digest: str, spool, size: int) -> str:
+        with self.lock:
+            if digest in self.blobs:
+                self.deduplicated += 1
+            else:
+                offset = self.file.tell()
+                spool.seek(0)
+                shutil.copyfileobj(spool, self.file, 1 << 20)
+                self.blobs[digest] = [offset, self.file.tell() - offset, size]
+                self.stored += size
+        spool.close()
+        return digest
+
+    def add(self, data: bytes) -> str:
+        blob = self.blob()
+        blob.write(data)
+        return blob.commit()
+
+    def add_http(self, url: str, digest: str, encoding: str) -> None:
+        with self.lock: self.http[url] = {"blob": digest, "encoding": encoding}
+
+    def add_tree(self, directory: str, url: str, commit: str | None) -> int:
+        """
+        Adds working tree of checkout (without .git), returns number of files.
+        """
+        files = {}
+        for root, dirs, names in os.walk(directory):
+            dirs[:] = sorted(i for i in dirs if i != ".git")
+            for name in sorted(names):
+                path = os.path.join(root, name)
+                if name == SNAPSHOT_MARKER or not os.path.isfile(path): continue
+                with open(path, "rb") as f: files[os.path.relpath(path, directory).replace(os.sep, "/")] = self.add(f.read())
+        with self.lock: self.trees[directory] = {"url": url, "commit": commit, "files": files}
+        return len(files)
+
+    def close(self, sources: list[str]) -> None:
+        manifest = {"version": 1, "created": datetime.datetime.now().isoformat(), "sources": sources,
+                    "http": self.http, "trees": self.trees, "blobs": self.blobs}
+        offset = self.file.tell()
+        self.file.write(zlib.compress(json.dumps(manifest).encode(), 6))
+        self.file.write(struct.pack("<Q", offset) + SNAPSHOT_MAGIC)
+        self.file.close()
+        os.replace(self.tmp, self.path)
+
+    def abort(self) -> None:
+        self.file.close()
+        if os.path.exists(self.tmp): os.remove(self.tmp)
+
+class _SnapshotStream(io.RawIOBase):
+    """
+    Raw reader decompressing blob straight from memory-mapped bundle, chunk by chunk.
+    """
+    def __init__(self, view: memoryview) -> None:
+        self.view = view
+        self.position = 0
+        self.decompressor = zlib.decompressobj()
+        self.pending = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        # Output per step is capped, so highly compressed blobs do not expand into memory at once
+        while not self.pending:
+            if self.decompressor.unconsumed_tail:
+                self.pending = self.decompressor.decompress(self.decompressor.unconsumed_tail, 1 << 20)
+            elif self.position < len(self.view):
+                chunk = self.view[self.position:self.position + (1 << 16)]
+                self.position += len(chunk)
+                self.pending = self.decompressor.decompress(chunk, 1 << 20)
+            else:
+                self.pending = self.decompressor.flush()
+                break
+        count = min(len(buffer), len(self.pending))
+        buffer[:count] = self.pending[:count]
+        self.pending = self.pending[count:]
+        return count
+
+class SnapshotReader:
+    """
+    Memory-mapped snapshot bundle. Blobs are decompressed from the mapping only when read, git checkouts are written out
+    by checkout() and reused as long as they match the bundle.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        footer = len(self.map) - 8 - len(SNAPSHOT_MAGIC)
+        if self.map[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC or footer < 0 or self.map[footer + 8:] != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not LotCSV snapshot")
+        offset = struct.unpack("<Q", self.map[footer:footer + 8])[0]
+        self.manifest = json.loads(zlib.decompress(self.map[offset:footer]))
+        self.view = memoryview(self.map)
+        self.sources = self.manifest["sources"]
+
+    def read(self, digest: str) -> bytes:
+        offset, length, _ = self.manifest["blobs"][digest]
+        return zlib.decompress(self.view[offset:offset + length])
+
+    def open(self, digest: str) -> _SnapshotStream:
+        offset, length, _ = self.manifest["blobs"][digest]
+        return _SnapshotStream(self.view[offset:offset + length])
+
+    def http(self, url: str) -> dict | None:
+        entry = self.manifest["http"].get(url)
+        if entry is None:
+            print(f" \033[1;90m[\033[1;31mERROR\033[1;90m]\033[0m {url} is not in snapshot {self.path}")
+        return entry
+
+    def checkout(self, directory: str) -> bool:
+        """
+        Writes tree of given checkout directory from bundle. Directory left by previous checkout of the same tree is reused,
+        live git clone in its place is never overwritten.
+        """
+        tree = self.manifest["trees"].get(directory)
+        if tree is None:
+            print(f" \033[1;90m[\033[1;31mERROR\033[1;90m]\033[0m {directory} is not in snapshot {self.path}")
+            return False
+        stamp = hashlib.sha256(json.dumps(tree["files"], sort_keys=True).encode()).hexdigest()
+        marker = os.path.join(directory, SNAPSHOT_MARKER)
+        if os.path.exists(directory):
+            try:
+                with open(marker) as f:
+                    if f.read() == stamp: return True
+            except OSError:
+                print(f" \033[1;90m[\033[1;31mERROR\033[1;90m]\033[0m {directory} exists and is not snapshot checkout, run from another directory")
+                return False
+            shutil.rmtree(directory)
+        print(f" \033[1;90m[\033[1;33m+\033[1;90m]\033[0m Checking out {directory} from snapshot (commit {(tree['commit'] or 'unknown')[:12]})...")
+        with Stage("snapshot checkout"):
+            for name, digest in tree["files"].items():
+                path = os.path.join(directory, *name.split("/"))
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as f: f.write(self.read(digest))
+            with open(marker, "w") as f: f.write(stamp)
+        return True
+
+snapshot_writer = None
+_snapshot_reader = None
+_snapshot_lock = threading.Lock()
+
+def _ResetSnapshot() -> None:
+    # Bundle being written belongs to the parent, forked workers must never append to it
+    global snapshot_writer, _snapshot_lock
+    snapshot_writer = None
+    _snapshot_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_ResetSnapshot)
+
+def SnapshotSource() -> SnapshotReader | None:
+    """
+    Returns bundle given by settings["from_snapshot"], opened once per process (process pool workers open their own mapping).
+    """
+    global _snapshot_reader
+    if settings["from_snapshot"] and (_snapshot_reader is None or _snapshot_reader.path != settings["from_snapshot"]):
+        with _snapshot_lock:
+            if _snapshot_reader is None or _snapshot_reader.path != settings["from_snapshot"]:
+                _snapshot_reader = SnapshotReader(settings["from_snapshot"])
+    return _snapshot_reader if settings["from_snapshot"] else None
+
+def RepositoryDirectory(url: str) -> str:
+    return url.rstrip("/").split("/")[-1].removesuffix(".git")
 
+def FinishSnapshot(writer: SnapshotWriter, results: dict[str, bool]) -> bool:
+    """
+    Adds git checkouts of successful sources to bundle and closes it. Returns False (bundle dropped) when nothing succeeded.
+    """
+    sources = [name for name, ok in results.items() if ok]
+    if not sources:
+        writer.abort()
+        print(f" \033[1;90m[\033[1;31mWARNING\033[1;90m]\033[0m No source succeeded, snapshot {writer.path} not written")
+        return False
+    reader = SnapshotSource()
+    for name in sources:
+        url = SOURCE_URLS.get(name)
+        directory = RepositoryDirectory(url) if url else ""
+        if not directory or directory in writer.trees: continue
+        if not os.path.isdir(os.path.join(directory, ".git")) and not os.path.exists(os.path.join(directory, SNAPSHOT_MARKER)): continue
+        if reader and directory in reader.manifest["trees"]: commit = reader.manifest["trees"][directory]["commit"]
+        else:
+            result = subprocess.run(["git", "-C", directory, "rev-parse", "HEAD"], capture_output=True, text=True)
+            commit = result.stdout.strip() if result.returncode == 0 else None
+        writer.add_tree(directory, url, commit)
+    writer.close(sources)
+    size = os.path.getsize(writer.path)
+    print(f" \033[1;90m[\033[1;32m+\033[1;90m]\033[0m Snapshot\033[1;90m:\033[0m \033[1;93m{writer.path}\033[0m ({len(sources)} sources, {len(writer.trees)} trees, "
+          f"{len(writer.http)} HTTP bodies, {len(writer.blobs)} blobs, {writer.deduplicated} duplicates, {writer.stored / 2**20:.1f} MiB -> {size / 2**20:.1f} MiB)")
+    return True
+
+@Timed
+def GetRepository(url: str, paths: list[str] | None = None) -> bool:
+    """
+    Clones repository into current directory or updates existing clone to latest commit of remote default branch. Clones are
+    shallow (depth 1) and blobless, with paths given only those directories are checked out (sparse checkout, top level files
+    are always present) so blobs of other files are never downloaded. Every git command is recorded as "git <command>" stage.
+    Returns False when there is no usable checkout, failed update of existing clone keeps previous checkout.
+    """
+    directory = RepositoryDirectory(url)
+    if SnapshotSource(): return SnapshotSource().checkout(directory)
+
+    def git(*args: str) -> bool:
+        command = args[2] if args[0] == "-C" else args[0]
+        with Stage("git " + command):
+            try:
+                result = subprocess.run(["git", *args], capture_output=True, text=True)
+            except OSError as e:
+                print(f" \033[1;90m[\033[1;31mERROR\033[1;90m]\033[0m git {command} {url}: {e}")
+                return False
+        if result.returncode != 0:
+            lines = result.stderr.strip().splitlines()
+            message = next((i for i in lines if i.startswith(("fatal:", "error:"))), lines[-1] if lines else "")
+            print(f" \033[1;90m[\033[1;31mERROR\033[1;90m]\033[0m git {command} {url} failed ({result.returncode}): {message}")
+        return result.returncode == 0
+
+    if not os.path.exists(directory):
+        print(" \033[1;90m[\033[1;33m+\033[1;90m]\033[0m Cloning repository...")
+        if not git("clone", "--depth", "1", "--filter=blob:none", "--no-tags", *(["--sparse"] if paths else []), url, directory) \
+                or (paths and not git("-C", directory, "sparse-checkout", "set", "--cone", *paths)):
+            shutil.rmtree(directory, ignore_errors=True)  # do not leave partial clone behind, next run clones again
+            return False
+        return True
+
+    print(" \033[1;90m[\033[1;33m+\033[1;90m]\033[0m Pulling repository...")
+    # Shallow history cannot be merged, latest commit is fetched and checked out instead of git pull
+    if not (git("-C", directory, "fetch", "--depth", "1", "--no-tags", "origin", "HEAD") and git("-C", directory, "reset", "--quiet", "--hard", "FETCH_HEAD")):
+        print(f" \033[1;90m[\033[1;31mWARNING\033[1;90m]\033[0m Using existing checkout of {directory}")
+    # Also narrows clones made before sparse checkout was used
+    if paths: git("-C", directory, "sparse-checkout", "set", "--cone", *paths)
+    return os.path.isdir(directory)
+
+@Timed
 def FindFiles(path: str, extension: str, exclude: list[str] = []) -> list[str]:
     """
     Crawls through specified directory and returns files with specific extenstion. You can also exclude directories and files.
@@ -64,443 +1050,1039 @@ def FindFiles(path: str, extension: str, exclude: list[str] = []) -> list[str]:
     found_files.reverse()
     return found_files
 
-def ReadFiles(files: list[str]) -> tuple[list[str], list[dict]]:
-    values = []
-    keys = []
+@functools.cache
+def GetYamlLoader() -> type:
+    """
+    Returns libyaml based loader, which is several times faster, or pure python one when PyYAML was built without it.
+    """
+    import yaml
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
-    def recursive_parse(data: dict | list | str, collected_data: dict, parent_key: str = "") -> None:
-        if isinstance(data, dict):
-            for key, val in data.items():
-                new_key = f"{parent_key}_{key}" if parent_key else key
-                if new_key.strip() not in keys:
-                    keys.append(new_key.strip())
-                recursive_parse(val, collected_data, new_key.strip())
-        elif isinstance(data, list):
-            for item in data:
-                recursive_parse(item, collected_data, parent_key)
-        else:
-            if "{'" not in str(data) and "'}" not in str(data):
-                if parent_key in collected_data:
-                    if isinstance(collected_data[parent_key], list):
-                        collected_data[parent_key].append(data)
-                    else:
-                        collected_data[parent_key] = [collected_data[parent_key], data]
-                else:
-                    collected_data[parent_key] = data
+# Key under which parsed records carry path of file they were read from. Not a column (keys come from Flattener), used by
+# derived columns of WriteExport, so they follow the record even when files yield no or several documents
+SOURCE_FILE = "\0file"
 
-    for file in files:
-        print(f" \033[1;90m[\033[1;36m~\033[1;90m] \033[0mReading: {file}                                  ", end="\r")
+# Invalid YAML alias-like entries of markdown front matter (key: *value), loaded as strings instead
+MARKDOWN_ALIAS = re.compile(r':\s+\*([^\s]+)')
+MARKDOWN_DELIMITERS = (b"---", b"...")
+
+def ReadFrontMatter(file: str, body: bool = False) -> tuple[str | None, str | None]:
+    """
+    Reads YAML front matter of markdown file, file is read only up to closing delimiter unless body is wanted too.
+    Returns (front matter, body), front matter is None when file does not start with "---", body is None unless asked for.
+    """
+    with open(file, "rb") as f:
+        if f.readline().removeprefix(b"\xef\xbb\xbf").rstrip() != b"---":
+            f.seek(0)
+            return None, f.read().decode("utf-8", errors="ignore") if body else None
+        lines = []
+        for line in f:
+            if line.rstrip() in MARKDOWN_DELIMITERS: break
+            lines.append(line)
+        return b"".join(lines).decode("utf-8", errors="ignore"), f.read().decode("utf-8", errors="ignore") if body else None
+
+def MarkdownBody(file: str | None) -> str:
+    """
+    Cell of lazy "Body" column of markdown sources, body of record's file is read only when its row is written.
+    """
+    return ReadFrontMatter(file, True)[1].strip() if file else ""
+
+def MarkdownBodyColumn() -> tuple[str, object] | None:
+    return ("Body", MarkdownBody) if settings["markdown_body"] else None
+
+def LoadYamlFile(file: str, markdown: bool = False) -> tuple[list, str | None]:
+    """
+    Loads all non empty YAML documents from file. For markdown files only the front matter is loaded, with invalid
+    alias-like entries fixed first, files without front matter are loaded whole. Returns (documents, error message).
+    """
+    content = None
+    if markdown: content = ReadFrontMatter(file)[0]
+    if content is None:
         with open(file, "r", errors="ignore") as f:
-            try:
-                documents = list(yaml.safe_load_all(f.read()))
-                for doc in documents:
-                    if doc is None:
-                        continue
-                    collected_data = {}
-                    recursive_parse(doc, collected_data)
-                    values.append(collected_data)
-            except yaml.YAMLError as e:
-                print(f"Error parsing YAML file {file}: {e}")
-
-    return keys, values
-
-def ReadMDFiles(files: list[str]) -> tuple[list[str], list[dict]]:
-    values = []
-    keys = []
+            content = f.read()
+    if markdown: content = MARKDOWN_ALIAS.sub(r': "\1"', content)
+    import yaml
+    try:
+        return [doc for doc in yaml.load_all(content, Loader=GetYamlLoader()) if doc is not None], None
+    except yaml.YAMLError as e:
+        return [], f"Error parsing YAML file {file}: {e}"
+
+def _LoadYamlChunk(files: list[str], markdown: bool) -> list[tuple[list, str | None]]:
+    return [LoadYamlFile(file, markdown) for file in files]
+
+def LoadYamlFiles(files: list[str], markdown: bool = False, engine: str | None = None):
+    """
+    Yields (file, documents, error) in order of files. Engine "serial" loads files one by one,
+    "parallel" spreads chunks of files across process pool. Defaults to settings["parse_engine"].
+    """
+    engine = engine or settings["parse_engine"]
+    if engine == "parallel" and len(files) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        workers = os.cpu_count() or 1
+        size = max(1, -(-len(files) // (workers * 4)))
+        chunks = [files[i:i+size] for i in range(0, len(files), size)]
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=ProcessContext()) as executor:
+            for chunk, results in zip(chunks, executor.map(_LoadYamlChunk, chunks, [markdown] * len(chunks))):
+                for file, (documents, error) in zip(chunk, results):
+                    yield file, documents, error
+    else:
+        for file in files:
+            yield file, *LoadYamlFile(file, markdown)
 
-    def recursive_parse(data: dict | list | str, collected_data: dict, parent_key: str = "") -> None:
+class Flattener:
+    """
+    Flattens nested documents into {key: value} records shared by all parsers. Nested keys are joined with key_separator,
+    multiple values under one key are collected into list, or joined into string when list_join is set.
+    Columns are tracked in insertion ordered dict, so discovering them stays O(1) per key.
+    """
+    def __init__(self, key_separator: str = "_", list_join: str | None = None, strip_keys: bool = True) -> None:
+        self.key_separator = key_separator
+        self.list_join = list_join
+        self.strip_keys = strip_keys
+        self.columns = {}
+
+    @property
+    def keys(self) -> list[str]:
+        return list(self.columns)
+
+    def flatten(self, document: dict | list | str) -> dict:
+        record = {}
+        self._walk(document, record, "")
+        if self.list_join is not None:
+            for key, val in record.items():
+                if isinstance(val, list): record[key] = self.list_join.join(str(item) for item in val)
+        return record
+
+    def _walk(self, data: dict | list | str, record: dict, parent_key: str) -> None:
         if isinstance(data, dict):
             for key, val in data.items():
-                new_key = f"{parent_key}_{key}" if parent_key else key
-                if new_key not in keys:
-                    keys.append(new_key)
-                recursive_parse(val, collected_data, new_key)
+                new_key = f"{parent_key}{self.key_separator}{key}" if parent_key else str(key)
+                if self.strip_keys: new_key = new_key.strip()
+                self.columns[new_key] = None
+                self._walk(val, record, new_key)
         elif isinstance(data, list):
             for item in data:
-                recursive_parse(item, collected_data, parent_key)
+                self._walk(item, record, parent_key)
+        elif isinstance(data, str) and ("{'" in data or "'}" in data):
+            # Leftovers of stringified dicts are skipped
+            return
+        elif parent_key in record:
+            current = record[parent_key]
+            if isinstance(current, list): current.append(data)
+            else: record[parent_key] = [current, data]
         else:
-            if "{'" not in str(data) and "'}" not in str(data):
-                if parent_key in collected_data:
-                    if isinstance(collected_data[parent_key], list):
-                        collected_data[parent_key].append(data)
-                    else:
-                        collected_data[parent_key] = [collected_data[parent_key], data]
-                else:
-                    collected_data[parent_key] = data
+            record[parent_key] = data
 
-    for file in files:
-        print(f" \033[1;90m[\033[1;36m~\033[1;90m] \033[0mReading: {file}                                  ", end="\r")
-        with open(file, "r", errors="ignore") as f:
-            content_raw = f.read().splitlines()
-            if content_raw and not content_raw[-1].strip():
-                content_raw.pop()
-            content = "\n".join(content_raw)
+class _Missing:
+    """
+    Slot of column record does not have. Pickled by reference, so it stays the same object in every process.
+    """
+    def __reduce__(self) -> str:
+        return "MISSING"
 
-            # Fix invalid YAML alias-like entries
-            content = re.sub(r':\s+\*([^\s]+)', r': "\1"', content)
+    def __repr__(self) -> str:
+        return "MISSING"
 
-            try:
-                documents = list(yaml.safe_load_all(content))
-                for doc in documents:
-                    if doc is None:
-                        continue
-                    collected_data = {}
-                    recursive_parse(doc, collected_data)
-                    values.append(collected_data)
-            except yaml.YAMLError as e:
-                print(f"Error parsing YAML file {file}: {e}")
+MISSING = _Missing()
 
+class RecordStore:
+    """
+    Compact in-memory store of flattened records. Column names are kept once and every record is tuple of slots indexed by column
+    position (shorter tuple means missing trailing columns). Short strings (categories, privileges, ...) are interned, lists are
+    stored as interned tuples. Iterating yields records as dicts so it can stand in for list of records, writers read slots directly (project).
+    """
+    intern_length = 64
+
+    def __init__(self) -> None:
+        self.columns = {}
+        self.rows = []
+        self.interned = {}
+
+    def intern(self, val):
+        if type(val) is str:
+            return self.interned.setdefault(val, val) if len(val) <= self.intern_length else val
+        if isinstance(val, list):
+            val = tuple(self.intern(i) for i in val)
+            # only all-string tuples, 1 == True == 1.0 would otherwise share one slot
+            return self.interned.setdefault(val, val) if all(type(i) is str for i in val) else val
+        return val
+
+    def append(self, record: dict) -> None:
+        columns = self.columns
+        slots = [MISSING] * len(columns)
+        for key, val in record.items():
+            i = columns.get(key)
+            if i is None:
+                i = columns[self.intern(key)] = len(columns)
+                slots.append(MISSING)
+            slots[i] = self.intern(val)
+        while slots and slots[-1] is MISSING: slots.pop()
+        self.rows.append(tuple(slots))
+
+    def extend(self, records) -> None:
+        for record in records: self.append(record)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self):
+        names = list(self.columns)
+        for row in self.rows:
+            yield {names[i]: val for i, val in enumerate(row) if val is not MISSING}
+
+    def project(self, keys: list[str]):
+        """
+        Yields every record as tuple of values in keys order, MISSING where record has no value.
+        """
+        width = len(self.columns)
+        positions = [self.columns.get(key, width) for key in keys]
+        pad = (MISSING,) * (width + 1)
+        if not positions:
+            for _ in self.rows: yield ()
+            return
+        getter = operator.itemgetter(*positions)
+        if len(positions) == 1:
+            for row in self.rows: yield (getter(row + pad[len(row):]),)
+        else:
+            for row in self.rows: yield getter(row + pad[len(row):])
 
-    return keys, values
+def ParseFiles(files: list[str], markdown: bool = False, engine: str | None = None):
+    """
+    Yields (file, keys, values) for every file, documents are flattened into {key: value} records.
+    """
+    for file, documents, error in LoadYamlFiles(files, markdown, engine):
+        Progress(f"Reading: {file}")
+        if error:
+            print(error)
+        flattener = Flattener(strip_keys=not markdown)
+        values = [flattener.flatten(doc) for doc in documents]
+        for value in values: value[SOURCE_FILE] = file
+        yield file, flattener.keys, values
+
+def ReadFiles(files: list[str], engine: str | None = None) -> tuple[list[str], RecordStore]:
+    keys = {}
+    values = RecordStore()
+    for _, file_keys, file_values in ParseFiles(files, False, engine):
+        keys.update(dict.fromkeys(file_keys))
+        values.extend(file_values)
+    return list(keys), values
+
+def ReadMDFiles(files: list[str], engine: str | None = None) -> tuple[list[str], RecordStore]:
+    keys = {}
+    values = RecordStore()
+    for _, file_keys, file_values in ParseFiles(files, True, engine):
+        keys.update(dict.fromkeys(file_keys))
+        values.extend(file_values)
+    return list(keys), values
+
+class RowSpool:
+    """
+    Append-only temporary row store. Records are pickled into temp file as they come, so memory stays flat while columns are
+    still being discovered. Can be iterated any number of times, records are read back one by one.
+    """
+    def __init__(self) -> None:
+        self.file = tempfile.TemporaryFile()
+        self.count = 0
+
+    def append(self, record: dict) -> None:
+        self.file.seek(0, os.SEEK_END)
+        pickle.dump(record, self.file, pickle.HIGHEST_PROTOCOL)
+        self.count += 1
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self):
+        self.file.flush()
+        position = 0
+        for _ in range(self.count):
+            self.file.seek(position)
+            record = pickle.load(self.file)
+            position = self.file.tell()
+            yield record
+
+    def close(self) -> None:
+        self.file.close()
+
+def StreamRecords(files: list[str], flattener: Flattener, markdown: bool = False, engine: str | None = None):
+    """
+    Yields flattened records one by one, columns are collected in flattener as they are discovered.
+    """
+    for file, documents, error in LoadYamlFiles(files, markdown, engine):
+        Progress(f"Reading: {file}")
+        if error:
+            print(error)
+        for doc in documents:
+            record = flattener.flatten(doc)
+            record[SOURCE_FILE] = file
+            yield record
+
+def SpoolFiles(files: list[str], markdown: bool = False) -> tuple[list[str], RowSpool]:
+    """
+    Streaming variant of ReadFiles/ReadMDFiles. Records are spilled to RowSpool, header is complete once all files were read.
+    """
+    flattener = Flattener(strip_keys=not markdown)
+    spool = RowSpool()
+    for record in StreamRecords(files, flattener, markdown):
+        spool.append(record)
+    return flattener.keys, spool
 
-def WriteExportCsv(output: str, values: list[dict], keys: list[str]) -> bool:
+def FileHashes(repository: str, files: list[str]) -> tuple[str | None, dict[str, str]]:
+    """
+    Returns (HEAD commit, {file: hash}) for files inside git repository. Git blob ids from the index are used for clean tracked files,
+    files modified in working tree or untracked ones are hashed by content.
+    """
+    def git(*args: str) -> str | None:
+        try:
+            result = subprocess.run(["git", "-C", repository, *args], capture_output=True, text=True)
+        except OSError:
+            return None
+        return result.stdout if result.returncode == 0 else None
+
+    commit = git("rev-parse", "HEAD")
+    blobs = {}
+    listing = git("ls-files", "-s", "-z")
+    dirty = git("diff", "--name-only", "-z")
+    if listing is not None and dirty is not None:
+        dirty = set(dirty.split("\0"))
+        for entry in listing.split("\0"):
+            if "\t" not in entry: continue
+            info, path = entry.split("\t", 1)
+            if path not in dirty: blobs[os.path.normpath(os.path.join(repository, path))] = info.split()[1]
+
+    hashes = {}
+    for file in files:
+        blob = blobs.get(os.path.normpath(file))
+        if blob is None:
+            with open(file, "rb") as f: blob = "sha1:" + hashlib.sha1(f.read()).hexdigest()
+        hashes[file] = blob
+    return commit.strip() if commit else None, hashes
+
+@Timed
+def ReadRepositoryFiles(name: str, repository: str, files: list[str], markdown: bool = False) -> tuple[list[str], RecordStore | RowSpool]:
     """
-    Exports collected data from yml file into csv.
+    Incremental variant of ReadFiles/ReadMDFiles for files of cloned repository. Parsed records are cached per file keyed on git blob hash,
+    only files that were added or changed since the last run are parsed again, deleted ones are dropped. Result is same as full parse.
+    Cache holds RecordStore columns and rows themselves with row range of every file, so cached files go into the store without
+    building dicts and changed ones are added as they are parsed. Rows are pickled in chunks after header, so pickle memo stays
+    bounded while writing. Columns only deleted files had stay unused until full rebuild (-fr).
+    With settings["streaming"] records are spooled to disk (RowSpool) instead.
     """
-    def sanitize(val: list | tuple):
-        if isinstance(val, (list, tuple)):
-            val = "[" + "-|-".join(f"''{str(item)}''" for item in val) + "]"
+    if settings["streaming"]:
+        # Parse cache keeps all records in memory, streaming mode trades it for bounded memory
+        return SpoolFiles(files, markdown)
+    if not settings["parse_cache"]:
+        return ReadMDFiles(files) if markdown else ReadFiles(files)
+
+    cache_path = os.path.join(settings["parse_cache"], f"{name}.pickle")
+    cached, columns, rows = {}, [], []
+    try:
+        with open(cache_path, "rb") as f:
+            header = pickle.load(f)
+            if header.get("version") == PARSE_CACHE_VERSION and header.get("markdown") == markdown:
+                for _ in range(header["chunks"]): rows.extend(pickle.load(f))
+                cached, columns = header["files"], header["columns"]
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+        cached, columns, rows = {}, [], []
+
+    commit, hashes = FileHashes(repository, files)
+    changed = [file for file in files if file not in cached or cached[file][0] != hashes[file]]
+    parsed_files = ParseFiles(changed, markdown)
+    keys = {}
+    entries = {}
+    values = RecordStore()
+    # cached rows index columns by position, so store starts with cached columns in same order
+    values.columns = {column: i for i, column in enumerate(columns)}
+    for file in files:
+        start = len(values)
+        entry = cached.get(file)
+        if entry is None or entry[0] != hashes[file]:
+            _, file_keys, file_values = next(parsed_files)
+            file_keys = values.intern(file_keys)
+            values.extend(file_values)
+            del file_values
         else:
-            val = str(val)
-        val = val.replace('"', '""')                        # Escape double quotes
-        val = val.replace('\n', ' ').replace('\r', ' ')     # Remove newlines
-        return val.strip()
-    with open(output, "w", encoding="utf-8", errors="ignore") as f:
-        head = '"' + '","'.join([k.strip() for k in keys]) + '","is_legit"' + '\n'
-        f.write(head)
-        for value in values:
-            line_items = []
-            for key in keys:
-                val = value.get(key, "")
-                sanitized = sanitize(val)
-                line_items.append(sanitized)
-            line = '"' + '","'.join(line_items) + '","false"' + '\n'
-            f.write(line)
-    print(f"\n \033[1;90m[\033[1;32m+\033[1;90m]\033[0m Output file\033[1;90m:\033[0m \033[1;93m{output}\033[0m")
-    return os.path.exists(output)
-
-def StringifyExistingCsv(content: str,output: str) -> bool:
-    """
-    Just makes csv as strings.
-    """
-    result = []
-    for line in content.splitlines():
-        row = []
-        value = ""
-        in_quotes = False
-        i = 0
-        while i < len(line):
-            char = line[i]
-            if char == '"' and (i == 0 or line[i - 1] != "\\"):
-                in_quotes = not in_quotes
-            elif char == "," and not in_quotes:
-                row.append(value.strip())
-                value = ""
+            _, file_keys, first, count = entry
+            values.rows.extend(rows[first:first + count])
+        entries[file] = (hashes[file], file_keys, start, len(values) - start)
+        keys.update(dict.fromkeys(file_keys))
+    del rows  # cached rows live on in store only
+
+    parsed = len(changed)
+    if parsed or len(entries) != len(cached):
+        os.makedirs(settings["parse_cache"], exist_ok=True)
+        tmp = f"{cache_path}.{os.getpid()}.tmp"
+        chunks = range(0, len(values), PARSE_CACHE_CHUNK)
+        with open(tmp, "wb") as f:
+            pickler = pickle.Pickler(f, pickle.HIGHEST_PROTOCOL)
+            pickler.dump({"version": PARSE_CACHE_VERSION, "markdown": markdown, "commit": commit, "columns": list(values.columns), "files": entries,
+                          "chunks": len(chunks)})
+            for i in chunks:
+                pickler.clear_memo()
+                pickler.dump(values.rows[i:i + PARSE_CACHE_CHUNK])
+        os.replace(tmp, cache_path)
+    removed = len(set(cached) - set(entries))
+    print(f" \033[1;90m[\033[1;33m+\033[1;90m]\033[0m {name}: parsed {parsed} new/changed files, reused {len(files) - parsed}, dropped {removed} deleted (commit {commit[:12] if commit else 'unknown'})                  ")
+    return list(keys), values
+
+def sanitize(val) -> str:
+    """
+    Formats single value as csv cell content, lists are encoded as [''item''-|-''item''].
+    Double quotes are escaped per RFC 4180 and newlines flattened, most cells need neither so they are checked first.
+    """
+    if type(val) is not str:
+        val = "[" + "-|-".join(f"''{item}''" for item in val) + "]" if isinstance(val, (list, tuple)) else str(val)
+    if '"' in val: val = val.replace('"', '""')
+    if "\n" in val or "\r" in val: val = val.replace("\n", " ").replace("\r", " ")
+    return val.strip()
+
+# Export formats, csv is written by WriteExport itself, others by sink classes below (-f/--format)
+EXPORT_FORMATS = {"csv": ".csv", "ndjson": ".ndjson", "parquet": ".parquet", "sqlite": ".sqlite"}
+
+def ExportPath(output: str, format: str) -> str:
+    return os.path.splitext(output)[0] + EXPORT_FORMATS[format]
+
+def PublishTemp(path: str) -> str:
+    """
+    Temp file next to export. Exports are written there and moved over the export by os.replace once complete, so readers
+    (collectors, export server) only ever see whole files.
+    """
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+def Unpublish(tmp: str) -> None:
+    if os.path.exists(tmp): os.remove(tmp)
+
+class NdjsonSink:
+    """
+    Writes records as one JSON object per line. Lists stay arrays, missing cells are left out, is_legit is boolean.
+    """
+    def __init__(self, path: str, header: list[str]) -> None:
+        self.path = path
+        self.header = header
+        self.rows = 0
+        self.tmp = PublishTemp(path)
+        self.file = open(self.tmp, "w", encoding="utf-8", buffering=1 << 20)
+
+    def write(self, rows: list[list]) -> None:
+        dumps = json.dumps
+        lines = []
+        for row in rows:
+            record = {key: val for key, val in zip(self.header, row) if val is not None}
+            record["is_legit"] = False
+            lines.append(dumps(record, ensure_ascii=False, default=str) + "\n")
+        self.file.writelines(lines)
+        self.rows += len(rows)
+
+    def abort(self) -> None:
+        self.file.close()
+        Unpublish(self.tmp)
+
+    def close(self) -> None:
+        self.file.close()
+        os.replace(self.tmp, self.path)
+
+def SqliteColumns(header: list[str]) -> list[str]:
+    """
+    Column names for SQLite table. Names differing only in case (same column for SQLite) get "_" appended.
+    """
+    seen = set()
+    columns = []
+    for key in header:
+        name = key
+        while name.lower() in seen: name += "_"
+        seen.add(name.lower())
+        columns.append(name)
+    return columns
+
+def SqliteQuote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+class SqliteSink:
+    """
+    Writes records into "records" table of new SQLite database. Lists are stored as JSON arrays, is_legit as 0/1.
+    """
+    def __init__(self, path: str, header: list[str]) -> None:
+        import sqlite3
+        self.path = path
+        self.header = header
+        self.rows = 0
+        self.tmp = PublishTemp(path)
+        Unpublish(self.tmp)
+        self.db = sqlite3.connect(self.tmp)
+        self.db.execute("PRAGMA journal_mode=OFF")
+        self.db.execute("PRAGMA synchronous=OFF")
+        columns = SqliteColumns(header + ["is_legit"])
+        self.db.execute(f"CREATE TABLE records ({', '.join(SqliteQuote(i) for i in columns)})")
+        self.insert = f"INSERT INTO records VALUES ({', '.join('?' * len(columns))})"
+
+    @staticmethod
+    def cell(val):
+        if val is None or type(val) in (str, int, float, bool): return val
+        if isinstance(val, (list, tuple)): return json.dumps(val, ensure_ascii=False, default=str)
+        return str(val)
+
+    def write(self, rows: list[list]) -> None:
+        cell = self.cell
+        self.db.executemany(self.insert, ([cell(i) for i in row] + [False] for row in rows))
+        self.rows += len(rows)
+
+    def abort(self) -> None:
+        self.db.close()
+        Unpublish(self.tmp)
+
+    def close(self) -> None:
+        self.db.commit()
+        self.db.close()
+        os.replace(self.tmp, self.path)
+
+class ParquetSink:
+    """
+    Writes records into zstd compressed Parquet file, one row group per batch. Columns holding lists become list<string> (single
+    values of such column are one item lists), others string, is_legit is boolean. List columns are set by WriteExport from all
+    records (lists), records that can be read only once decide them by first batch. Needs pyarrow.
+    """
+    def __init__(self, path: str, header: list[str]) -> None:
+        import pyarrow
+        import pyarrow.parquet
+        self.pa = pyarrow
+        self.parquet = pyarrow.parquet
+        self.path = path
+        self.tmp = PublishTemp(path)
+        self.header = header
+        self.rows = 0
+        self.lists = None
+        self.writer = None
+
+    def write(self, rows: list[list]) -> None:
+        if not rows: return
+        pa = self.pa
+        if self.writer is None:
+            if self.lists is None: self.lists = [any(isinstance(row[i], (list, tuple)) for row in rows) for i in range(len(self.header))]
+            fields = [pa.field(key, pa.list_(pa.string()) if is_list else pa.string()) for key, is_list in zip(self.header, self.lists)]
+            self.schema = pa.schema(fields + [pa.field("is_legit", pa.bool_())])
+            self.writer = self.parquet.ParquetWriter(self.tmp, self.schema, compression="zstd")
+        columns = []
+        for i, is_list in enumerate(self.lists):
+            if is_list:
+                columns.append([None if row[i] is None else [str(j) for j in row[i]] if isinstance(row[i], (list, tuple)) else [str(row[i])] for row in rows])
             else:
-                value += char
-            i += 1
-        row.append(value.strip())
-        result.append([str(cell) for cell in row])
+                # Column was scalar in first batch, later lists are kept as JSON text
+                columns.append([None if row[i] is None else json.dumps(row[i], ensure_ascii=False, default=str) if isinstance(row[i], (list, tuple)) else str(row[i]) for row in rows])
+        columns.append([False] * len(rows))
+        self.writer.write_table(pa.Table.from_arrays(columns, schema=self.schema))
+        self.rows += len(rows)
+
+    def abort(self) -> None:
+        if self.writer is not None: self.writer.close()
+        Unpublish(self.tmp)
+
+    def close(self) -> None:
+        if self.writer is None:  # no rows, still write file with header columns
+            self.parquet.write_table(self.pa.table({key: self.pa.array([], self.pa.string()) for key in self.header + ["is_legit"]}), self.tmp)
+        else:
+            self.writer.close()
+        os.replace(self.tmp, self.path)
+
+# Identity columns of exports for delta exports, others use first name-like column (INDEX_NAME_COLUMNS) or first column
+DELTA_KEYS = {
+    "bootloaders": ["Id"],
+    "loldrivers": ["Id"],
+    "lottunnels_domain": ["Name", "Domain"],
+    "lotwebhooks": ["URL"],
+    "lots_project": ["Website"],
+    "lots_project_additional": ["Website"],
+}
+
+DELTA_SUFFIXES = ("_added", "_changed", "_removed")
+
+def IdentityColumns(export: str, header: list[str]) -> list[str]:
+    """
+    Columns identifying records of export: DELTA_KEYS, first name-like column (INDEX_NAME_COLUMNS) or first column.
+    """
+    lower = [i.lower() for i in header]
+    names = DELTA_KEYS.get(export) or [next((header[lower.index(i)] for i in INDEX_NAME_COLUMNS if i in lower), header[0] if header else "")]
+    return [i for i in names if i in header]
 
-    with open(output,"w", encoding="utf-8", errors="ignore") as f:
-        for j,i in enumerate(result):
-            f.write('"' + '","'.join(i) + '","is_legit"'+"\n") if j == 0 else f.write('"' + '","'.join(i) + '","false"'+"\n")
-    print(f" \033[1;90m[\033[1;32m+\033[1;90m]\033[0m Output file\033[1;90m:\033[0m \033[1;93m{output}\033[0m")
-    return os.path.exists(output)
+class DeltaSink:
+    """
+    Compares export with manifest of previous run (settings["delta"]/<export>.json, {identity: row digest}) and writes
+    <export>_added.csv and <export>_changed.csv with full rows and <export>_removed.csv with identities only.
+    Rows are identified by DELTA_KEYS columns, repeated identities get "#2", "#3", ... appended in order of appearance.
+    Manifest is replaced only when export was written completely. Delta files written by source run are listed in
+    settings["delta"]/<source>.files, so next run of the source removes them first (ClearDeltas).
+    """
+    def __init__(self, output: str, header: list[str]) -> None:
+        self.export = os.path.basename(os.path.splitext(output)[0])
+        self.stem = os.path.splitext(output)[0]
+        self.header = header
+        self.key = [header.index(i) for i in IdentityColumns(self.export, header)] or [0]
+        self.key_names = [header[i] for i in self.key] if header else ["row"]
+        self.manifest = os.path.join(settings["delta"], self.export + ".json")
+        try:
+            with open(self.manifest, "r") as f: self.previous = json.load(f)["rows"]
+        except (OSError, ValueError, KeyError):
+            self.previous = {}
+        self.current = {}
+        self.counts = {"added": 0, "changed": 0, "removed": 0}
+        self.path = self.stem + "_added.csv"
+        self.files = {}
+        for change in ["added", "changed"]:
+            self.files[change] = open(PublishTemp(f"{self.stem}_{change}.csv"), "w", encoding="utf-8", errors="ignore", buffering=1 << 20)
+            self.files[change].write('"' + '","'.join(sanitize(k) for k in header + ["is_legit"]) + '"\n')
+
+    @property
+    def rows(self) -> int:
+        return self.counts["added"]
+
+    def write(self, rows: list[list]) -> None:
+        current = self.current
+        for row in rows:
+            identity = "|".join(str(row[i]) if i < len(row) and row[i] is not None else "" for i in self.key)
+            if identity in current:
+                n = 2
+                while f"{identity}#{n}" in current: n += 1
+                identity = f"{identity}#{n}"
+            digest = hashlib.blake2b(json.dumps(row, ensure_ascii=False, default=str).encode(), digest_size=10).hexdigest()
+            current[identity] = digest
+            old = self.previous.get(identity)
+            if old == digest: continue
+            change = "added" if old is None else "changed"
+            self.counts[change] += 1
+            self.files[change].write('"' + '","'.join(sanitize("" if i is None else i) for i in row) + '","false"\n')
+
+    def abort(self) -> None:
+        for f in self.files.values():
+            f.close()
+            Unpublish(f.name)
+
+    def close(self) -> None:
+        for change, f in self.files.items():
+            f.close()
+            os.replace(f.name, f"{self.stem}_{change}.csv")
+        removed = [i for i in self.previous if i not in self.current]
+        self.counts["removed"] = len(removed)
+        tmp = PublishTemp(self.stem + "_removed.csv")
+        with open(tmp, "w", encoding="utf-8", errors="ignore") as f:
+            f.write('"' + "|".join(sanitize(i) for i in self.key_names) + '"\n')
+            f.writelines('"' + sanitize(i) + '"\n' for i in removed)
+        os.replace(tmp, self.stem + "_removed.csv")
+        os.makedirs(settings["delta"], exist_ok=True)
+        tmp = PublishTemp(self.manifest)
+        with open(tmp, "w") as f:
+            json.dump({"key": self.key_names, "updated": datetime.datetime.now().isoformat(), "rows": self.current}, f)
+        os.replace(tmp, self.manifest)
+        RecordOutput(self.stem + "_changed.csv", self.counts["changed"], len(self.header))
+        RecordOutput(self.stem + "_removed.csv", self.counts["removed"], 1)
+        source = getattr(_metrics_local, "source", None)
+        if source:
+            listing = os.path.join(settings["delta"], source + ".files")
+            try:
+                with open(listing, "r") as f: files = json.load(f)
+            except (OSError, ValueError):
+                files = []
+            files += [f"{self.stem}_{change}.csv" for change in ["added", "changed", "removed"]]
+            tmp = PublishTemp(listing)
+            with open(tmp, "w") as f: json.dump(files, f)
+            os.replace(tmp, listing)
+        print(f" \033[1;90m[\033[1;33mINFO\033[1;90m]\033[0m Delta of {self.export}: {self.counts['added']} added, {self.counts['changed']} changed, {self.counts['removed']} removed")
+
+def ClearDeltas(source: str) -> None:
+    """
+    Removes delta files previous run of source wrote, so source failing before its export is written leaves no stale deltas
+    behind. Manifests stay, next complete export is compared with last complete one.
+    """
+    listing = os.path.join(settings["delta"], source + ".files")
+    try:
+        with open(listing, "r") as f: files = json.load(f)
+    except (OSError, ValueError):
+        return
+    for file in files + [listing]:
+        try:
+            os.remove(file)
+        except OSError:
+            pass
+
+EXPORT_SINKS = {"ndjson": NdjsonSink, "parquet": ParquetSink, "sqlite": SqliteSink}
+
+def OpenSinks(output: str, header: list[str], formats: list[str], delta: bool = False, lists: list[bool] | None = None) -> list:
+    sinks = [EXPORT_SINKS[i](ExportPath(output, i), header) for i in formats if i != "csv"]
+    for sink in sinks:
+        if isinstance(sink, ParquetSink): sink.lists = lists
+    if delta and settings["delta"]: sinks.append(DeltaSink(output, header))
+    return sinks
+
+def ListColumns(values, keys: list[str]) -> list[bool] | None:
+    """
+    Which of keys hold list in any record, None when records can be read only once (generators).
+    """
+    if isinstance(values, RecordStore):
+        names = list(values.columns)
+        found = set()
+        for row in values.rows:
+            for i, val in enumerate(row):
+                if type(val) is tuple: found.add(names[i])
+    elif isinstance(values, (list, RowSpool)):
+        found = {key for value in values for key, val in value.items() if isinstance(val, (list, tuple))}
+    else:
+        return None
+    return [key in found for key in keys]
+
+def CloseSinks(sinks: list) -> bool:
+    for sink in sinks:
+        sink.close()
+        RecordOutput(sink.path, sink.rows, len(sink.header))
+        print(f" \033[1;90m[\033[1;32m+\033[1;90m]\033[0m Output file\033[1;90m:\033[0m \033[1;93m{sink.path}\033[0m")
+    return all(os.path.exists(sink.path) for sink in sinks)
+
+@Timed
+def WriteExport(output: str, values: list[dict], keys: list[str], first_column: tuple[str, object] | None = None, batch_size: int = 5000, formats: list[str] | None = None,
+                last_column: tuple[str, object] | None = None) -> bool:
+    """
+    Exports collected records in every selected format (settings["formats"]), output is csv path and other formats get its extension swapped.
+    With settings["delta"] added/changed/removed rows since previous run are written too (DeltaSink), unless formats are given explicitly.
+    Csv has every cell quoted and is_legit column added. first_column=(name, func) prepends derived column (like file stem "Name"),
+    last_column appends one (like lazy markdown "Body"), cells are func(path) of file record was parsed from (SOURCE_FILE), None for others.
+    Records are consumed once and written in batches, so memory stays bounded for streamed values.
+    """
+    delta = formats is None
+    formats = formats or settings["formats"]
+    header = ([first_column[0]] if first_column else []) + [k.strip() for k in keys] + ([last_column[0]] if last_column else []) + ["is_legit"]
+    derived = first_column[1] if first_column else None
+    appended = last_column[1] if last_column else None
+    sourced = derived is not None or appended is not None
+    # Parquet schema is fixed by its first row group, so list columns are decided from all records up front
+    lists = ListColumns(values, keys) if "parquet" in formats else None
+    if lists is not None: lists = ([False] if first_column else []) + lists + ([False] if last_column else [])
+    sinks = OpenSinks(output, header[:-1], formats, delta, lists)
+    f = open(PublishTemp(output), "w", encoding="utf-8", errors="ignore", buffering=1 << 20) if "csv" in formats else None
+    try:
+        if f: f.write('"' + '","'.join(sanitize(k) for k in header) + '"\n')
+        lines = []
+        batch = []
+        rows = 0
+        # RecordStore slots are read by position, other records through dict lookups
+        store = isinstance(values, RecordStore)
+        for value in values.project(keys + [SOURCE_FILE] if sourced else keys) if store else values:
+            rows += 1
+            if sourced:
+                if store:
+                    source = value[-1] if value[-1] is not MISSING else None
+                    value = value[:-1]
+                else:
+                    source = value.get(SOURCE_FILE)
+                name = derived(source) if derived is not None else None
+                extra = appended(source) if appended is not None else None
+            if f:
+                if store: cells = ["" if i is MISSING else sanitize(i) for i in value]
+                else:
+                    get = value.get
+                    # wide exports (merged entities) are mostly empty cells, those skip sanitize
+                    cells = ["" if (cell := get(key, "")) == "" else sanitize(cell) for key in keys]
+                if derived is not None: cells.insert(0, sanitize(name))
+                if appended is not None: cells.append(sanitize(extra))
+                lines.append('"' + '","'.join(cells) + '","false"\n')
+            if sinks:
+                cells = [None if i is MISSING else i for i in value] if store else [value.get(key) for key in keys]
+                if derived is not None: cells.insert(0, name)
+                if appended is not None: cells.append(extra)
+                batch.append(cells)
+            if len(lines) >= batch_size or len(batch) >= batch_size:
+                if f: f.writelines(lines)
+                for sink in sinks: sink.write(batch)
+                lines.clear()
+                batch = []
+        if f: f.writelines(lines)
+        for sink in sinks: sink.write(batch)
+        CheckCancelled()
+    except BaseException:
+        for sink in sinks: sink.abort()  # partial exports are dropped, delta manifest is not replaced
+        if f:
+            f.close()
+            Unpublish(f.name)
+        raise
+    finally:
+        if f: f.close()
+    if f: os.replace(f.name, output)
+    ok = CloseSinks(sinks)
+    if f:
+        RecordOutput(output, rows, len(header) - 1)
+        print(f"\n \033[1;90m[\033[1;32m+\033[1;90m]\033[0m Output file\033[1;90m:\033[0m \033[1;93m{output}\033[0m")
+        ok = ok and os.path.exists(output)
+    return ok
+
+def WriteExportCsv(output: str, values: list[dict], keys: list[str], first_column: tuple[str, object] | None = None, batch_size: int = 5000) -> bool:
+    """
+    Csv only WriteExport, regardless of selected formats.
+    """
+    return WriteExport(output, values, keys, first_column, batch_size, ["csv"])
+
+def FileStem(file: str | None) -> str:
+    return os.path.splitext(os.path.basename(file))[0] if file else ""
+
+@Timed
+def StringifyExistingCsv(content, output: str, strip: bool = True, batch_size: int = 5000, formats: list[str] | None = None) -> bool:
+    """
+    Rewrites existing csv with every cell quoted as string and adds is_legit column, other selected formats (settings["formats"]) and delta get same rows.
+    Content can be whole csv text, text stream (safe_stream) or iterable of rows, streams are re-emitted row by row as they arrive.
+    """
+    delta = formats is None
+    formats = formats or settings["formats"]
+    csv.field_size_limit(2**31 - 1)
+    if isinstance(content, str): content = io.StringIO(content)
+    rows = csv.reader(content) if isinstance(content, io.IOBase) else content
+    sinks = []
+    f = open(PublishTemp(output), "w", encoding="utf-8", errors="ignore", newline="") if "csv" in formats else None
+    try:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL, lineterminator="\n") if f else None
+        j = columns = 0
+        batch = []
+        other_formats = any(i != "csv" for i in formats) or bool(delta and settings["delta"])
+        for j,row in enumerate(rows):
+            if other_formats:
+                cells = [cell.strip() for cell in row] if strip else list(row)
+                if j == 0: sinks = OpenSinks(output, cells, formats, delta)
+                else: batch.append((cells + [None] * len(sinks[0].header))[:len(sinks[0].header)] if len(cells) != len(sinks[0].header) else cells)
+                if len(batch) >= batch_size:
+                    for sink in sinks: sink.write(batch)
+                    batch = []
+            if writer is None:
+                continue
+            # Newlines inside quoted cells are flattened like in WriteExport, exports stay one row per line
+            row = [cell.replace("\r", " ").replace("\n", " ") for cell in row]
+            if strip: row = [cell.strip() for cell in row]
+            row.append("is_legit" if j == 0 else "false")
+            columns = max(columns, len(row) - 1)
+            writer.writerow(row)
+        for sink in sinks: sink.write(batch)
+        CheckCancelled()
+    except BaseException:
+        for sink in sinks: sink.abort()  # partial exports are dropped, delta manifest is not replaced
+        if f:
+            f.close()
+            Unpublish(f.name)
+        raise
+    finally:
+        if f: f.close()
+    if f: os.replace(f.name, output)
+    ok = CloseSinks(sinks)
+    if f:
+        RecordOutput(output, j, columns)
+        print(f" \033[1;90m[\033[1;32m+\033[1;90m]\033[0m Output file\033[1;90m:\033[0m \033[1;93m{output}\033[0m")
+        ok = ok and os.path.exists(output)
+    return ok
 
 def ReadSpecificYml(path: str) -> None:
     keys, values = ReadFiles([path])
-    print(values)
+    print(list(values))
     print("\n\n -------------------------------------------- \n\n")
     print(keys)
 
 def GetLOLC2(output: str) -> bool:
     def ParseJSON(contents: str) -> tuple[list[dict], list[str]]:
+        flattener = Flattener(strip_keys=False)
         values = []
-        keys = []
 
         content = json.loads(contents)
         for i in content:
-            collected_data = {}
-            collected_data["name"] = i
-            if not "name" in keys: keys.append("name")
+            collected_data = {"name": i}
             for j in content[i]:
-                if not j in keys: keys.append(j)
                 if "descriptionUrl" in j:
                     with open("lolc2.github.io/"+content[i][j],"r",encoding="utf-8",errors="ignore") as f:desc_raw = f.read().splitlines()
+                    desc = ""
                     for l,k in enumerate(desc_raw):
                        if not k.startswith("###") and not ("![" in k and "](" in k) and len(k)>2 and not l>5: desc = k;break
                     collected_data[j] = desc
                 else:
-                    if isinstance(content[i][j], list):
-                        collected_data[j] = []
-                        for k in content[i][j]:
-                            collected_data[j].append(k)
-                    else:
-                        collected_data[j, content[i][j]]
-            values.append(collected_data)
-        return values, keys
+                    collected_data[j] = content[i][j]
+            values.append(flattener.flatten(collected_data))
+        return values, flattener.keys
     print(" \033[1;90m[\033[1;96m~\033[1;90m]\033[0m Starting LOLC2")
-    GetRepository("https://github.com/lolc2/lolc2.github.io")
+    if not GetRepository(SOURCE_URLS["lolc2"]): return False
 
     with open("lolc2.github.io/c2_data.json","r",encoding="utf-8",errors="ignore") as f:
         contents = f.read()
     values, keys = ParseJSON(contents)
-    return WriteExportCsv(output, values, keys)
+    return WriteExport(output, values, keys)
 
 
 def GetGTFOBins(output: str) -> bool:
-    def WriteExportMdCsv(output: str, values: list[dict], keys: list[str], md_files: list[str]) -> bool:
-        def sanitize(val: list | tuple):
-            if isinstance(val, (list, tuple)):
-                val = "[" + "-|-".join(f"''{str(item)}''" for item in val) + "]"
-            else:
-                val = str(val)
-            val = val.replace('"', '""')                        # Escape double quotes
-            val = val.replace('\n', ' ').replace('\r', ' ')     # Remove newlines
-            return val.strip()
-        with open(output, "w", encoding="utf-8", errors="ignore") as f:
-            head = '"Name","' + '","'.join([k.strip() for k in keys]) + '","is_legit"' + '\n'
-            f.write(head)
-            for i,value in enumerate(values):
-                line_items = []
-                for key in keys:
-                    val = value.get(key, "")
-                    sanitized = sanitize(val)
-                    line_items.append(sanitized)
-                line = f'"{md_files[i].split("/")[2].split(".md")[0]}' + '","'.join(line_items) + '","false"' + '\n'
-                f.write(line)
-        print(f"\n \033[1;90m[\033[1;32m+\033[1;90m]\033[0m Output file\033[1;90m:\033[0m \033[1;93m{output}\033[0m")
-        return os.path.exists(output)
     print(" \033[1;90m[\033[1;96m~\033[1;90m]\033[0m Starting GTFOBins")
-    GetRepository("https://github.com/GTFOBins/GTFOBins.github.io")
+    if not GetRepository(SOURCE_URLS["gtfobins"], ["_gtfobins"]): return False
 
     md_files = FindFiles("GTFOBins.github.io/_gtfobins/",".md")
-    keys, values = ReadMDFiles(md_files)
-    return WriteExportMdCsv(output,values,keys,md_files)
+    keys, values = ReadRepositoryFiles("gtfobins", "GTFOBins.github.io", md_files, True)
+    return WriteExport(output,values,keys,("Name", FileStem),last_column=MarkdownBodyColumn())
 
 def GetLOLBAS(output: str) -> bool:
     print(" \033[1;90m[\033[1;96m~\033[1;90m]\033[0m Starting LOLBAS")
-    GetRepository("https://github.com/LOLBAS-Project/LOLBAS")
+    if not GetRepository(SOURCE_URLS["lolbas"], ["yml"]): return False
 
     yml_files = FindFiles("LOLBAS/yml/",".yml",["HonorableMentions"])
-    keys, values = ReadFiles(yml_files)
-    return WriteExportCsv(output,values,keys)
+    keys, values = ReadRepositoryFiles("lolbas", "LOLBAS", yml_files)
+    return WriteExport(output,values,keys)
 
 
 def GetLOLDrivers(output: str) -> bool:
     print(" \033[1;90m[\033[1;96m~\033[1;90m]\033[0m Starting LOLDrivers")
-    content = safe_request("https://www.loldrivers.io/api/drivers.csv")
-    if content is None:
-        print(f" \033[1;90m[\033[1;31mFAILED\033[1;90m]\033[0m Failed to fetch LOLDrivers data")
-        return False
-    
-    with open(output,"w",errors='ignore') as f:
-        for j,i in enumerate(content.splitlines()):
-            f.write( i + ',"is_legit"'+"\n") if j == 0 else f.write( i + ',"false"'+"\n")
-
-    print(f" \033[1;90m[\033[1;32m+\033[1;90m]\033[0m Output file\033[1;90m:\033[0m \033[1;93m{output}\033[0m")
-    return os.path.exists(output)
+    with safe_stream(SOURCE_URLS["loldrivers"]) as content:
+        if content is None:
+            print(f" \033[1;90m[\033[1;31mFAILED\033[1;90m]\033[0m Failed to fetch LOLDrivers data")
+            return False
+        return StringifyExistingCsv(content, output, strip=False) and WriteHashIndexes(output)
 
 def GetHijackLibs(output: str) -> bool:
     print(" \033[1;90m[\033[1;96m~\033[1;90m]\033[0m Starting HijackLibs")
-    GetRepository("https://github.com/wietze/HijackLibs")
+    if not GetRepository(SOURCE_URLS["hijacklibs"], ["yml"]): return False
 
     yml_files = FindFiles("HijackLibs/yml/",".yml")
-    keys, values = ReadFiles(yml_files)
-    return WriteExportCsv(output,values,keys)
+    keys, values = ReadRepositoryFiles("hijacklibs", "HijackLibs", yml_files)
+    return WriteExport(output,values,keys)
 
 def GetBootloaders(output: str) -> bool:
     print(" \033[1;90m[\033[1;96m~\033[1;90m]\033[0m Starting Bootloaders")
-    content = safe_request("https://www.bootloaders.io/api/bootloaders.csv")
-    if content is None:
-        print(f" \033[1;90m[\033[1;31mFAILED\033[1;90m]\033[0m Failed to fetch Bootloaders data")
-        return False
-    return StringifyExistingCsv(content,output)
+    with safe_stream(SOURCE_URLS["bootloaders"]) as content:
+        if content is None:
+            print(f" \033[1;90m[\033[1;31mFAILED\033[1;90m]\033[0m Failed to fetch Bootloaders data")
+            return False
+        return StringifyExistingCsv(content,output) and WriteHashIndexes(output)
 
 def GetLOFLCAB(output: str) -> bool:
     print(" \033[1;90m[\033[1;96m~\033[1;90m]\033[0m Starting LOFLCAB")
-    GetRepository("https://github.com/LOFL-Project/LOFLCAB/")
+    if not GetRepository(SOURCE_URLS["loflcab"], ["yml"]): return False
 
     yml_files = FindFiles("LOFLCAB/yml/",".yml")
-    keys, values = ReadFiles(yml_files)
-    return WriteExportCsv(output,values,keys)
+    keys, values = ReadRepositoryFiles("loflcab", "LOFLCAB", yml_files)
+    return WriteExport(output,values,keys)
 
 def GetLOLAD(output: str) -> bool:
     print(" \033[1;90m[\033[1;96m~\033[1;90m]\033[0m Starting LOLAD")
-    content = safe_request("https://lolad-project.github.io/")
+    content = safe_request(SOURCE_URLS["lolad"])
     if content is None:
         print(f" \033[1;90m[\033[1;31mFAILED\033[1;90m]\033[0m Failed to fetch LOLAD data")
         return False
 
-    soup = BeautifulSoup(content,"html.parser")
+    rows = ExtractHtml(content, "tr", within="table")
+    if not rows:
+        print(f" \033[1;90m[\033[1;31mFAILED\033[1;90m]\033[0m No table found in LOLAD data")
+        return False
     keys = []
-    for tag in soup.tr:
-        if len(tag.string.strip()) > 0: keys.append(tag.string.strip().replace(" ","_"))
-    rows = soup.find_all("tr")
+    for tag in rows[0].find_all("th") or rows[0].find_all("td"):
+        if len(tag.text.strip()) > 0: keys.append(tag.text.strip().replace(" ","_"))
     values = []
     for row in rows[1:]:
         cols = row.find_all("td")
         if len(cols) == 4:
+            link = cols[3].find("a")
             command_data = {
                 keys[0]: cols[0].text.strip(),
                 keys[1]: cols[1].text.strip(),
                 keys[2]: cols[2].text.strip(),
-                keys[3]: cols[3].find("a")["href"] if cols[3].find("a") else ""
+                keys[3]: link.attrs["href"] if link else ""
             }
             values.append(command_data)
-    return WriteExportCsv(output, values, keys)
+    return WriteExport(output, values, keys)
 
 def GetLOLRMM(output: str) -> bool:
     print(" \033[1;90m[\033[1;96m~\033[1;90m]\033[0m Starting LOLRMM")
-    content = safe_request("https://lolrmm.io/api/rmm_tools.csv")
-    if content is None:
-        print(f" \033[1;90m[\033[1;31mFAILED\033[1;90m]\033[0m Failed to fetch LOLRMM data")
-        return False
-    return StringifyExistingCsv(content,output)
+    with safe_stream(SOURCE_URLS["lolrmm"]) as content:
+        if content is None:
+            print(f" \033[1;90m[\033[1;31mFAILED\033[1;90m]\033[0m Failed to fetch LOLRMM data")
+            return False
+        return StringifyExistingCsv(content,output)
 
 def GetLOTTunnels(output:str) -> bool:
-    def WriteExportMdCsv(output: str, values: list[dict], keys: list[str], md_files: list[str]) -> bool:
-        def sanitize(val: list | tuple):
-            if isinstance(val, (list, tuple)):
-                val = "[" + "-|-".join(f"''{str(item)}''" for item in val) + "]"
-            else:
-                val = str(val)
-            val = val.replace('"', '""')                        # Escape double quotes
-            val = val.replace('\n', ' ').replace('\r', ' ')     # Remove newlines
-            return val.strip()
-        with open(output, "w", encoding="utf-8", errors="ignore") as f:
-            head = '"' + '","'.join([k.strip() for k in keys]) + '","is_legit"' + '\n'
-            f.write(head)
-            for i,value in enumerate(values):
-                line_items = []
-                for key in keys:
-                    val = value.get(key, "")
-                    sanitized = sanitize(val)
-                    line_items.append(sanitized)
-                line = f'"' + '","'.join(line_items) + '","false"' + '\n'
-                f.write(line)
-        print(f"\n \033[1;90m[\033[1;32m+\033[1;90m]\033[0m Output file\033[1;90m:\033[0m \033[1;93m{output}\033[0m")
-        extracted = []
+    def ExtractDomains(values: list[dict]):
         for i in values:
             if "Detection_Domain" not in i:
                 continue  # skip records that lack the key
-
             domains = i["Detection_Domain"]
-            name = i.get("Name", "")
-
-            if isinstance(domains, list):
-                for k in domains:
-                    extracted.append({"Name": name, "Domain": k})
-        else:
-            extracted.append({"Name": name, "Domain": domains})
-            with open(output.split(".csv")[0]+"_domain.csv", "w", encoding="utf-8", errors="ignore") as f:
-                f.write('"Name","Domain","is_legit"\n')
-                for i,value in enumerate(extracted):
-                    line_items = []
-                    for key in ["Name","Domain"]:
-                        val = value.get(key, "")
-                        sanitized = sanitize(val)
-                        line_items.append(sanitized)
-                    line = f'"' + '","'.join(line_items) + '","false"' + '\n'
-                    f.write(line)
-            print(f"\n \033[1;90m[\033[1;32m+\033[1;90m]\033[0m Output file\033[1;90m:\033[0m \033[1;93m{output.split('.csv')[0]}_domain.csv\033[0m")
-            return os.path.exists(output) and os.path.exists(output.split(".csv")[0]+"_domain.csv")
-
+            for k in (domains if isinstance(domains, (list, tuple)) else [domains]):
+                yield {"Name": i.get("Name", ""), "Domain": k}
 
     print(" \033[1;90m[\033[1;96m~\033[1;90m]\033[0m Starting LOTTunels")
-    GetRepository("https://github.com/LOTTunnels/LOTTunnels.github.io")
+    if not GetRepository(SOURCE_URLS["lottunnels"], ["_lottunnels/Binaries"]): return False
 
     md_files = FindFiles("LOTTunnels.github.io/_lottunnels/Binaries/",".md")
-    keys, values = ReadMDFiles(md_files)
-    return WriteExportMdCsv(output,values,keys,md_files)
+    keys, values = ReadRepositoryFiles("lottunnels", "LOTTunnels.github.io", md_files, True)
+    domain_output = output.split(".csv")[0]+"_domain.csv"
+    return WriteExport(output,values,keys,last_column=MarkdownBodyColumn()) and WriteExport(domain_output,ExtractDomains(values),["Name","Domain"])
 
 def GetLOLESXi(output: str) -> bool:
-    def WriteExportMdCsv(output: str, values: list[dict], keys: list[str], md_files: list[str]) -> bool:
-        def sanitize(val: list | tuple):
-            if isinstance(val, (list, tuple)):
-                val = "[" + "-|-".join(f"''{str(item)}''" for item in val) + "]"
-            else:
-                val = str(val)
-            val = val.replace('"', '""')                        # Escape double quotes
-            val = val.replace('\n', ' ').replace('\r', ' ')     # Remove newlines
-            return val.strip()
-        with open(output, "w", encoding="utf-8", errors="ignore") as f:
-            head = '"Name"' + '","'.join([k.strip() for k in keys]) + '","is_legit"' + '\n'
-            f.write(head)
-            for i,value in enumerate(values):
-                line_items = []
-                for key in keys:
-                    val = value.get(key, "")
-                    sanitized = sanitize(val)
-                    line_items.append(sanitized)
-                line = f'"' + '","'.join(line_items) + '","false"' + '\n'
-                f.write(line)
-        print(f"\n \033[1;90m[\033[1;32m+\033[1;90m]\033[0m Output file\033[1;90m:\033[0m \033[1;93m{output}\033[0m")
-        return os.path.exists(output)
     print(" \033[1;90m[\033[1;96m~\033[1;90m]\033[0m Starting LOLESXi")
-    GetRepository("https://github.com/LOLESXi-Project/LOLESXi/")
+    if not GetRepository(SOURCE_URLS["lolesxi"], ["_lolesxi/Binaries"]): return False
 
     md_files = FindFiles("LOLESXi/_lolesxi/Binaries/",".md")
-    keys, values = ReadMDFiles(md_files)
-    return WriteExportMdCsv(output,values,keys,md_files)
+    keys, values = ReadRepositoryFiles("lolesxi", "LOLESXi", md_files, True)
+    return WriteExport(output,values,keys,("Name", FileStem),last_column=MarkdownBodyColumn())
 
 def GetLOLCerts(output: list[str]) -> bool:
     print(" \033[1;90m[\033[1;96m~\033[1;90m]\033[0m Starting LOLCerts")
-    GetRepository("https://github.com/ReversecLabs/lolcerts/")
+    if not GetRepository(SOURCE_URLS["lolcerts"], ["malicious", "leaked"]): return False
 
     all_results = []
 
     for i in output:
-        yml_files = FindFiles(f"lolcerts/{i.split('/')[1].split('_')[1][:-4]}/", ".yml")
-        keys, values = ReadFiles(yml_files)
-        all_results.append(WriteExportCsv(i,values,keys))
+        subset = i.split('/')[1].split('_')[1][:-4]
+        yml_files = FindFiles(f"lolcerts/{subset}/", ".yml")
+        keys, values = ReadRepositoryFiles(f"lolcerts_{subset}", "lolcerts", yml_files)
+        all_results.append(WriteExport(i,values,keys))
 
     return True if not False in all_results else False
 
-def GetLotsProject(output: str, additional_info: bool = False) -> bool:
+def GetLotsProject(output: str, additional_info: bool = False, url: str | None = None) -> bool:
+    def ParseDetail(content: str) -> dict:
+        additonal = {}
+        for i in ExtractHtml(content, "div", "detail-container"):
+            text = i.text
+            if "Tags" in text: pass
+            elif "Phishing" in text:
+                div2 = i.find("div", "content")
+                if div2: additonal["phishing"] = div2.text.strip()
+            elif "Command and Control" in text:
+                div2 = i.find("div", "content")
+                if div2: additonal["c2"] = div2.text.strip()
+            elif "Exfiltration" in text:
+                div2 = i.find("div", "content")
+                if div2: additonal["exfil"] = div2.text.strip()
+            elif "Download" in text:
+                div2 = i.find("div", "content")
+                if div2: additonal["download"] = div2.text.strip()
+            elif "Sample" in text:
+                div2 = i.find("div", "content")
+                if div2:
+                    link = div2.find("a", "link")
+                    additonal["sample"] = link.text.strip() if link else "None"
+        return additonal
+
     print(" \033[1;90m[\033[1;96m~\033[1;90m]\033[0m Starting Lots-Project") if not additional_info else print(" \033[1;90m[\033[1;96m~\033[1;90m]\033[0m Starting Lots-Project (Additional)")
-    content = safe_request("https://lots-project.com/")
+    url = (url or SOURCE_URLS["lots_project"]).rstrip("/")
+    content = safe_request(url+"/")
     if content is None:
         print(f" \033[1;90m[\033[1;31mFAILED\033[1;90m]\033[0m Failed to fetch Lots-Project data")
         return False
     
-    soup = BeautifulSoup(content,"html.parser")
     values = []
-
-    for row in soup.find_all("tr")[1:]:
+    rows = []
+    for row in ExtractHtml(content, "tr", within="table")[1:]:
         cols = row.find_all("td")
         tags = [span.text.strip() for span in cols[1].find_all("div")]
-        link = "https://lots-project.com"+row.find_all("a")[0]["href"]
-        if additional_info:
-            keys = ["Website","Tags","Service Provider","Info_Phishing","Info_C&C","Info_Exfiltration","Info_Download","Info_Sample"]
-            link_content = safe_request(link)
-            if link_content is None:
+        link = url+row.find_all("a")[0].attrs["href"]
+        rows.append((cols, tags, link))
+
+    if additional_info:
+        keys = ["Website","Tags","Service Provider","Info_Phishing","Info_C&C","Info_Exfiltration","Info_Download","Info_Sample"]
+        links = [link for _, _, link in rows]
+        with CrawlJournal("lots_project_additional", url) as journal:
+            # Pages are parsed and journaled as they arrive, CSV is assembled from the journal
+            CrawlPages(journal.pending(links), settings["crawl_per_host"], settings["crawl_rate"], settings["crawl_retries"],
+                       lambda link, page: journal.fail(link) if page is None else journal.record(link, ParseDetail(page)))
+            journal.finish(links)
+        print()
+        for cols, tags, link in rows:
+            additonal = journal.done.get(link)
+            if additonal is None:
                 print(f" \033[1;90m[\033[1;31mWARNING\033[1;90m]\033[0m Failed to fetch additional info for {cols[0].text.strip()}")
                 continue
-            soup1 = BeautifulSoup(link_content,"html.parser")
-            divs = soup1.find_all("div", class_="detail-container")
-            additonal = {}
-            for i in divs:
-                print(f" \033[1;90m[\033[1;36m~\033[1;90m] \033[0mGetting ({cols[0].text.strip()}): {link}                                              ", end="\r")
-                if "Tags" in i.get_text(): pass
-                elif "Phishing" in i.get_text():
-                    div2 = i.find("div", class_="content")
-                    if div2: additonal["phishing"] = div2.string.strip()
-                elif "Command and Control" in i.get_text():
-                    div2 = i.find("div", class_="content")
-                    if div2: additonal["c2"] = div2.string.strip()
-                elif "Exfiltration" in i.get_text():
-                    div2 = i.find("div", class_="content")
-                    if div2: additonal["exfil"] = div2.string.strip()
-                elif "Download" in i.get_text():
-                    div2 = i.find("div", class_="content")
-                    if div2: additonal["download"] = div2.string.strip()
-                elif "Sample" in i.get_text():
-                    div2 = i.find("div", class_="content")
-                    if div2:
-                        try: additonal["sample"] = div2.find("a", class_="link").string.strip()
-                        except: additonal["sample"] = "None"
             if len(cols) == 3:
                 command_data = {
                     keys[0]: cols[0].text.strip(),
@@ -513,8 +2095,9 @@ def GetLotsProject(output: str, additional_info: bool = False) -> bool:
                     keys[7]: additonal.get("sample", "")
                 }
                 values.append(command_data)
-        else:
-            keys = ["Website","Tags","Service Provider","Info"]
+    else:
+        keys = ["Website","Tags","Service Provider","Info"]
+        for cols, tags, link in rows:
             if len(cols) == 3:
                 command_data = {
                     keys[0]: cols[0].text.strip(),
@@ -523,19 +2106,18 @@ def GetLotsProject(output: str, additional_info: bool = False) -> bool:
                     keys[3]: link.strip()
                 }
                 values.append(command_data)
-    return WriteExportCsv(output, values, keys)
+    return WriteExport(output, values, keys)
 
 def GetLotWebhooks(output: str) -> bool:
     print(" \033[1;90m[\033[1;96m~\033[1;90m]\033[0m Starting LOTWebhooks")
-    content = safe_request("https://lotwebhooks.github.io")
+    content = safe_request(SOURCE_URLS["lotwebhooks"])
     if content is None:
         print(f" \033[1;90m[\033[1;31mFAILED\033[1;90m]\033[0m Failed to fetch LOTWebhooks data")
         return False
     
-    soup = BeautifulSoup(content,"html.parser")
     values = []
     keys = ["Webhook Name", "URL", "Type", "Reference"]
-    rows = soup.find_all("tr")
+    rows = ExtractHtml(content, "tr", within="table")
     values = []
     for row in rows[1:]:
         cols = row.find_all("td")
@@ -547,53 +2129,1274 @@ def GetLotWebhooks(output: str) -> bool:
                 keys[3]: cols[3].text.strip()
             }
             values.append(command_data)
-    return WriteExportCsv(output, values, keys)
+    return WriteExport(output, values, keys)
 
 def GetLooBins(output: str) -> bool:
     print(" \033[1;90m[\033[1;96m~\033[1;90m]\033[0m Starting LOOBins")
-    GetRepository("https://github.com/infosecB/LOOBins")
+    if not GetRepository(SOURCE_URLS["loobins"], ["LOOBins"]): return False
 
     yml_files = FindFiles("LOOBins/LOOBins/",".yml")
-    keys, values = ReadFiles(yml_files)
-    return WriteExportCsv(output,values,keys)
+    keys, values = ReadRepositoryFiles("loobins", "LOOBins", yml_files)
+    return WriteExport(output,values,keys)
 
 def GetLOLApps(output: str) -> bool:
     print(" \033[1;90m[\033[1;96m~\033[1;90m]\033[0m Starting LOLAPPS")
-    GetRepository("https://github.com/LOLAPPS-Project/LOLAPPS/")
+    if not GetRepository(SOURCE_URLS["lolapps"], ["yml"]): return False
 
     yml_files = FindFiles("LOLAPPS/yml/",".yml")
-    keys, values = ReadFiles(yml_files)
-    return WriteExportCsv(output,values,keys)
+    keys, values = ReadRepositoryFiles("lolapps", "LOLAPPS", yml_files)
+    return WriteExport(output,values,keys)
 
 def GetWADComs(output: str) -> bool:
-    def WriteExportMdCsv(output: str, values: list[dict], keys: list[str], md_files: list[str]) -> bool:
-        def sanitize(val: list | tuple):
-            if isinstance(val, (list, tuple)):
-                val = "[" + "-|-".join(f"''{str(item)}''" for item in val) + "]"
-            else:
-                val = str(val)
-            val = val.replace('"', '""')                        # Escape double quotes
-            val = val.replace('\n', ' ').replace('\r', ' ')     # Remove newlines
-            return val.strip()
-        with open(output, "w", encoding="utf-8", errors="ignore") as f:
-            head = '"Name","' + '","'.join([k.strip() for k in keys]) + '","is_legit"' + '\n'
-            f.write(head)
-            for i,value in enumerate(values):
-                line_items = []
-                for key in keys:
-                    val = value.get(key, "")
-                    sanitized = sanitize(val)
-                    line_items.append(sanitized)
-                line = f'"{md_files[i].split("/")[2].split(".md")[0]}","' + '","'.join(line_items) + '","false"' + '\n'
-                f.write(line)
-        print(f"\n \033[1;90m[\033[1;32m+\033[1;90m]\033[0m Output file\033[1;90m:\033[0m \033[1;93m{output}\033[0m")
-        return os.path.exists(output)
     print(" \033[1;90m[\033[1;96m~\033[1;90m]\033[0m Starting WADComs")
-    GetRepository("https://github.com/WADComs/WADComs.github.io")
+    if not GetRepository(SOURCE_URLS["wadcoms"], ["_wadcoms"]): return False
 
     md_files = FindFiles("WADComs.github.io/_wadcoms/",".md")
-    keys, values = ReadMDFiles(md_files)
-    return WriteExportMdCsv(output,values,keys,md_files)
+    keys, values = ReadRepositoryFiles("wadcoms", "WADComs.github.io", md_files, True)
+    return WriteExport(output,values,keys,("Name", FileStem),last_column=MarkdownBodyColumn())
+
+# Every source with its export file(s), as (function, args) so it can be sent to process pool
+SOURCES = {
+    "bootloaders": (GetBootloaders, ("export/bootloaders.csv",)),
+    "gtfobins": (GetGTFOBins, ("export/gtfobins.csv",)),
+    "hijacklibs": (GetHijackLibs, ("export/hijacklibs.csv",)),
+    "lolapps": (GetLOLApps, ("export/lolapps.csv",)),
+    "lolc2": (GetLOLC2, ("export/lolc2.csv",)),
+    "loflcab": (GetLOFLCAB, ("export/loflcab.csv",)),
+    "lolad": (GetLOLAD, ("export/lolad.csv",)),
+    "lolbas": (GetLOLBAS, ("export/lolbas.csv",)),
+    "loldrivers": (GetLOLDrivers, ("export/loldrivers.csv",)),
+    "lolrmm": (GetLOLRMM, ("export/lolrmm.csv",)),
+    "lottunnels": (GetLOTTunnels, ("export/lottunnels.csv",)),
+    "lolcerts": (GetLOLCerts, (["export/lolcerts_malicious.csv", "export/lolcerts_leaked.csv"],)),
+    "lolesxi": (GetLOLESXi, ("export/lolesxi.csv",)),
+    "lots_project": (GetLotsProject, ("export/lots_project.csv",)),
+    "lots_project_additional": (GetLotsProject, ("export/lots_project_additional.csv", True)),
+    "loobins": (GetLooBins, ("export/loobins.csv",)),
+    "lotwebhooks": (GetLotWebhooks, ("export/lotwebhooks.csv",)),
+    "wadcoms": (GetWADComs, ("export/wadcoms.csv",)),
+}
+
+class SourceCancelled(Exception):
+    """
+    Raised in source that ran over its timeout when it is about to publish export, so it does not replace exports after being reported failed.
+    """
+
+def CheckCancelled() -> None:
+    cancel = getattr(_metrics_local, "cancel", None)
+    if cancel is not None and cancel.is_set(): raise SourceCancelled("timed out, export not published")
+
+# Thread sources that timed out but are still running, they cannot be stopped and are not started again until they return
+stuck_sources = set()
+
+def _RunSource(name: str, func, args: tuple, options: tuple[dict, dict] | None = None, cancel: threading.Event | None = None) -> dict:
+    """
+    Runs single source inside worker thread/process. Exceptions are reported and counted as failure.
+    Process workers get settings and SOURCE_URLS of the parent passed in options. Thread workers get cancel event, set when
+    source timed out (CheckCancelled). Returns metrics record of the run, "ok" holds the result.
+    """
+    if options:
+        settings.update(options[0])
+        SOURCE_URLS.update(options[1])
+    record = {"ok": False, "seconds": 0.0, "stages": {}, "bytes_in": 0, "bytes_out": 0, "outputs": {}, "cache_hits": 0, "cache_misses": 0, "peak_rss_kb": None}
+    _metrics_local.record = record
+    _metrics_local.cancel = cancel
+    _metrics_local.source = name
+    profiler = None
+    if settings["profile"]:
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # another profiler is already active in this process
+            profiler = None
+    start = time.perf_counter()
+    try:
+        if settings["delta"]: ClearDeltas(name)
+        record["ok"] = bool(func(*args))
+    except SourceCancelled:
+        pass
+    except Exception as e:
+        print(f" \033[1;90m[\033[1;31mERROR\033[1;90m]\033[0m {name}: {e}")
+    finally:
+        record["seconds"] = time.perf_counter() - start
+        # Only process of its own gives source's peak, thread sources share process wide peak_rss_kb of report
+        if options: record["peak_rss_kb"] = PeakRss()
+        _metrics_local.record = None
+        _metrics_local.cancel = None
+        _metrics_local.source = None
+        if profiler:
+            profiler.disable()
+            os.makedirs(settings["profile"], exist_ok=True)
+            profiler.dump_stats(os.path.join(settings["profile"], f"{name}.prof"))
+    return record
+
+def _SourceProcess(conn, name: str, func, args: tuple, options: tuple[dict, dict]) -> None:
+    """
+    Entry point of process running CPU bound source, metrics record is sent back through conn.
+    Process is not daemonic so parse pool of -pe parallel can run in it, its workers are killed with it when source is stopped.
+    """
+    import signal
+    signal.signal(signal.SIGTERM, _StopSourceProcess)
+    try:
+        conn.send(_RunSource(name, func, args, options))
+    finally:
+        conn.close()
+
+def _StopSourceProcess(signum, frame) -> None:
+    import multiprocessing
+    for child in multiprocessing.active_children(): child.kill()
+    os._exit(1)
+
+def SourceOutputs(args: tuple) -> list[str]:
+    """
+    Export paths in arguments of source function (str or list of them).
+    """
+    outputs = []
+    for arg in args:
+        if isinstance(arg, str) and arg.endswith(".csv"): outputs.append(arg)
+        elif isinstance(arg, list): outputs.extend(i for i in arg if isinstance(i, str) and i.endswith(".csv"))
+    return outputs
+
+def RemoveTemps(args: tuple, pid: int) -> None:
+    """
+    Removes temp files (PublishTemp) left next to exports of source and delta manifests by killed process pid.
+    """
+    directories = {os.path.dirname(i) or "." for i in SourceOutputs(args)}
+    if settings["delta"]: directories.add(settings["delta"])
+    for directory in directories:
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            continue
+        for name in names:
+            if name.endswith(".tmp") and f".{pid}." in name: Unpublish(os.path.join(directory, name))
+
+def RunSources(sources: dict[str, tuple], workers: int = 8, timeout: float | None = None) -> dict[str, bool]:
+    """
+    Runs independent sources concurrently. Network and git bound sources go to a thread pool, CPU heavy parsers (CPU_BOUND_SOURCES)
+    each to its own process (ProcessContext), at most min(workers, cores) at a time.
+    Sources are given as {name: (function, args)}. Timeout is counted per source from the moment it starts running. Processes
+    over timeout are terminated and joined, threads cannot be stopped, they are kept from publishing exports (CheckCancelled)
+    and listed in stuck_sources until they return.
+    Returns {name: success}, DONE/FAILED is printed as soon as each source finishes. Metrics of each run are kept in source_metrics.
+    """
+    threads = ThreadPoolExecutor(max_workers=max(1, workers))
+    queued = [i for i in sources if i in CPU_BOUND_SOURCES]
+    limit = max(1, min(workers, len(queued), os.cpu_count() or 1))
+
+    results = {}
+
+    def finished(name: str, record: dict) -> None:
+        source_metrics[name] = record
+        results[name] = record["ok"]
+        print(f" \033[1;90m[\033[1;32mDONE\033[1;90m]\033[0m {name}") if results[name] else print(f" \033[1;90m[\033[1;31mFAILED\033[1;90m]\033[0m {name}")
+
+    def timed_out(name: str) -> None:
+        results[name] = False
+        source_metrics[name] = {"ok": False, "error": f"timed out after {timeout}s"}
+        print(f" \033[1;90m[\033[1;31mFAILED\033[1;90m]\033[0m {name} (timed out after {timeout}s)")
+
+    pending = {}
+    cancels = {}
+    for name, (func, args) in sources.items():
+        if name in queued: continue
+        cancels[name] = threading.Event()
+        pending[threads.submit(_RunSource, name, func, args, None, cancels[name])] = name
+
+    processes = {}  # name: (process, connection, started)
+    started = {}
+    try:
+        while pending or processes or queued:
+            while queued and len(processes) < limit:
+                name = queued.pop(0)
+                func, args = sources[name]
+                receiver, sender = ProcessContext().Pipe(duplex=False)
+                process = ProcessContext().Process(target=_SourceProcess, args=(sender, name, func, args, (dict(settings), dict(SOURCE_URLS))), name=f"source-{name}")
+                process.start()
+                sender.close()
+                processes[name] = (process, receiver, time.monotonic())
+
+            if pending:
+                done, _ = wait(pending, timeout=0.1 if processes else 0.5, return_when=FIRST_COMPLETED)
+            else:
+                done = ()
+                time.sleep(0.1)
+            for future in done:
+                name = pending.pop(future)
+                finished(name, future.result() if future.exception() is None else {"ok": False, "error": str(future.exception())})
+
+            now = time.monotonic()
+            for name, (process, receiver, begun) in list(processes.items()):
+                record = None
+                if receiver.poll():
+                    try:
+                        record = receiver.recv()
+                    except (EOFError, OSError):
+                        pass
+                if record is not None or not process.is_alive():
+                    process.join()
+                    receiver.close()
+                    del processes[name]
+                    finished(name, record or {"ok": False, "error": f"worker exited with code {process.exitcode}"})
+                elif timeout is not None and now - begun > timeout:
+                    StopProcess(process)
+                    receiver.close()
+                    del processes[name]
+                    RemoveTemps(sources[name][1], process.pid)
+                    timed_out(name)
+
+            for future, name in list(pending.items()):
+                if future.running(): started.setdefault(future, now)
+                if timeout is not None and future in started and now - started[future] > timeout:
+                    pending.pop(future)
+                    cancels[name].set()
+                    stuck_sources.add(name)
+                    future.add_done_callback(lambda _, name=name: stuck_sources.discard(name))
+                    timed_out(name)
+    finally:
+        # Interrupted runs do not leave source processes behind
+        for process, receiver, _ in processes.values():
+            StopProcess(process)
+            receiver.close()
+        threads.shutdown(wait=False, cancel_futures=True)
+    return results
+
+def StopProcess(process, grace: float = 5.0) -> None:
+    """
+    Terminates worker process and waits for it, killed when it does not exit within grace seconds.
+    """
+    process.terminate()
+    process.join(grace)
+    if process.is_alive():
+        process.kill()
+        process.join()
+
+# Consolidated index: export columns are assigned to searchable fields by name
+INDEX_NAME_COLUMNS = ["name", "website", "webhook name", "webhook_name", "attack_name", "filename", "tool"]
+INDEX_FIELDS = {
+    "commands": ["command", "code"],
+    "descriptions": ["description"],
+    "domains": ["domain", "url", "website"],
+    "paths": ["path"],
+}
+# Seconds index update waits for readers (export server download of index) before committing
+INDEX_BUSY_TIMEOUT = 300
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS exports (export TEXT PRIMARY KEY, source TEXT, file TEXT, digest TEXT, rows INTEGER, updated TEXT);
+CREATE TABLE IF NOT EXISTS entities (id INTEGER PRIMARY KEY, source TEXT, export TEXT, digest TEXT, name TEXT, commands TEXT, descriptions TEXT, domains TEXT, paths TEXT, record TEXT, UNIQUE(export, digest));
+CREATE INDEX IF NOT EXISTS entities_name ON entities(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS entities_source ON entities(source);
+CREATE VIRTUAL TABLE IF NOT EXISTS entities_fts USING fts5(name, commands, descriptions, domains, paths, content='entities', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS entities_insert AFTER INSERT ON entities BEGIN
+    INSERT INTO entities_fts(rowid, name, commands, descriptions, domains, paths) VALUES (new.id, new.name, new.commands, new.descriptions, new.domains, new.paths);
+END;
+CREATE TRIGGER IF NOT EXISTS entities_delete AFTER DELETE ON entities BEGIN
+    INSERT INTO entities_fts(entities_fts, rowid, name, commands, descriptions, domains, paths) VALUES ('delete', old.id, old.name, old.commands, old.descriptions, old.domains, old.paths);
+END;
+"""
+
+def ReadExportRecords(path: str):
+    """
+    Yields records of written export as dicts without is_legit. Ndjson keeps arrays, csv cells encoded by sanitize ([''a''-|-''b'']) are split back into lists.
+    """
+    if path.endswith(".ndjson"):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                record.pop("is_legit", None)
+                yield record
+        return
+    csv.field_size_limit(2**31 - 1)
+    with open(path, "r", encoding="utf-8", errors="ignore", newline="") as f:
+        rows = csv.reader(f)
+        header = next(rows, [])[:-1]
+        for row in rows:
+            yield {key: cell[3:-3].split("''-|-''") if cell.startswith("[''") and cell.endswith("'']") else cell
+                   for key, cell in zip(header, row) if cell != ""}
+
+def IndexFields(record: dict) -> dict[str, str]:
+    """
+    Normalised entity of export record: name and newline joined commands, descriptions, domains and paths.
+    """
+    name = None
+    fields = {i: [] for i in INDEX_FIELDS}
+    for key, val in record.items():
+        values = [str(i) for i in val] if isinstance(val, list) else [str(val)]
+        lower = key.lower()
+        if name is None and lower in INDEX_NAME_COLUMNS: name = values[0] if values else None
+        for field, patterns in INDEX_FIELDS.items():
+            if any(i in lower for i in patterns): fields[field].extend(i for i in values if i)
+    if name is None:
+        name = next((str(i[0] if isinstance(i, list) else i) for i in record.values() if i), "")
+    return {"name": name, **{field: "\n".join(values) for field, values in fields.items()}}
+
+def IndexExport(db, source: str, export: str, path: str) -> tuple[int, int, int]:
+    """
+    Brings entities and per-source table (src_<export>) of one export in line with its file. Only added and removed
+    records are touched, records are matched by digest of their content. Returns (rows, added, removed).
+    """
+    table = SqliteQuote("src_" + export)
+    db.execute(f"CREATE TABLE IF NOT EXISTS {table} (entity_id INTEGER PRIMARY KEY)")
+    existing = [row[1] for row in db.execute(f"PRAGMA table_info({table})")]
+    taken = {i.lower() for i in existing}
+    columns = {}
+    known = dict(db.execute("SELECT digest, id FROM entities WHERE export = ?", (export,)))
+    seen = set()
+    rows = added = 0
+    for record in ReadExportRecords(path):
+        rows += 1
+        content = json.dumps(record, ensure_ascii=False, sort_keys=True, default=str)
+        digest = hashlib.sha1(content.encode()).hexdigest()
+        if digest in seen or digest in known:
+            seen.add(digest)
+            continue
+        seen.add(digest)
+        fields = IndexFields(record)
+        entity = db.execute("INSERT INTO entities (source, export, digest, name, commands, descriptions, domains, paths, record) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            (source, export, digest, fields["name"], fields["commands"], fields["descriptions"], fields["domains"], fields["paths"], content)).lastrowid
+        for key in record:
+            if key not in columns:
+                column = key if key in existing else None
+                if column is None:
+                    column = key
+                    while column.lower() in taken: column += "_"
+                    taken.add(column.lower())
+                    existing.append(column)
+                    db.execute(f"ALTER TABLE {table} ADD COLUMN {SqliteQuote(column)}")
+                columns[key] = column
+        db.execute(f"INSERT INTO {table} (entity_id, {', '.join(SqliteQuote(columns[i]) for i in record)}) VALUES (?{', ?' * len(record)})",
+                   [entity] + [SqliteSink.cell(i) for i in record.values()])
+        added += 1
+    removed = [(known[i],) for i in known.keys() - seen]
+    db.executemany("DELETE FROM entities WHERE id = ?", removed)
+    db.executemany(f"DELETE FROM {table} WHERE entity_id = ?", removed)
+    return rows, added, len(removed)
+
+def UpdateIndex(path: str, exports: dict[str, list[str]]) -> bool:
+    """
+    Updates consolidated SQLite index from written exports, given as {source: [output files]}. Each export is read from its ndjson
+    (exact arrays) or csv file, exports whose file did not change since last update are skipped. Existing index is updated in
+    place in single transaction, readers (query, export server serving it under read transaction) see it before or after the
+    update. New index is built in temp file and published by os.replace like exports.
+    """
+    import sqlite3
+    fresh = not os.path.exists(path)
+    target = PublishTemp(path) if fresh else path
+    db = None
+    try:
+        db = sqlite3.connect(target, timeout=INDEX_BUSY_TIMEOUT)
+        db.executescript(INDEX_SCHEMA)
+        db.execute("BEGIN")
+        for source, outputs in exports.items():
+            files = {}
+            for output in outputs:
+                stem, extension = os.path.splitext(output)
+                if stem.endswith(DELTA_SUFFIXES): continue
+                if extension in (".ndjson", ".csv") and (extension == ".ndjson" or stem not in files): files[stem] = output
+            for stem, file in files.items():
+                export = os.path.basename(stem)
+                with open(file, "rb") as f:
+                    digest = hashlib.file_digest(f, "sha256").hexdigest() if hasattr(hashlib, "file_digest") else hashlib.sha256(f.read()).hexdigest()
+                if db.execute("SELECT digest FROM exports WHERE export = ?", (export,)).fetchone() == (digest,):
+                    continue
+                rows, added, removed = IndexExport(db, source, export, file)
+                db.execute("INSERT OR REPLACE INTO exports VALUES (?, ?, ?, ?, ?, ?)", (export, source, file, digest, rows, datetime.datetime.now().isoformat()))
+                Progress(f"Index: {export} +{added} -{removed}")
+        db.commit()
+    except BaseException as e:
+        if db is not None:
+            db.rollback()
+            db.close()
+        if fresh: Unpublish(target)
+        if not isinstance(e, (sqlite3.Error, OSError, ValueError)): raise
+        print(f" \033[1;90m[\033[1;31mERROR\033[1;90m]\033[0m Failed to update index {path}: {e}")
+        return False
+    db.close()
+    if fresh: os.replace(target, path)
+    print(f" \033[1;90m[\033[1;32m+\033[1;90m]\033[0m Index\033[1;90m:\033[0m \033[1;93m{path}\033[0m                                  ")
+    return True
+
+def QueryIndex(path: str, query: str, sources: list[str] | None = None, limit: int = 20, raw: bool = False) -> list[dict]:
+    """
+    Full text search of consolidated index, best matches first (name matches weigh most). Query is searched as phrase,
+    raw=True passes it to FTS5 as is (AND/OR/NEAR, prefix*, column:term).
+    """
+    import sqlite3
+    db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        match = query if raw else '"' + query.replace('"', '""') + '"'
+        where = f"AND e.source IN ({', '.join('?' * len(sources))})" if sources else ""
+        rows = db.execute(
+            "SELECT e.source, e.export, e.name, snippet(entities_fts, -1, '\033[1;93m', '\033[0m', '...', 12), e.record FROM entities_fts "
+            f"JOIN entities e ON e.id = entities_fts.rowid WHERE entities_fts MATCH ? {where} "
+            "ORDER BY bm25(entities_fts, 10.0, 2.0, 1.0, 2.0, 2.0) LIMIT ?", [match] + (sources or []) + [limit]).fetchall()
+    finally:
+        db.close()
+    return [{"source": i[0], "export": i[1], "name": i[2], "snippet": i[3], "record": json.loads(i[4])} for i in rows]
+
+def HandleQueryArgs() -> None:
+    """
+    `LotCSV.py query <terms> [-g sources] [-n limit] [-r] [-j] [-i index]`, searches index built by previous runs.
+    """
+    usage = "Usage: LotCSV.py query <terms> [-g source,source] [-n limit] [-r raw FTS5 syntax] [-j json output] [-i index file]"
+    terms = []
+    sources = None
+    limit = 20
+    raw = as_json = False
+    path = settings["index"] or "export/lotcsv.sqlite"
+    args = iter(sys.argv[2:])
+    try:
+        for arg in args:
+            if arg in ["-g", "--get_specific"]: sources = next(args).split(",")
+            elif arg in ["-n", "--limit"]: limit = int(next(args))
+            elif arg in ["-i", "--index"]: path = next(args)
+            elif arg in ["-r", "--raw"]: raw = True
+            elif arg in ["-j", "--json"]: as_json = True
+            elif arg in ["-h", "--help"]: print(usage); exit(0)
+            else: terms.append(arg)
+    except (StopIteration, ValueError):
+        print(f"{usage}\n\n \033[0;31mERROR | Invalid argument \033[0m"); exit(1)
+    if not terms:
+        print(usage); exit(1)
+    if not os.path.exists(path):
+        print(f" \033[0;31mERROR | Index {path} does not exist, run LotCSV first \033[0m"); exit(1)
+
+    import sqlite3
+    start = time.perf_counter()
+    try:
+        hits = QueryIndex(path, " ".join(terms), sources, limit, raw)
+    except sqlite3.Error as e:
+        print(f" \033[0;31mERROR | Invalid query: {e} \033[0m"); exit(1)
+    elapsed = (time.perf_counter() - start) * 1000
+    if as_json:
+        for hit in hits:
+            hit.pop("snippet")
+            print(json.dumps(hit, ensure_ascii=False))
+        return
+    for hit in hits:
+        print(f" \033[1;90m[\033[1;96m{hit['export']}\033[1;90m]\033[0m {hit['name']}\n     {hit['snippet'].replace(chr(10), ' | ')}")
+    print(f"\n \033[1;90m[\033[1;33mINFO\033[1;90m]\033[0m {len(hits)} results in {elapsed:.1f} ms")
+
+# Indicators compiled by match mode: {kind: {export: [column name parts]}}, columns are matched case-insensitively
+MATCH_SOURCES = {
+    "binaries": {"lolbas": ["name"], "gtfobins": ["name"], "loobins": ["name"]},
+    "domains": {"lottunnels": ["detection_domain"], "lolrmm": ["domain", "website"], "lotwebhooks": ["url"]},
+    "hashes": {"loldrivers": ["md5", "sha1", "sha256"]},
+}
+MATCH_TOKEN = re.compile(r"[\w.$-]+")
+MATCH_HOST = re.compile(r"(?:[a-z0-9_-]+\.)+[a-z][a-z0-9-]+")
+MATCH_HASH = re.compile(r"(?<![0-9a-f])(?:[0-9a-f]{64}|[0-9a-f]{40}|[0-9a-f]{32})(?![0-9a-f])")
+
+class DomainTrie:
+    """
+    Trie of domain labels stored right to left, so lookup of host finds every indicator it equals or is subdomain of.
+    """
+    def __init__(self) -> None:
+        self.root = {}
+
+    def add(self, domain: str, source: str) -> None:
+        node = self.root
+        for label in reversed(domain.split(".")):
+            node = node.setdefault(label, {})
+        node.setdefault("", set()).add(source)
+
+    def lookup(self, host: str) -> list[tuple[str, set]]:
+        found = []
+        node = self.root
+        labels = host.split(".")
+        for i in range(len(labels) - 1, -1, -1):
+            node = node.get(labels[i])
+            if node is None: break
+            if "" in node: found.append((".".join(labels[i:]), node[""]))
+        return found
+
+    def __len__(self) -> int:
+        count = 0
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            count += "" in node
+            stack.extend(v for k, v in node.items() if k)
+        return count
+
+class IndicatorMatcher:
+    """
+    In-memory matcher of exported indicators. match(line) splits raw event text into tokens once, so NDJSON and CSV lines are matched
+    without parsing them: binary names and file hashes are whole tokens looked up in dicts, dotted tokens are looked up as hosts in
+    DomainTrie (subdomains match too). Binary names spanning several tokens (with spaces) go to Aho-Corasick automaton when
+    pyahocorasick is installed, plain substring search otherwise.
+    """
+    def __init__(self) -> None:
+        self.binaries = {}
+        self.phrases = {}
+        self.domains = DomainTrie()
+        self.hashes = {}
+        self.automaton = None
+
+    def add(self, kind: str, value: str, source: str) -> None:
+        if kind == "binaries":
+            value = " ".join(value.lower().split())
+            if not value: return
+            (self.binaries if MATCH_TOKEN.fullmatch(value) else self.phrases).setdefault(value, set()).add(source)
+        elif kind == "domains":
+            for host in MATCH_HOST.findall(value.lower()):
+                self.domains.add(host.removeprefix("www."), source)
+        elif kind == "hashes":
+            for digest in MATCH_HASH.findall(value.lower()):
+                self.hashes.setdefault(digest, set()).add(source)
+
+    def compile(self) -> "IndicatorMatcher":
+        try:
+            import ahocorasick  # pyahocorasick, optional C automaton for binary names with spaces
+        except ImportError:
+            ahocorasick = None
+        if ahocorasick is not None and self.phrases:
+            self.automaton = ahocorasick.Automaton()
+            for phrase in self.phrases: self.automaton.add_word(phrase, phrase)
+            self.automaton.make_automaton()
+        return self
+
+    @staticmethod
+    def occurrences(text: str, phrase: str):
+        start = text.find(phrase)
+        while start != -1:
+            yield start
+            start = text.find(phrase, start + 1)
+
+    def phrases_in(self, text: str):
+        if self.automaton is not None:
+            found = ((end - len(phrase) + 1, end, phrase) for end, phrase in self.automaton.iter(text))
+        else:
+            # every occurrence like automaton yields, first one can be part of longer token
+            found = ((start, start + len(phrase) - 1, phrase) for phrase in self.phrases for start in self.occurrences(text, phrase))
+        last = len(text) - 1
+        for start, end, phrase in found:
+            # only whole tokens count, same as for single token names
+            if (start == 0 or not MATCH_TOKEN.match(text[start - 1])) and (end == last or not MATCH_TOKEN.match(text[end + 1])):
+                yield phrase
+
+    def match(self, line: str) -> list[dict]:
+        text = line.lower()
+        tokens = set(MATCH_TOKEN.findall(text))
+        # set intersections run in C, only dotted tokens whose last label is known top level label reach the trie
+        hits = [{"type": "binary", "indicator": i, "sources": sorted(self.binaries[i])} for i in tokens & self.binaries.keys()]
+        if self.hashes:
+            hits += [{"type": "hash", "indicator": i, "sources": sorted(self.hashes[i])} for i in tokens & self.hashes.keys()]
+        root = self.domains.root
+        if root:
+            seen = set()
+            for token in tokens:
+                if "." in token and token.strip(".").rpartition(".")[2] in root:
+                    host = token.strip(".")
+                    for domain, sources in self.domains.lookup(host):
+                        if domain not in seen:
+                            seen.add(domain)
+                            hits.append({"type": "domain", "indicator": domain, "host": host, "sources": sorted(sources)})
+        if self.phrases:
+            hits += [{"type": "binary", "indicator": i, "sources": sorted(self.phrases[i])} for i in set(self.phrases_in(text))]
+        return hits
+
+def BuildMatcher(export_dir: str = "export", kinds: list[str] | None = None, sources: list[str] | None = None) -> IndicatorMatcher:
+    """
+    Compiles IndicatorMatcher from exports in export_dir (ndjson preferred, csv otherwise) as configured in MATCH_SOURCES.
+    """
+    matcher = IndicatorMatcher()
+    for kind, exports in MATCH_SOURCES.items():
+        if kinds and kind not in kinds: continue
+        for export, patterns in exports.items():
+            if sources and export not in sources: continue
+            path = next((i for i in [os.path.join(export_dir, export + ".ndjson"), os.path.join(export_dir, export + ".csv")] if os.path.exists(i)), None)
+            if path is None:
+                print(f" \033[1;90m[\033[1;31mWARNING\033[1;90m]\033[0m No export of {export} in {export_dir}, its {kind} are not matched", file=sys.stderr)
+                continue
+            for record in ReadExportRecords(path):
+                for key, val in record.items():
+                    if any(i in key.lower() for i in patterns):
+                        for value in val if isinstance(val, list) else [val]:
+                            matcher.add(kind, str(value), export)
+    return matcher.compile()
+
+_matcher = None
+
+def _InitMatcher(matcher: IndicatorMatcher) -> None:
+    global _matcher
+    _matcher = matcher
+
+def _MatchChunk(file: str, first: int, lines: list[str]) -> tuple[int, list[str]]:
+    """
+    Matches chunk of lines in worker, returns (events, hits as NDJSON lines).
+    """
+    out = []
+    match = _matcher.match
+    for number, line in enumerate(lines, first):
+        hits = match(line)
+        if hits: out.append(json.dumps({"file": file, "line": number, "matches": hits, "event": line.rstrip("\r\n")}, ensure_ascii=False) + "\n")
+    return len(lines), out
+
+def MatchStreams(matcher: IndicatorMatcher, inputs: list[str], output, workers: int = 1, chunk_size: int = 20000) -> tuple[int, int]:
+    """
+    Streams event logs (paths, "-" for stdin) through matcher and writes hits as NDJSON to output, in input order.
+    Inputs are cut into chunks of lines which are matched in process pool when workers > 1. Returns (events, hits).
+    """
+    def chunks():
+        for path in inputs:
+            f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8", errors="replace")
+            try:
+                number = 1
+                while True:
+                    lines = f.readlines(chunk_size * 256) if f is not sys.stdin else [line for _, line in zip(range(chunk_size), f)]
+                    if not lines: break
+                    yield path, number, lines
+                    number += len(lines)
+            finally:
+                if f is not sys.stdin: f.close()
+
+    events = hits = 0
+    if workers <= 1:
+        _InitMatcher(matcher)
+        for chunk in chunks():
+            count, out = _MatchChunk(*chunk)
+            events += count
+            hits += len(out)
+            output.writelines(out)
+        return events, hits
+
+    # Results are written in input order, at most 2 chunks per worker are in flight so memory stays bounded
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers, initializer=_InitMatcher, initargs=(matcher,)) as pool:
+        pending = []
+        for chunk in chunks():
+            pending.append(pool.submit(_MatchChunk, *chunk))
+            while len(pending) >= workers * 2 or (pending and pending[0].done()):
+                count, out = pending.pop(0).result()
+                events += count
+                hits += len(out)
+                output.writelines(out)
+        for future in pending:
+            count, out = future.result()
+            events += count
+            hits += len(out)
+            output.writelines(out)
+    return events, hits
+
+def HandleMatchArgs() -> None:
+    """
+    `LotCSV.py match [files] [-w workers] [-o output] [-k kinds] [-g sources] [-x export dir]`, matches event logs against exports.
+    """
+    usage = f"Usage: LotCSV.py match [files, - or none for stdin] [-w workers] [-o output.ndjson] [-k {','.join(MATCH_SOURCES)}] [-g sources] [-x export dir]"
+    inputs = []
+    workers = 1
+    output = None
+    kinds = sources = None
+    export_dir = "export"
+    args = iter(sys.argv[2:])
+    try:
+        for arg in args:
+            if arg in ["-w", "--workers"]: workers = int(next(args))
+            elif arg in ["-o", "--output"]: output = next(args)
+            elif arg in ["-k", "--kinds"]: kinds = next(args).split(",")
+            elif arg in ["-g", "--get_specific"]: sources = next(args).split(",")
+            elif arg in ["-x", "--export"]: export_dir = next(args)
+            elif arg in ["-h", "--help"]: print(usage); exit(0)
+            else: inputs.append(arg)
+    except (StopIteration, ValueError):
+        print(f"{usage}\n\n \033[0;31mERROR | Invalid argument \033[0m", file=sys.stderr); exit(1)
+    for i in kinds or []:
+        if i not in MATCH_SOURCES:
+            print(f" \033[0;31mERROR | Unknown indicator kind: {i} \033[0m", file=sys.stderr); exit(1)
+
+    start = time.perf_counter()
+    matcher = BuildMatcher(export_dir, kinds, sources)
+    print(f" \033[1;90m[\033[1;33mINFO\033[1;90m]\033[0m Compiled {len(matcher.binaries) + len(matcher.phrases)} binaries, {len(matcher.domains)} domains, {len(matcher.hashes)} hashes "
+          f"in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    start = time.perf_counter()
+    with (open(output, "w", encoding="utf-8") if output else contextlib.nullcontext(sys.stdout)) as out:
+        events, hits = MatchStreams(matcher, inputs or ["-"], out, workers)
+    elapsed = time.perf_counter() - start
+    print(f" \033[1;90m[\033[1;33mINFO\033[1;90m]\033[0m {events} events, {hits} with hits in {elapsed:.2f}s ({events / max(elapsed, 1e-9):.0f} events/s)", file=sys.stderr)
+
+# Cross-source entities of merged_entities export: {kind: {export: [column name parts]}}, columns are matched case-insensitively
+MERGE_SOURCES = {
+    "binary": {"lolbas": ["name"], "hijacklibs": ["name"], "loflcab": ["name"], "gtfobins": ["name"], "loobins": ["name"], "lolesxi": ["name"]},
+    "domain": {"lottunnels_domain": ["domain"], "lolrmm": ["domain", "website"], "lotwebhooks": ["url"], "lots_project": ["website"], "lots_project_additional": ["website"]},
+    "hash": {"loldrivers": ["md5", "sha1", "sha256"], "bootloaders": ["md5", "sha1", "sha256"]},
+}
+# Public suffixes of more than one label (ccTLD second levels, shared hosting), their subdomains are registrable domains
+MERGE_SUFFIXES = {
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "com.au", "net.au", "org.au", "co.jp", "ne.jp", "or.jp", "co.kr", "co.nz", "co.za", "co.in",
+    "com.br", "com.cn", "com.hk", "com.mx", "com.sg", "com.tr", "com.tw", "com.ru",
+    "github.io", "gitlab.io", "herokuapp.com", "azurewebsites.net", "cloudapp.net", "blob.core.windows.net", "web.core.windows.net",
+    "trafficmanager.net", "cloudfront.net", "s3.amazonaws.com", "execute-api.amazonaws.com", "appspot.com", "web.app",
+    "firebaseapp.com", "pages.dev", "workers.dev", "netlify.app", "vercel.app", "ngrok.io", "ngrok-free.app", "ngrok.app",
+    "trycloudflare.com", "loca.lt", "serveo.net", "duckdns.org", "no-ip.org", "ddns.net", "glitch.me", "repl.co",
+}
+
+@functools.lru_cache(maxsize=1 << 16)
+def RegistrableDomain(host: str) -> str:
+    """
+    Registrable domain of host: one label under its public suffix, suffixes with more labels come from MERGE_SUFFIXES.
+    """
+    labels = host.strip(".").split(".")
+    for size in (3, 2):
+        if len(labels) > size and ".".join(labels[-size:]) in MERGE_SUFFIXES: return ".".join(labels[-size - 1:])
+    return ".".join(labels[-2:])
+
+def EntityKeys(kind: str, value: str) -> list[str]:
+    """
+    Normalised entity keys of export cell: lower-cased file name of binaries (path dropped), registrable domains of every
+    host in domain cells, every md5/sha1/sha256 in hash cells.
+    """
+    value = value.lower()
+    if kind == "binary":
+        name = " ".join(value.replace("\\", "/").rpartition("/")[2].split())
+        return [name] if name else []
+    if kind == "domain":
+        return list(dict.fromkeys(RegistrableDomain(host) for host in MATCH_HOST.findall(value)))
+    return list(dict.fromkeys(MATCH_HASH.findall(value)))
+
+def ExportCells(path: str, export: str, patterns: list[str]):
+    """
+    Yields (identity, [cells]) of every record of export, with only columns matching patterns read. Identity is joined
+    value of identity columns (IdentityColumns) as in delta exports. Csv list cells are split back into their items.
+    """
+    if path.endswith(".ndjson"):
+        # Missing cells are left out of ndjson records, columns are matched per key as they show up
+        matched = {}
+        identity = None
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if identity is None: identity = IdentityColumns(export, list(record))
+                cells = []
+                for key, val in record.items():
+                    hit = matched.get(key)
+                    if hit is None: hit = matched[key] = any(p in key.lower() for p in patterns)
+                    if not hit: continue
+                    if isinstance(val, list): cells.extend(str(i) for i in val)
+                    elif val != "": cells.append(str(val))
+                yield "|".join(str(record.get(i, "")) for i in identity), cells
+        return
+    csv.field_size_limit(2**31 - 1)
+    with open(path, "r", encoding="utf-8", errors="ignore", newline="") as f:
+        rows = csv.reader(f)
+        header = next(rows, [])[:-1]
+        identity = [header.index(i) for i in IdentityColumns(export, header)]
+        columns = [i for i, key in enumerate(header) if any(p in key.lower() for p in patterns)]
+        for row in rows:
+            cells = []
+            for i in columns:
+                cell = row[i] if i < len(row) else ""
+                if cell.startswith("[''") and cell.endswith("'']"): cells.extend(cell[3:-3].split("''-|-''"))
+                elif cell: cells.append(cell)
+            yield "|".join(row[i] if i < len(row) else "" for i in identity), cells
+
+@Timed
+def MergeEntities(output: str, export_dir: str = "export") -> bool:
+    """
+    Builds merged_entities export: records of exports in MERGE_SOURCES are resolved to normalised entity keys (EntityKeys)
+    and hash joined on (type, key). Every entity gets one row with the exports it was seen in (Sources, Source_Count) and
+    a provenance column per export with identities of its records there. Exports are read from export_dir, ndjson preferred.
+    """
+    entities = {}
+    exports = []
+    for kind, sources in MERGE_SOURCES.items():
+        for export, patterns in sources.items():
+            path = next((i for i in [os.path.join(export_dir, export + ".ndjson"), os.path.join(export_dir, export + ".csv")] if os.path.exists(i)), None)
+            if path is None: continue
+            exports.append(export)
+            for identity, cells in ExportCells(path, export, patterns):
+                for cell in cells:
+                    for key in EntityKeys(kind, cell):
+                        provenance = entities.get((kind, key))
+                        if provenance is None: provenance = entities[(kind, key)] = {}
+                        seen = provenance.get(export)
+                        if seen is None: seen = provenance[export] = {}
+                        seen[identity] = None
+    if not exports:
+        print(f" \033[1;90m[\033[1;31mWARNING\033[1;90m]\033[0m No exports to merge in {export_dir}")
+        return False
+
+    def rows():
+        for (kind, key), provenance in sorted(entities.items()):
+            row = {"Entity": key, "Type": kind, "Sources": list(provenance), "Source_Count": len(provenance)}
+            for export, seen in provenance.items(): row[export] = list(seen)
+            yield row
+
+    shared = sum(len(i) > 1 for i in entities.values())
+    print(f" \033[1;90m[\033[1;33mINFO\033[1;90m]\033[0m Merged {len(entities)} entities from {len(exports)} exports, {shared} seen in more than one")
+    return WriteExport(output, rows(), ["Entity", "Type", "Sources", "Source_Count"] + exports)
+
+# Hash index (<export>.<type>.idx next to export): header, fanout table of uint32 offsets by leading digest bits,
+# blocked Bloom filter of 64-bit words, sorted fixed-width binary digests. Little endian, memory-mapped at lookup
+HASH_INDEX_MAGIC = b"LOTHIDX1"
+HASH_INDEX_HEADER = struct.Struct("<8sBBBxIQ")  # magic, digest size, fanout bits, bloom bits per digest, bloom words, digest count
+HASH_TYPES = {"md5": 16, "sha1": 20, "sha256": 32}
+HASH_INDEX_BLOOM_BITS = 12  # bits per digest, a few percent false positives with 6 bits set in one 64-bit word
+
+def _BloomWord(digest: bytes, words: int) -> tuple[int, int]:
+    # Digests are uniformly distributed already: first 8 bytes pick the word, next 6 bytes the bits set in it
+    mask = 1 << (digest[8] & 63) | 1 << (digest[9] & 63) | 1 << (digest[10] & 63) | 1 << (digest[11] & 63) | 1 << (digest[12] & 63) | 1 << (digest[13] & 63)
+    return int.from_bytes(digest[:8], "little") % words, mask
+
+def WriteHashIndex(path: str, digests, size: int, bloom_bits: int = HASH_INDEX_BLOOM_BITS) -> int:
+    """
+    Writes hash index of binary digests of one size. Fanout table has about one bucket per digest, so lookups compare
+    one or two digests. bloom_bits=0 leaves Bloom filter out. Returns number of distinct digests.
+    """
+    import array
+    digests = sorted(set(digests))
+    count = len(digests)
+    fanout_bits = max(8, min(24, count.bit_length()))
+    shift = 32 - fanout_bits
+    fanout = array.array("I", bytes(((1 << fanout_bits) + 1) * 4))
+    for digest in digests: fanout[(int.from_bytes(digest[:4], "big") >> shift) + 1] += 1
+    for i in range(1, len(fanout)): fanout[i] += fanout[i - 1]
+    words = (count * bloom_bits + 63) // 64 if bloom_bits else 0
+    bloom = array.array("Q", bytes(words * 8))
+    for digest in digests if words else []:
+        word, mask = _BloomWord(digest, words)
+        bloom[word] |= mask
+    if sys.byteorder == "big":
+        fanout.byteswap()
+        bloom.byteswap()
+    tmp = PublishTemp(path)
+    try:
+        with open(tmp, "wb") as f:
+            f.write(HASH_INDEX_HEADER.pack(HASH_INDEX_MAGIC, size, fanout_bits, bloom_bits if words else 0, words, count))
+            f.write(fanout.tobytes())
+            f.write(bloom.tobytes())
+            f.write(b"".join(digests))
+    except BaseException:
+        Unpublish(tmp)
+        raise
+    os.replace(tmp, path)
+    return count
+
+class HashIndex:
+    """
+    Memory-mapped hash index written by WriteHashIndex. Opening reads only the header, `digest in index` looks up fanout bucket
+    of digest and compares the digests in it. With use_bloom Bloom filter is checked first: one 64-bit word per lookup, which
+    saves reading digests when index is not in page cache, but in Python it costs more than the fanout lookup of warm index.
+    """
+    def __init__(self, path: str, use_bloom: bool = False) -> None:
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+        if len(self.map) < HASH_INDEX_HEADER.size: raise ValueError(f"{path} is not a hash index")
+        magic, self.size, bits, bloom_bits, self.bloom_words, self.count = HASH_INDEX_HEADER.unpack_from(self.map, 0)
+        if magic != HASH_INDEX_MAGIC: raise ValueError(f"{path} is not a hash index")
+        self.shift = 32 - bits
+        self.fanout = HASH_INDEX_HEADER.size
+        self.bloom = self.fanout + ((1 << bits) + 1) * 4
+        self.digests = self.bloom + self.bloom_words * 8
+        if len(self.map) < self.digests + self.count * self.size: raise ValueError(f"{path} is truncated")
+        self.use_bloom = use_bloom and self.bloom_words > 0
+        self._members = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def members(self) -> frozenset[bytes]:
+        """
+        Every digest of index as set, built once on first call. Batches of lookups intersect with it in C instead of
+        looking up digests one by one.
+        """
+        if self._members is None:
+            data = self.map
+            size = self.size
+            self._members = frozenset(data[i:i + size] for i in range(self.digests, self.digests + self.count * size, size))
+        return self._members
+
+    def __contains__(self, digest: bytes) -> bool:
+        data = self.map
+        if self.use_bloom:
+            word, mask = _BloomWord(digest, self.bloom_words)
+            if int.from_bytes(data[self.bloom + word * 8:self.bloom + word * 8 + 8], "little") & mask != mask: return False
+        lo, hi = _FANOUT_ENTRY(data, self.fanout + (int.from_bytes(digest[:4], "big") >> self.shift) * 4)
+        size = self.size
+        base = self.digests
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            found = data[base + mid * size:base + mid * size + size]
+            if found < digest: lo = mid + 1
+            elif found > digest: hi = mid
+            else: return True
+        return False
+
+_FANOUT_ENTRY = struct.Struct("<II").unpack_from
+
+@Timed
+def WriteHashIndexes(output: str) -> bool:
+    """
+    Writes hash index of every hash type found in export (<export>.md5.idx, .sha1.idx, .sha256.idx), hashes are taken from
+    its md5/sha1/sha256 columns.
+    """
+    if not settings["hash_index"]: return True
+    if "ndjson" not in settings["formats"] and "csv" not in settings["formats"]:
+        print(f" \033[1;90m[\033[1;31mWARNING\033[1;90m]\033[0m Hash index of {output} is read from csv or ndjson export, not written")
+        return True
+    digests = {kind: set() for kind in HASH_TYPES}
+    sizes = {size * 2: kind for kind, size in HASH_TYPES.items()}
+    try:
+        path = ExportPath(output, "ndjson") if "ndjson" in settings["formats"] else output
+        for _, cells in ExportCells(path, os.path.basename(os.path.splitext(output)[0]), list(HASH_TYPES)):
+            for cell in cells:
+                for digest in MATCH_HASH.findall(cell.lower()): digests[sizes[len(digest)]].add(bytes.fromhex(digest))
+        stem = os.path.splitext(output)[0]
+        counts = {kind: WriteHashIndex(f"{stem}.{kind}.idx", values, HASH_TYPES[kind]) for kind, values in digests.items()}
+    except OSError as e:
+        print(f" \033[1;90m[\033[1;31mERROR\033[1;90m]\033[0m Failed to write hash index of {output}: {e}")
+        return False
+    print(f" \033[1;90m[\033[1;32m+\033[1;90m]\033[0m Hash index\033[1;90m:\033[0m \033[1;93m{stem}.*.idx\033[0m ({', '.join(f'{count} {kind}' for kind, count in counts.items())})")
+    return True
+
+@functools.cache
+def HashIndexes(export_dir: str = "export", use_bloom: bool = False) -> dict[int, list[tuple[str, HashIndex]]]:
+    """
+    Hash indexes in export_dir by digest size, as [(export, index)]. Opened once per process.
+    """
+    indexes = {}
+    files = sorted(os.listdir(export_dir)) if os.path.isdir(export_dir) else []
+    for kind, size in HASH_TYPES.items():
+        for file in files:
+            if file.endswith(f".{kind}.idx"):
+                indexes.setdefault(size, []).append((file[:-len(kind) - 5], HashIndex(os.path.join(export_dir, file), use_bloom)))
+    return indexes
+
+def LookupHash(value: str, export_dir: str = "export", use_bloom: bool = False) -> list[str]:
+    """
+    Exports whose hash index contains md5/sha1/sha256 given as hex, empty when not found or not a hash.
+    """
+    try:
+        digest = bytes.fromhex(value)
+    except ValueError:
+        return []
+    return [export for export, index in HashIndexes(export_dir, use_bloom).get(len(digest), ()) if digest in index]
+
+# Lookups are made in batches, full batches (long streams of hashes) go through digest sets of indexes (HashIndex.members)
+HASH_LOOKUP_BATCH = 65536
+
+def LookupHashes(values, export_dir: str = "export", use_bloom: bool = False):
+    """
+    Yields (value, [exports]) for every md5/sha1/sha256 hex string of values, indexes are opened once for all of them.
+    Few hashes are looked up in memory-mapped indexes one by one, long streams are intersected with digest sets in batches.
+    """
+    indexes = HashIndexes(export_dir, use_bloom)
+    values = iter(values)
+    fromhex = bytes.fromhex
+    while True:
+        batch = []
+        digests = []
+        for value in values:
+            try:
+                digest = fromhex(value)
+            except ValueError:
+                digest = b""
+            batch.append(value)
+            digests.append(digest)
+            if len(batch) >= HASH_LOOKUP_BATCH: break
+        if not batch: return
+        hits = {}
+        sizes = set(map(len, digests))
+        for size, found in indexes.items():
+            if size not in sizes: continue
+            for export, index in found:
+                if len(batch) >= HASH_LOOKUP_BATCH or index._members is not None:
+                    matched = index.members().intersection(digests)
+                else:
+                    matched = [digest for digest in digests if len(digest) == size and digest in index]
+                for digest in matched: hits.setdefault(digest, []).append(export)
+        if hits:
+            for value, digest in zip(batch, digests): yield value, hits.get(digest, [])
+        else:
+            for value in batch: yield value, []
+
+def HandleLookupHashArgs() -> None:
+    """
+    `LotCSV.py lookup-hash [hashes] [-x export dir] [-j] [-b]`, checks hashes (or lines of stdin) against hash indexes of exports.
+    """
+    usage = "Usage: LotCSV.py lookup-hash [md5/sha1/sha256 hashes, - or none for stdin] [-x export dir] [-j json output] [-b check Bloom filter first]"
+    hashes = []
+    export_dir = "export"
+    as_json = False
+    use_bloom = False
+    args = iter(sys.argv[2:])
+    try:
+        for arg in args:
+            if arg in ["-x", "--export"]: export_dir = next(args)
+            elif arg in ["-j", "--json"]: as_json = True
+            elif arg in ["-b", "--bloom"]: use_bloom = True
+            elif arg in ["-h", "--help"]: print(usage); exit(0)
+            else: hashes.append(arg)
+    except StopIteration:
+        print(f"{usage}\n\n \033[0;31mERROR | Invalid argument \033[0m", file=sys.stderr); exit(1)
+    try:
+        if not HashIndexes(export_dir, use_bloom):
+            print(f" \033[0;31mERROR | No hash indexes in {export_dir}, run LotCSV with -g loldrivers,bootloaders first \033[0m", file=sys.stderr); exit(1)
+    except (OSError, ValueError) as e:
+        print(f" \033[0;31mERROR | Cannot open hash index: {e} \033[0m", file=sys.stderr); exit(1)
+
+    start = time.perf_counter()
+    queries = found = 0
+    lines = []
+    values = (i.strip() for i in (hashes if hashes and hashes != ["-"] else sys.stdin))
+    for value, exports in LookupHashes((i for i in values if i), export_dir, use_bloom):
+        queries += 1
+        if exports:
+            found += 1
+            lines.append(json.dumps({"hash": value, "exports": exports}) + "\n" if as_json else f"{value}\t{','.join(exports)}\n")
+            if len(lines) >= 10000:
+                sys.stdout.writelines(lines)
+                lines.clear()
+    sys.stdout.writelines(lines)
+    elapsed = time.perf_counter() - start
+    print(f" \033[1;90m[\033[1;33mINFO\033[1;90m]\033[0m {queries} hashes, {found} found in {elapsed:.2f}s ({queries / max(elapsed, 1e-9):.0f} lookups/s)", file=sys.stderr)
+    if not found: exit(1)
+
+# Daemon mode: refresh interval of every source in seconds (default for others, -iv overrides all) and retry backoff after failures
+DAEMON_INTERVAL = 6 * 3600
+DAEMON_INTERVALS = {"bootloaders": 3600, "loldrivers": 3600, "lolrmm": 3600, "lots_project_additional": 24 * 3600}
+DAEMON_BACKOFF = (60, 3600)  # first retry delay, longest retry delay
+
+def RefreshDelay(name: str, failures: int) -> float:
+    """
+    Seconds until next refresh of source. After success its interval with +-10% jitter, after failures exponential backoff
+    (first retry delay doubled per failure, capped by longest delay and interval) with equal jitter, so retries of many sources spread out.
+    """
+    interval = settings["interval"] or DAEMON_INTERVALS.get(name, DAEMON_INTERVAL)
+    if not failures: return interval * random.uniform(0.9, 1.1)
+    delay = min(DAEMON_BACKOFF[0] * 2 ** (failures - 1), DAEMON_BACKOFF[1], interval)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+def DaemonMetrics(state: dict[str, dict]) -> str:
+    """
+    Prometheus text format of per-source freshness, refresh durations and export sizes.
+    """
+    now = time.time()
+    gauges = [
+        ("lotcsv_source_up", "Whether last refresh of source succeeded", lambda s, m: None if s["ok"] is None else int(s["ok"])),
+        ("lotcsv_source_last_success_timestamp_seconds", "Unix time of last successful refresh", lambda s, m: s["last_success"]),
+        ("lotcsv_source_age_seconds", "Seconds since last successful refresh", lambda s, m: now - s["last_success"] if s["last_success"] else None),
+        ("lotcsv_source_refresh_duration_seconds", "Duration of last refresh", lambda s, m: s["duration"]),
+        ("lotcsv_source_failures", "Failed refreshes since last success", lambda s, m: s["failures"]),
+        ("lotcsv_source_next_refresh_timestamp_seconds", "Unix time of next scheduled refresh", lambda s, m: s["next"]),
+        ("lotcsv_source_rows", "Rows written by last refresh", lambda s, m: sum(i["rows"] for i in m.get("outputs", {}).values()) if m.get("outputs") else None),
+        ("lotcsv_source_bytes", "Bytes written by last refresh", lambda s, m: m.get("bytes_out")),
+    ]
+    lines = []
+    for metric, help, value in gauges:
+        lines += [f"# HELP {metric} {help}", f"# TYPE {metric} gauge"]
+        for name, record in sorted(state.items()):
+            val = value(record, source_metrics.get(name, {}))
+            if val is not None: lines.append(f'{metric}{{source="{name}"}} {round(val, 3) if isinstance(val, float) else val}')
+    return "\n".join(lines) + "\n"
+
+@functools.cache
+def _ExportHandler() -> type:
+    """
+    Returns request handler of export server (http.server is imported on first use).
+    """
+    import http.server
+    import email.utils
+    import gzip
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        server_version = "LotCSV"
+
+        def do_HEAD(self) -> None:
+            self.do_GET(body=False)
+
+        def do_GET(self, body: bool = True) -> None:
+            path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+            if path == "/metrics":
+                with self.server.lock: text = DaemonMetrics(self.server.state)
+                return self.reply(200, text.encode(), "text/plain; version=0.0.4; charset=utf-8", body=body)
+            if path == "/":
+                listing = {name: {"bytes": stat.st_size, "modified": email.utils.formatdate(stat.st_mtime, usegmt=True)} for name, stat in self.exports()}
+                return self.reply(200, json.dumps(listing, indent=2).encode(), "application/json", body=body)
+            name = path.lstrip("/")
+            if "/" in name or not self.published(name) or not os.path.isfile(os.path.join(self.server.directory, name)):
+                return self.reply(404, b"Not found\n", "text/plain", body=body)
+            # File handle stays valid when export is replaced meanwhile, ETag and body always belong together
+            with self.read_transaction(name), open(os.path.join(self.server.directory, name), "rb") as f:
+                stat = os.fstat(f.fileno())
+                etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+                headers = {"ETag": etag, "Last-Modified": email.utils.formatdate(stat.st_mtime, usegmt=True), "Accept-Ranges": "bytes",
+                           "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+                if self.not_modified(etag, stat.st_mtime):
+                    return self.reply(304, b"", None, headers, body)
+                content_type = {".csv": "text/csv", ".ndjson": "application/x-ndjson", ".json": "application/json"}.get(os.path.splitext(name)[1], "application/octet-stream")
+                ranges = self.headers.get("Range")
+                if ranges and self.headers.get("If-Range", etag) in (etag, headers["Last-Modified"]):
+                    span = self.byte_range(ranges, stat.st_size)
+                    if span is None:
+                        return self.reply(416, b"", None, {**headers, "Content-Range": f"bytes */{stat.st_size}"}, body)
+                    f.seek(span[0])
+                    return self.reply(206, f, content_type, {**headers, "Content-Range": f"bytes {span[0]}-{span[1]}/{stat.st_size}"}, body, span[1] - span[0] + 1)
+                if "gzip" in self.headers.get("Accept-Encoding", "") and content_type.startswith(("text/", "application/x-ndjson", "application/json")):
+                    data = self.server.compressed(name, etag, f)
+                    return self.reply(200, data, content_type, {**headers, "ETag": etag[:-1] + '-gzip"', "Content-Encoding": "gzip"}, body)
+                return self.reply(200, f, content_type, headers, body, stat.st_size)
+
+        def exports(self) -> list[tuple[str, os.stat_result]]:
+            with os.scandir(self.server.directory) as entries:
+                return sorted((i.name, i.stat()) for i in entries if i.is_file() and self.published(i.name))
+
+        @contextlib.contextmanager
+        def read_transaction(self, name: str):
+            """
+            Holds SQLite read lock on .sqlite file while it is served, index is updated in place (UpdateIndex) and commit
+            waits for it, so body is never caught mid-commit.
+            """
+            db = None
+            if name.endswith(".sqlite"):
+                import sqlite3
+                try:
+                    db = sqlite3.connect(f"file:{urllib.parse.quote(os.path.join(self.server.directory, name))}?mode=ro", uri=True, timeout=INDEX_BUSY_TIMEOUT)
+                    db.execute("BEGIN")
+                    db.execute("SELECT count(*) FROM sqlite_master").fetchone()
+                except sqlite3.Error:
+                    if db is not None: db.close()
+                    db = None
+            try:
+                yield
+            finally:
+                if db is not None: db.close()
+
+        @staticmethod
+        def published(name: str) -> bool:
+            """
+            Hides dotfiles, temp files exports are written to and SQLite side files (rollback journal, WAL).
+            """
+            return not name.startswith(".") and not name.endswith((".tmp", "-journal", "-wal", "-shm"))
+
+        def not_modified(self, etag: str, modified: float) -> bool:
+            match = self.headers.get("If-None-Match")
+            if match is not None:
+                return any(i.strip() in (etag, etag[:-1] + '-gzip"', "*") for i in match.split(","))
+            since = self.headers.get("If-Modified-Since")
+            if since:
+                try: return int(modified) <= email.utils.parsedate_to_datetime(since).timestamp()
+                except (TypeError, ValueError): return False
+            return False
+
+        @staticmethod
+        def byte_range(header: str, size: int) -> tuple[int, int] | None:
+            # Single range only (bytes=a-b, a- or -n), which is what resuming collectors send
+            unit, _, spec = header.partition("=")
+            start, _, end = spec.strip().partition("-")
+            if unit.strip() != "bytes" or "," in spec: return None
+            try:
+                if not start: first, last = max(0, size - int(end)), size - 1
+                else: first, last = int(start), min(int(end), size - 1) if end else size - 1
+            except ValueError:
+                return None
+            return (first, last) if first <= last and first < size else None
+
+        def reply(self, status: int, data, content_type: str | None, headers: dict | None = None, body: bool = True, length: int | None = None) -> None:
+            self.send_response(status)
+            if content_type: self.send_header("Content-Type", content_type)
+            for key, val in (headers or {}).items(): self.send_header(key, val)
+            self.send_header("Content-Length", str(len(data) if isinstance(data, bytes) else length))
+            self.end_headers()
+            if not body or status == 304: return
+            if isinstance(data, bytes): self.wfile.write(data)
+            else:
+                remaining = length
+                while remaining > 0:
+                    chunk = data.read(min(1 << 20, remaining))
+                    if not chunk: break
+                    self.wfile.write(chunk)
+                    remaining -= len(chunk)
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    class Server(http.server.ThreadingHTTPServer):
+        daemon_threads = True
+
+        def handle_error(self, request, client_address) -> None:
+            # Clients hanging up mid download are normal for pollers
+            if not isinstance(sys.exc_info()[1], ConnectionError):
+                super().handle_error(request, client_address)
+
+        def compressed(self, name: str, etag: str, f) -> bytes:
+            # Latest gzip body of every export is kept, so polling collectors do not make it compress again
+            with self.lock:
+                cached = self.gzip_cache.get(name)
+                if cached and cached[0] == etag: return cached[1]
+            data = gzip.compress(f.read(), 6)
+            with self.lock: self.gzip_cache[name] = (etag, data)
+            return data
+
+    Handler.Server = Server
+    return Handler
+
+def StartExportServer(host: str, port: int, directory: str, state: dict, lock: threading.Lock):
+    """
+    Serves files of export directory over HTTP in background thread: ETag/Last-Modified (304 on If-None-Match/If-Modified-Since),
+    gzip when accepted, single byte ranges, JSON listing at / and Prometheus metrics of the daemon at /metrics.
+    """
+    handler = _ExportHandler()
+    server = handler.Server((host, port), handler)
+    server.directory = directory
+    server.state = state
+    server.lock = lock
+    server.gzip_cache = {}
+    threading.Thread(target=server.serve_forever, name="export-server", daemon=True).start()
+    return server
+
+def RunDaemon(sources: dict[str, tuple], host: str = "127.0.0.1", port: int = 8080) -> None:
+    """
+    Refreshes every source on its own schedule (RefreshDelay) until interrupted, due sources are run together through RunSources
+    in background thread while other sources keep their schedule. Exports are published atomically and served by export server.
+    """
+    lock = threading.Lock()
+    index_lock = threading.Lock()
+    state = {name: {"ok": None, "failures": 0, "last_success": None, "last_attempt": None, "duration": None, "next": time.time()} for name in sources}
+    running = set()
+    server = StartExportServer(host, port, "export", state, lock)
+    print(f" \033[1;90m[\033[1;32m+\033[1;90m]\033[0m Serving exports at \033[1;93mhttp://{host}:{server.server_address[1]}/\033[0m (metrics at /metrics)")
+
+    def refresh(batch: list[str]) -> None:
+        started = time.time()
+        try:
+            results = RunSources({name: sources[name] for name in batch}, settings["workers"], settings["timeout"])
+        except Exception as e:
+            print(f" \033[1;90m[\033[1;31mERROR\033[1;90m]\033[0m Refresh of {', '.join(batch)} failed: {e}")
+            results = {name: False for name in batch}
+        now = time.time()
+        with lock:
+            for name in batch:
+                record = state[name]
+                record["ok"] = results.get(name, False)
+                record["last_attempt"] = started
+                record["duration"] = source_metrics.get(name, {}).get("seconds", now - started)
+                record["failures"] = 0 if record["ok"] else record["failures"] + 1
+                if record["ok"]: record["last_success"] = now
+                record["next"] = now + RefreshDelay(name, record["failures"])
+                running.discard(name)
+        if settings["index"] and any(results.values()):
+            with index_lock:
+                UpdateIndex(settings["index"], {name: list(source_metrics[name].get("outputs", {})) for name, ok in results.items() if ok})
+        if settings["merge"] and any(results.values()):
+            with index_lock:
+                MergeEntities(settings["merge"], os.path.dirname(settings["merge"]) or ".")
+
+    try:
+        while True:
+            now = time.time()
+            with lock:
+                # Timed out thread sources still hold their checkout and temp files, they wait until the old run returns
+                due = [name for name, record in state.items() if record["next"] <= now and name not in running and name not in stuck_sources]
+                running.update(due)
+            if due: threading.Thread(target=refresh, args=(due,), name="refresh", daemon=True).start()
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(f"\n \033[1;90m[\033[1;33mINFO\033[1;90m]\033[0m Stopping daemon")
+        server.shutdown()
+        server.server_close()
 
 def HandleSysArgs(help_menu: bool = False) -> None:
     global selected_sources, all_sources, additional_lots_project
@@ -619,10 +3422,36 @@ $$$$$$$$\\$$$$$$  | \$$$$  |\$$$$$$  |\$$$$$$  |   \$  /
 
     helpmenu = f"""{logo}\n\nHelp menu:
     -h   , --help                         |   get some help
+    query <terms>                         |   search consolidated index of previous runs: LotCSV.py query certutil.exe [-g sources] [-n limit] [-r] [-j]
+    match [files]                         |   match NDJSON/CSV event logs (or stdin) against exports: LotCSV.py match events.ndjson [-w workers] [-o hits.ndjson] [-k binaries,domains,hashes]
+    lookup-hash [hashes]                  |   check md5/sha1/sha256 hashes (or stdin) against LOLDrivers/Bootloaders hash indexes: LotCSV.py lookup-hash <hash> [-j] [-x export dir]
     -v   , --version                      |   get tool version
     -a   , --all                          |   get all sources and convert to csv
     -alp , --additional_lots_project      |   get more info from lots_project (making more traffic to the website) - needs to be added when requesting additional info!
     -g   , --get_specific                 |   get specific sources: {', '.join([i.strip() for i in valid_sources])}
+    -w   , --workers                      |   number of sources fetched at the same time (default: {settings["workers"]})
+    -t   , --timeout                      |   per source timeout in seconds (default: no limit)
+    -cr  , --crawl_rate                   |   max requests per second to one host for -alp detail pages (default: {settings["crawl_rate"]})
+    -ch  , --crawl_per_host               |   max parallel requests to one host for -alp detail pages (default: {settings["crawl_per_host"]})
+    -nc  , --no_cache                     |   do not use conditional GET cache for downloads ({settings["http_cache"]})
+    -fr  , --full_rebuild                 |   parse all files of git sources again instead of only changed ones ({settings["parse_cache"]})
+    -nj  , --no_journal                   |   do not resume interrupted -alp crawls from crawl journal ({settings["journal"]})
+    -s   , --streaming                    |   spool parsed records to temp file instead of memory (bounded memory, no parse cache)
+    -m   , --metrics                      |   write JSON report with per-source stage timings, traffic, rows/columns and peak memory to given file
+    -p   , --profile                      |   dump cProfile stats of every source into given directory
+    -pe  , --parse_engine                 |   YAML parsing engine: serial, parallel (default: {settings["parse_engine"]})
+    -d   , --delta                        |   also write *_added.csv, *_changed.csv and *_removed.csv with rows changed since previous -d run
+    -ni  , --no_index                     |   do not update consolidated SQLite index ({settings["index"]})
+    -nm  , --no_merge                     |   do not build merged export of entities found in several sources ({settings["merge"]})
+    -nh  , --no_hash_index                |   do not write hash indexes (.md5.idx, .sha1.idx, .sha256.idx) of LOLDrivers and Bootloaders
+    -sn  , --snapshot                     |   also write snapshot bundle of everything sources read (git trees, HTTP bodies) to given file
+    -fs  , --from_snapshot                |   rebuild exports from snapshot bundle without network (only sources in bundle unless -g is given)
+    -dm  , --daemon                       |   keep running: refresh every source on its schedule and serve exports over HTTP with /metrics
+    -iv  , --interval                     |   daemon refresh interval in seconds for every source (default: per source, 1-24 hours)
+    -bd  , --bind                         |   address of daemon export server (default: {settings["bind"]})
+    -pt  , --port                         |   port of daemon export server (default: {settings["port"]})
+    -mb  , --markdown_body                |   add "Body" column with markdown body to gtfobins, lottunnels, lolesxi and wadcoms exports
+    -f   , --format                       |   export formats: {', '.join(EXPORT_FORMATS)} (default: {','.join(settings["formats"])}), e.g. -f csv,parquet
     """
     if help_menu:print(helpmenu+"\n \033[0;31mERROR | Invalid argument \033[0m\n"); exit(0)
 
@@ -631,51 +3460,79 @@ $$$$$$$$\\$$$$$$  | \$$$$  |\$$$$$$  |\$$$$$$  |   \$  /
         elif arg.lower() == "-v" or arg.lower() == "--version":print(f"version: {version}"); exit(0)
         elif arg.lower() == "-alp" or arg.lower() == "--additional_lots_project":additional_lots_project=True
         elif arg.lower() == "-a" or arg.lower() == "--all":all_sources=True
+        elif arg.lower() == "-nc" or arg.lower() == "--no_cache":settings["http_cache"]=None
+        elif arg.lower() == "-fr" or arg.lower() == "--full_rebuild":settings["parse_cache"]=None
+        elif arg.lower() == "-nj" or arg.lower() == "--no_journal":settings["journal"]=None
+        elif arg.lower() == "-s" or arg.lower() == "--streaming":settings["streaming"]=True
+        elif arg.lower() == "-ni" or arg.lower() == "--no_index":settings["index"]=None
+        elif arg.lower() == "-nm" or arg.lower() == "--no_merge":settings["merge"]=None
+        elif arg.lower() == "-nh" or arg.lower() == "--no_hash_index":settings["hash_index"]=False
+        elif arg.lower() == "-d" or arg.lower() == "--delta":settings["delta"]=".cache/delta"
+        elif arg.lower() == "-mb" or arg.lower() == "--markdown_body":settings["markdown_body"]=True
+        elif arg.lower() == "-dm" or arg.lower() == "--daemon":settings["daemon"]=True
+        elif arg.lower() == "-bd" or arg.lower() == "--bind":settings["bind"]=sys.argv[int(i+1)] if i+1 < len(sys.argv) else settings["bind"]
         elif arg.lower() == "-g" or arg.lower() == "--get_specific":
             selected_sources = str(sys.argv[int(i+1)]).split(",")
             for i in selected_sources:
                 if i not in valid_sources:
                     print(f"\n \033[0;31mERROR | Unknown selected source: {i} \033[0m")
                     exit(0)
+        elif arg.lower() == "-pe" or arg.lower() == "--parse_engine":
+            settings["parse_engine"] = sys.argv[int(i+1)] if i+1 < len(sys.argv) else ""
+            if settings["parse_engine"] not in ["serial", "parallel"]:
+                print(f"\n \033[0;31mERROR | Unknown parse engine: {settings['parse_engine']} \033[0m")
+                exit(0)
+        elif arg.lower() == "-f" or arg.lower() == "--format":
+            settings["formats"] = [j.strip().lower() for j in sys.argv[int(i+1)].split(",")] if i+1 < len(sys.argv) else [""]
+            for j in settings["formats"]:
+                if j not in EXPORT_FORMATS:
+                    print(f"\n \033[0;31mERROR | Unknown export format: {j} \033[0m")
+                    exit(0)
+            if "parquet" in settings["formats"]:
+                try: import pyarrow
+                except ImportError:
+                    print(f"\n \033[0;31mERROR | Parquet export needs pyarrow: pip install pyarrow \033[0m")
+                    exit(0)
+        elif arg.lower() in ["-m", "--metrics", "-p", "--profile", "-sn", "--snapshot", "-fs", "--from_snapshot", "--from-snapshot"]:
+            if i+1 >= len(sys.argv):
+                print(f"\n \033[0;31mERROR | {arg} expects a path \033[0m")
+                exit(0)
+            key = {"-m": "metrics", "--metrics": "metrics", "-p": "profile", "--profile": "profile", "-sn": "snapshot", "--snapshot": "snapshot"}.get(arg.lower(), "from_snapshot")
+            settings[key] = sys.argv[int(i+1)]
+        elif arg.lower() in ["-w", "--workers", "-t", "--timeout", "-cr", "--crawl_rate", "-ch", "--crawl_per_host", "-iv", "--interval", "-pt", "--port"]:
+            try:
+                if arg.lower() in ["-w", "--workers"]: settings["workers"] = int(sys.argv[int(i+1)])
+                elif arg.lower() in ["-iv", "--interval"]: settings["interval"] = float(sys.argv[int(i+1)])
+                elif arg.lower() in ["-pt", "--port"]: settings["port"] = int(sys.argv[int(i+1)])
+                elif arg.lower() in ["-t", "--timeout"]: settings["timeout"] = float(sys.argv[int(i+1)])
+                elif arg.lower() in ["-cr", "--crawl_rate"]: settings["crawl_rate"] = float(sys.argv[int(i+1)])
+                else: settings["crawl_per_host"] = int(sys.argv[int(i+1)])
+            except (IndexError, ValueError):
+                print(f"\n \033[0;31mERROR | {arg} expects a number \033[0m")
+                exit(0)
 
         elif len(sys.argv) < 2: print(f"{helpmenu}\n\n \033[0;31m WARNING | Specify arguments \033[0m \n"); exit(0)
 
 
 if __name__ == "__main__":
+    started = time.time()
+    if len(sys.argv) > 1 and sys.argv[1] == "query":
+        HandleQueryArgs()
+        exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == "match":
+        HandleMatchArgs()
+        exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == "lookup-hash":
+        HandleLookupHashArgs()
+        exit(0)
     HandleSysArgs()
 
-    # Check connectivity before starting
-    print(" \033[1;90m[\033[1;96m~\033[1;90m]\033[0m Checking network connectivity...")
-    if not check_connectivity():
-        print(" \033[1;90m[\033[1;31mWARNING\033[1;90m]\033[0m Network connectivity check failed. Some sources may not work properly.")
-        print(" \033[1;90m[\033[1;33mINFO\033[1;90m]\033[0m Continuing anyway - individual requests will handle their own errors gracefully.")
-    else:
-        print(" \033[1;90m[\033[1;32m+\033[1;90m]\033[0m Network connectivity confirmed.")
-    print()
-
-    sources = {
-        "bootloaders": lambda: GetBootloaders("export/bootloaders.csv"),
-        "gtfobins": lambda: GetGTFOBins("export/gtfobins.csv"),
-        "hijacklibs": lambda: GetHijackLibs("export/hijacklibs.csv"),
-        "lolapps": lambda: GetLOLApps("export/lolapps.csv"),
-        "lolc2": lambda: GetLOLC2("export/lolc2.csv"),
-        "loflcab": lambda: GetLOFLCAB("export/loflcab.csv"),
-        "lolad": lambda: GetLOLAD("export/lolad.csv"),
-        "lolbas": lambda: GetLOLBAS("export/lolbas.csv"),
-        "loldrivers": lambda: GetLOLDrivers("export/loldrivers.csv"),
-        "lolrmm": lambda: GetLOLRMM("export/lolrmm.csv"),
-        "lottunnels": lambda: GetLOTTunnels("export/lottunnels.csv"),
-        "lolcerts": lambda: GetLOLCerts(["export/lolcerts_malicious.csv", "export/lolcerts_leaked.csv"]),
-        "lolesxi": lambda: GetLOLESXi("export/lolesxi.csv"),
-        "lots_project": lambda: GetLotsProject("export/lots_project.csv"),
-        "lots_project_additional": lambda: GetLotsProject("export/lots_project_additional.csv", True),
-        "loobins": lambda: GetLooBins("export/loobins.csv"),
-        "lotwebhooks": lambda: GetLotWebhooks("export/lotwebhooks.csv"),
-        "wadcoms": lambda: GetWADComs("export/wadcoms.csv"),
-    }
+    sources = dict(SOURCES)
 
     if not os.path.exists("export"): os.mkdir("export")
 
+    results = {}
+    run = {}
     if len(selected_sources)>0:
         if additional_lots_project and "lots_project" in selected_sources:
             selected_sources.pop(selected_sources.index("lots_project"))
@@ -684,10 +3541,51 @@ if __name__ == "__main__":
             print(f"\n \033[0;31mWARNING | You cannot fetch 'additional_lots_project': add -alp to fetch it\n\033[0m")
             selected_sources.pop(selected_sources.index("lots_project_additional"))
             if not "lots_project" in selected_sources: selected_sources.append("lots_project")
-        for i in selected_sources: print(f" \033[1;90m[\033[1;32mDONE\033[1;90m]\033[0m {i}") if sources[i]() else print(f" \033[1;90m[\033[1;31mFAILED\033[1;90m]\033[0m {i}")
+        run = {i: sources[i] for i in selected_sources}
     elif sources:
         if additional_lots_project: del sources["lots_project"]
         elif not additional_lots_project: del sources["lots_project_additional"]
-        for i in sources: print(f" \033[1;90m[\033[1;32mDONE\033[1;90m]\033[0m {i}") if sources[i]() else print(f" \033[1;90m[\033[1;31mFAILED\033[1;90m]\033[0m {i}")
+        run = sources
     else:
         HandleSysArgs(True)
+
+    if settings["from_snapshot"]:
+        try:
+            bundle = SnapshotSource()
+        except (OSError, ValueError) as e:
+            print(f"\n \033[0;31mERROR | Cannot open snapshot: {e} \033[0m")
+            exit(0)
+        if not selected_sources: run = {name: source for name, source in run.items() if name in bundle.sources}
+        print(f" \033[1;90m[\033[1;33mINFO\033[1;90m]\033[0m Rebuilding {', '.join(run) or 'nothing'} from snapshot of {bundle.manifest['created']}")
+    if settings["daemon"]:
+        RunDaemon(run, settings["bind"], settings["port"])
+        sys.stdout.flush()
+        os._exit(0)  # refreshes still running in background are not waited for
+    if settings["snapshot"]: snapshot_writer = SnapshotWriter(settings["snapshot"])
+
+    if run:
+        # Hosts are checked next to the sources instead of before them, warm connections are reused by the sources
+        if not settings["from_snapshot"]: StartHealthCheck(list(run))
+        try:
+            results = RunSources(run, settings["workers"], settings["timeout"])
+        except BaseException:
+            if snapshot_writer: snapshot_writer.abort()
+            raise
+    if snapshot_writer: FinishSnapshot(snapshot_writer, results)
+
+    if settings["index"] and any(results.values()):
+        UpdateIndex(settings["index"], {name: list(source_metrics[name].get("outputs", {})) for name, ok in results.items() if ok})
+    if settings["merge"] and any(results.values()):
+        MergeEntities(settings["merge"], os.path.dirname(settings["merge"]) or ".")
+
+    if settings["metrics"] and len(results): WriteMetrics(settings["metrics"], started)
+
+    hits = sum(i.get("cache_hits", 0) for i in source_metrics.values())
+    misses = sum(i.get("cache_misses", 0) for i in source_metrics.values())
+    if hits or misses:
+        print(f" \033[1;90m[\033[1;33mINFO\033[1;90m]\033[0m HTTP cache: {hits} hits (not modified), {misses} misses (downloaded)")
+
+    # Source processes were joined by RunSources, only timed out thread sources can still be blocked, they cannot publish anymore
+    if stuck_sources:
+        sys.stdout.flush()
+        os._exit(0)
@@ -0,0 +1,1005 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import contextlib
+import subprocess
+import tracemalloc
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import LotCSV
+
+class StandIn:
+    """
+    Local HTTP stand-in for remote sources. Serves {path: (body, content_type)} with optional per request latency.
+    Responses carry ETag and answer If-None-Match with 304, so warm runs exercise the conditional GET cache.
+    """
+    def __init__(self, pages: dict[str, tuple[bytes, str]], latency: float = 0.0) -> None:
+        pages_ = pages
+        latency_ = latency
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                if latency_: time.sleep(latency_)
+                if self.path not in pages_:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body, content_type = pages_[self.path]
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "StandIn":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+@contextlib.contextmanager
+def Silenced():
+    """
+    Sends stdout and stderr of this process and its children (git) to devnull.
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = os.dup(1), os.dup(2)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(saved[0], 1)
+        os.dup2(saved[1], 2)
+        for fd in (devnull, *saved):
+            os.close(fd)
+
+def Measure(func, *args, **kwargs) -> tuple[float, object]:
+    """
+    Runs function with its console output suppressed and returns (seconds, result).
+    """
+    with Silenced():
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        return time.perf_counter() - start, result
+
+@contextlib.contextmanager
+def Settings(**overrides):
+    """
+    Temporarily overrides LotCSV settings and source URLs (urls=...).
+    """
+    defaults, urls = dict(LotCSV.settings), dict(LotCSV.SOURCE_URLS)
+    LotCSV.SOURCE_URLS.update(overrides.pop("urls", {}))
+    LotCSV.settings.update(overrides)
+    try:
+        yield
+    finally:
+        LotCSV.settings.clear()
+        LotCSV.settings.update(defaults)
+        LotCSV.SOURCE_URLS.clear()
+        LotCSV.SOURCE_URLS.update(urls)
+
+def Scaled(count: int, scale: float) -> int:
+    return max(1, int(count * scale))
+
+def LotsProjectPages(rows: int, prefix: str = "") -> dict[str, tuple[bytes, str]]:
+    """
+    Fake lots-project.com index table and detail pages, served under prefix.
+    """
+    table = ['<table><tr><th>Website</th><th>Tags</th><th>Service Provider</th></tr>']
+    pages = {}
+    for i in range(rows):
+        table.append(f'<tr><td><a href="/site/{i}">site{i}.example.com</a></td><td><div>Phishing</div><div>Download</div></td><td>Provider {i}</td></tr>')
+        detail = (
+            '<html><body>'
+            '<div class="detail-container"><div class="title">Tags</div><div class="content">Phishing</div></div>'
+            f'<div class="detail-container"><div class="title">Phishing</div><div class="content">Phishing page {i}</div></div>'
+            f'<div class="detail-container"><div class="title">Download</div><div class="content">Download payload {i}</div></div>'
+            f'<div class="detail-container"><div class="title">Sample</div><div class="content"><a class="link" href="#">https://site{i}.example.com/x</a></div></div>'
+            '</body></html>'
+        )
+        pages[f"{prefix}/site/{i}"] = (detail.encode(), "text/html")
+    table.append("</table>")
+    pages[f"{prefix}/"] = ("<html><body>" + "".join(table) + "</body></html>").encode(), "text/html"
+    return pages
+
+def BenchLotsProjectCrawl(scale: float = 1.0, latency: float = 0.02) -> dict[str, float]:
+    """
+    GetLotsProject(additional_info=True) against local stand-in, one request at a time vs pooled crawler.
+    """
+    rows = Scaled(200, scale)
+    results = {}
+    with StandIn(LotsProjectPages(rows), latency) as server, tempfile.TemporaryDirectory() as tmp:
+        for label, per_host in [("serial", 1), ("crawler", 8)]:
+            with Settings(crawl_per_host=per_host, crawl_rate=1000.0, http_cache=None, journal=None):
+                seconds, ok = Measure(LotCSV.GetLotsProject, os.path.join(tmp, f"{label}.csv"), True, server.url)
+            results[f"{label}_seconds"] = seconds
+            print(f"lots_project_crawl  {label:<10} {rows} pages  {seconds:8.3f}s  ok={ok}")
+    return results
+
+def BenchCrawlJournal(scale: float = 1.0, latency: float = 0.02, flaky: float = 0.2) -> dict[str, float]:
+    """
+    GetLotsProject(additional_info=True) on flaky stand-in: first run loses `flaky` share of detail pages, second run
+    after the host recovered crawls everything again (no journal) vs only the failed pages (journal).
+    Output of resumed run must be same as of clean crawl.
+    """
+    rows = Scaled(500, scale)
+    results = {}
+    pages = LotsProjectPages(rows)
+    lost = {path: pages.pop(path) for path in list(pages)[:int(rows * flaky)]}
+    with StandIn(pages, latency) as server, tempfile.TemporaryDirectory() as tmp:
+        outputs = {}
+        for label in ["full", "journal"]:
+            journal = os.path.join(tmp, "journal") if label == "journal" else None
+            with Settings(crawl_per_host=8, crawl_rate=1000.0, crawl_retries=0, http_cache=None, journal=journal):
+                output = os.path.join(tmp, f"{label}.csv")
+                with Silenced():
+                    results[f"{label}_flaky_seconds"], _ = Measure(LotCSV.GetLotsProject, output, True, server.url)
+                pages.update(lost)
+                with Silenced():
+                    results[f"{label}_seconds"], ok = Measure(LotCSV.GetLotsProject, output, True, server.url)
+                for path in lost: del pages[path]
+            with open(output, "rb") as f: outputs[label] = f.read()
+            print(f"crawl_journal       {label:<10} {rows} pages, {len(lost)} lost  first {results[f'{label}_flaky_seconds']:8.3f}s  "
+                  f"after recovery {results[f'{label}_seconds']:8.3f}s  ok={ok}")
+        print(f"crawl_journal       identical output: {outputs['full'] == outputs['journal']}  journal left: {os.path.exists(os.path.join(tmp, 'journal', 'lots_project_additional.ndjson'))}")
+    return results
+
+def WriteYamlCorpus(directory: str, count: int, prefix: str = "Binary") -> list[str]:
+    """
+    Writes LOLBAS-style YAML files and returns their paths.
+    """
+    os.makedirs(directory, exist_ok=True)
+    files = []
+    for i in range(count):
+        path = os.path.join(directory, f"{prefix}{i}.yml")
+        with open(path, "w") as f:
+            f.write(
+                f"---\nName: {prefix}{i}.exe\nDescription: Synthetic binary number {i}\nAuthor: Bench\nCreated: 2021-01-01\n"
+                "Commands:\n"
+                + "".join(f"  - Command: binary{i}.exe /run {j} payload.dll\n    Description: Run variant {j}\n    Usecase: Execute code\n"
+                          f"    Category: {['Execute', 'Download', 'AWL Bypass'][j % 3]}\n    Privileges: User\n    MitreID: T1218\n"
+                          "    OperatingSystem: Windows 10, Windows 11\n" for j in range(4))
+                + f"Full_Path:\n  - Path: C:\\Windows\\System32\\binary{i}.exe\n  - Path: C:\\Windows\\SysWOW64\\binary{i}.exe\n"
+                f"Detection:\n  - Sigma: https://example.com/sigma/{i}.yml\n  - IOC: binary{i}.exe spawned by Office\n"
+            )
+        files.append(path)
+    return files
+
+def WriteMarkdownCorpus(directory: str, count: int, domains: bool = False, body: int = 0) -> list[str]:
+    """
+    Writes GTFOBins-style markdown files consisting of YAML front matter. With domains, LOTTunnels-style
+    Detection Domain lists are included, body adds given number of markdown paragraphs after the front matter.
+    """
+    os.makedirs(directory, exist_ok=True)
+    files = []
+    for i in range(count):
+        path = os.path.join(directory, f"binary{i}.md")
+        with open(path, "w") as f:
+            f.write(
+                f"---\nName: binary{i}\nDescription: Synthetic binary number {i}\nfunctions:\n"
+                + "".join(f"  {function}:\n    - description: {function} via binary{i}\n      code: binary{i} --{function} *payload\n"
+                          for function in ["shell", "file-read", "sudo"])
+                + (f"Detection:\n  - Domain: tunnel{i}.example.com\n  - Domain: '*.tunnel{i}.example.net'\n" if domains else "")
+                + "---\n"
+                + "".join(f"\nbinary{i} can be abused in scenario {j}, see references for details\nand further notes on detection.\n" for j in range(body))
+            )
+        files.append(path)
+    return files
+
+def SyntheticCsv(rows: int) -> bytes:
+    """
+    LOLDrivers-style CSV with quoted fields, embedded commas and hashes.
+    """
+    lines = ['"Id","Tags","Category","Commands","KnownVulnerableSamples_MD5","KnownVulnerableSamples_SHA256","Verified","Author"']
+    for i in range(rows):
+        lines.append(f'"{i:08x}-0000-4000-8000-000000000000","driver{i}.sys, extra","vulnerable driver","sc.exe create driver{i} binPath=C:\\windows\\temp\\driver{i}.sys type=kernel",'
+                     f'"{i:032x}","{i:064x}","TRUE","Author {i % 50}"')
+    return ("\n".join(lines) + "\n").encode()
+
+def HtmlTable(header: list[str] | None, rows: list[list[str]]) -> bytes:
+    """
+    LOLAD/LOTWebhooks-style page with single table.
+    """
+    html = ["<html><body><table>"]
+    if header: html.append("<tr>" + "".join(f"<th>{i}</th>" for i in header) + "</tr>")
+    else: html.append("<tr><td>header</td></tr>")
+    html += ["<tr>" + "".join(f"<td>{i}</td>" for i in row) + "</tr>" for row in rows]
+    html.append("</table></body></html>")
+    return "".join(html).encode()
+
+def NoisyPage(body: str, links: int) -> str:
+    """
+    Wraps body into page with head, inline script and style, navigation and footer, like real project sites have around tables.
+    """
+    nav = "".join(f'<li class="nav-item"><a href="/page/{i}">Page <b>{i}</b> &amp; more</a></li>' for i in range(links))
+    script = "<script>" + "var data = [" + ",".join(f'{{"id": {i}, "html": "<tr><td>{i}</td></tr>"}}' for i in range(links)) + "];</script>"
+    return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>Fixture</title><style>td {{ padding: 2px }}</style>{script}</head>'
+            f'<body><nav><ul>{nav}</ul></nav><main>{body}</main><footer><ul>{nav}</ul><p>Footer<br>text</p></footer></body></html>')
+
+def CommitRepository(work: str, remote: str) -> None:
+    """
+    Commits work tree and publishes it as bare repository, which LotCSV then clones through file:// URL.
+    """
+    git = ["git", "-c", "user.name=bench", "-c", "user.email=bench@localhost", "-c", "init.defaultBranch=main"]
+    subprocess.run(git + ["init", "-q", work], check=True)
+    subprocess.run(git + ["-C", work, "add", "-A"], check=True)
+    subprocess.run(git + ["-C", work, "commit", "-q", "-m", "corpus"], check=True)
+    subprocess.run(git + ["clone", "-q", "--bare", work, remote], check=True)
+    subprocess.run(git + ["-C", remote, "config", "uploadpack.allowFilter", "true"], check=True)
+
+def BuildSourceCorpus(root: str, scale: float, prefix: str) -> tuple[dict[str, str], dict[str, tuple[bytes, str]]]:
+    """
+    Generates synthetic corpus of every source under root. Git sources become bare repositories in root/remotes,
+    HTTP sources are returned as stand-in pages. Returns (SOURCE_URLS overrides, pages), URLs of HTTP sources
+    are relative to stand-in and start with prefix.
+    """
+    urls = {}
+    work = os.path.join(root, "work")
+    remotes = os.path.join(root, "remotes")
+    yaml_files = Scaled(1000, scale)
+    markdown_files = Scaled(400, scale)
+
+    def repository(name: str, directory: str, build) -> None:
+        build(os.path.join(work, directory))
+        CommitRepository(os.path.join(work, directory), os.path.join(remotes, directory))
+        urls[name] = "file://" + os.path.join(remotes, directory)
+
+    repository("lolbas", "LOLBAS", lambda path: (WriteYamlCorpus(os.path.join(path, "yml", "OSBinaries"), yaml_files),
+                                                 WriteYamlCorpus(os.path.join(path, "yml", "HonorableMentions"), 10)))
+    repository("hijacklibs", "HijackLibs", lambda path: WriteYamlCorpus(os.path.join(path, "yml", "microsoft"), yaml_files, "Library"))
+    repository("loflcab", "LOFLCAB", lambda path: WriteYamlCorpus(os.path.join(path, "yml"), Scaled(200, scale), "Cmdlet"))
+    repository("loobins", "LOOBins", lambda path: WriteYamlCorpus(os.path.join(path, "LOOBins"), Scaled(200, scale), "Loobin"))
+    repository("lolapps", "LOLAPPS", lambda path: WriteYamlCorpus(os.path.join(path, "yml", "3rd_party"), Scaled(300, scale), "App"))
+    repository("lolcerts", "lolcerts", lambda path: (WriteYamlCorpus(os.path.join(path, "malicious"), Scaled(300, scale), "Cert"),
+                                                     WriteYamlCorpus(os.path.join(path, "leaked"), Scaled(300, scale), "Cert")))
+    repository("gtfobins", "GTFOBins.github.io", lambda path: WriteMarkdownCorpus(os.path.join(path, "_gtfobins"), markdown_files))
+    repository("lottunnels", "LOTTunnels.github.io", lambda path: WriteMarkdownCorpus(os.path.join(path, "_lottunnels", "Binaries"), markdown_files, True))
+    repository("lolesxi", "LOLESXi", lambda path: WriteMarkdownCorpus(os.path.join(path, "_lolesxi", "Binaries"), markdown_files))
+    repository("wadcoms", "WADComs.github.io", lambda path: WriteMarkdownCorpus(os.path.join(path, "_wadcoms"), markdown_files))
+
+    def lolc2(path: str) -> None:
+        os.makedirs(os.path.join(path, "descriptions"))
+        data = {}
+        for i in range(Scaled(200, scale)):
+            with open(os.path.join(path, "descriptions", f"c2{i}.md"), "w") as f:
+                f.write(f"### C2 {i}\n![logo](logo.png)\nSynthetic command and control framework number {i}\n")
+            data[f"C2 {i}"] = {"descriptionUrl": f"descriptions/c2{i}.md", "github": f"https://example.com/c2/{i}",
+                               "c2_feat": {"protocols": ["https", "dns"], "os": ["windows", "linux"]}}
+        with open(os.path.join(path, "c2_data.json"), "w") as f:
+            json.dump(data, f)
+    repository("lolc2", "lolc2.github.io", lolc2)
+
+    rows = Scaled(100000, scale)
+    pages = {
+        f"{prefix}/loldrivers.csv": (SyntheticCsv(rows), "text/csv; charset=utf-8"),
+        f"{prefix}/bootloaders.csv": (SyntheticCsv(Scaled(20000, scale)), "text/csv; charset=utf-8"),
+        f"{prefix}/lolrmm.csv": (SyntheticCsv(Scaled(20000, scale)), "text/csv; charset=utf-8"),
+        f"{prefix}/lolad/": (HtmlTable(["Attack Name", "Command", "Description", "Reference"],
+                                       [[f"Attack {i}", f"Get-ADUser -Filter {i}", f"Enumerates object {i}", f'<a href="https://example.com/{i}">link</a>']
+                                        for i in range(Scaled(5000, scale))]), "text/html"),
+        f"{prefix}/lotwebhooks/": (HtmlTable(None, [[f"Hook {i}", f"https://hooks{i}.example.com/", "Chat", f"https://example.com/ref/{i}"]
+                                                    for i in range(Scaled(5000, scale))]), "text/html"),
+    }
+    pages.update(LotsProjectPages(Scaled(200, scale), f"{prefix}/lots"))
+    urls.update({"loldrivers": f"{prefix}/loldrivers.csv", "bootloaders": f"{prefix}/bootloaders.csv", "lolrmm": f"{prefix}/lolrmm.csv",
+                 "lolad": f"{prefix}/lolad/", "lotwebhooks": f"{prefix}/lotwebhooks/", "lots_project": f"{prefix}/lots"})
+    return urls, pages
+
+def BenchSources(scale: float = 1.0, names: list[str] | None = None) -> dict[str, float]:
+    """
+    Every source end to end against synthetic corpus (local bare git repositories + HTTP stand-in). Cold run starts
+    from empty work directory (clone, full download, full parse), warm run repeats it with clones and caches in place.
+    Stage timings of both runs come from source metrics.
+    """
+    names = names or list(LotCSV.SOURCES)
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"sources             building corpus (scale {scale})")
+        with Silenced():
+            urls, pages = BuildSourceCorpus(tmp, scale, "")
+        with StandIn(pages) as server, Settings(crawl_rate=1000.0, crawl_per_host=8,
+                                                 urls={k: server.url + v if v.startswith("/") else v for k, v in urls.items()}):
+            os.makedirs(os.path.join(tmp, "run", "export"))
+            os.chdir(os.path.join(tmp, "run"))
+            try:
+                for name in names:
+                    for run in ["cold", "warm"]:
+                        _, ok = Measure(LotCSV.RunSources, {name: LotCSV.SOURCES[name]}, 1)
+                        metrics = LotCSV.source_metrics.get(name, {})
+                        results[f"{name}.{run}.seconds"] = metrics.get("seconds", 0.0)
+                        for stage, seconds in metrics.get("stages", {}).items():
+                            results[f"{name}.{run}.{stage}"] = seconds
+                        stages = "  ".join(f"{k} {v:.3f}s" for k, v in sorted(metrics.get("stages", {}).items(), key=lambda i: -i[1])[:3])
+                        print(f"sources             {name:<24} {run}  {metrics.get('seconds', 0.0):8.3f}s  ok={ok.get(name)}  {stages}")
+            finally:
+                os.chdir(cwd)
+    return results
+
+def LegacyTableRows(content: str) -> list[list[str]]:
+    """
+    Table rows as previous version read them: BeautifulSoup tree of whole page, every <tr> searched for cells.
+    """
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(content, "html.parser")
+    return [[cell.text.strip() for cell in row.find_all(["th", "td"])] for row in soup.find_all("tr")]
+
+def LegacyDetail(content: str) -> list[tuple[str, str]]:
+    """
+    Detail containers of lots-project page as previous version read them, get_text() computed for every condition tested.
+    """
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(content, "html.parser")
+    found = []
+    for i in soup.find_all("div", class_="detail-container"):
+        for title in ["Tags", "Phishing", "Command and Control", "Exfiltration", "Download", "Sample"]:
+            if title in i.get_text():
+                found.append((title, i.find("div", class_="content").get_text().strip()))
+                break
+    return found
+
+def TableRows(content: str, engine: str) -> list[list[str]]:
+    return [[cell.text.strip() for cell in row.descendants if cell.tag in ("th", "td")] for row in LotCSV.ExtractHtml(content, "tr", within="table", engine=engine)]
+
+def Detail(content: str, engine: str) -> list[tuple[str, str]]:
+    found = []
+    for i in LotCSV.ExtractHtml(content, "div", "detail-container", engine=engine):
+        text = i.text
+        for title in ["Tags", "Phishing", "Command and Control", "Exfiltration", "Download", "Sample"]:
+            if title in text:
+                found.append((title, i.find("div", "content").text.strip()))
+                break
+    return found
+
+def BenchHtmlTables(scale: float = 1.0) -> dict[str, float]:
+    """
+    Table rows of big LOLAD/LOTWebhooks-style pages and detail containers of lots-project pages, read from HTML fixtures
+    saved to disk: BeautifulSoup tree of whole page (previous version, when bs4 is installed) vs ExtractHtml with each engine.
+    """
+    rows = Scaled(20000, scale)
+    details = Scaled(500, scale)
+    engines = ["html.parser"] + (["lxml"] if LotCSV.HtmlEngine() == "lxml" else [])
+    try:
+        import bs4
+        engines.insert(0, "legacy")
+    except ImportError:
+        print("html_tables         bs4 is not installed, previous version is not measured")
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        table = HtmlTable(["Attack Name", "Command", "Description", "Reference"],
+                          [[f"Attack {i}", f"Get-ADUser -Filter 'Name -like \"{i}*\"'", f"Enumerates <i>object</i> {i} &amp; its members",
+                            f'<a href="https://example.com/{i}">link</a>'] for i in range(rows)]).decode()
+        with open(os.path.join(tmp, "table.html"), "w") as f: f.write(NoisyPage(table, 500))
+        for i in range(details):
+            page = LotsProjectPages(1)["/site/0"][0].decode().replace("page 0", f"page {i}")
+            with open(os.path.join(tmp, f"detail{i}.html"), "w") as f: f.write(NoisyPage(page, 100))
+
+        with open(os.path.join(tmp, "table.html")) as f: content = f.read()
+        pages = []
+        for i in range(details):
+            with open(os.path.join(tmp, f"detail{i}.html")) as f: pages.append(f.read())
+
+        outputs = {}
+        for engine in engines:
+            if engine == "legacy":
+                seconds, outputs[f"table {engine}"] = Measure(LegacyTableRows, content)
+                detail_seconds, outputs[f"detail {engine}"] = Measure(lambda: [LegacyDetail(page) for page in pages])
+            else:
+                seconds, outputs[f"table {engine}"] = Measure(TableRows, content, engine)
+                detail_seconds, outputs[f"detail {engine}"] = Measure(lambda: [Detail(page, engine) for page in pages])
+            results[f"table_{engine}_seconds"] = seconds
+            results[f"detail_{engine}_seconds"] = detail_seconds
+            print(f"html_tables         {engine:<12} table {rows} rows {len(content) / 2**20:5.1f} MiB  {seconds:8.3f}s   detail {details} pages  {detail_seconds:8.3f}s")
+        for kind in ["table", "detail"]:
+            print(f"html_tables         identical {kind}: {len({repr(v) for k, v in outputs.items() if k.startswith(kind)}) == 1}")
+    return results
+
+def BenchSnapshot(scale: float = 1.0) -> dict[str, float]:
+    """
+    Every source run live against synthetic corpus while snapshot bundle is written, then rebuilt from the bundle with the
+    stand-in server stopped (cold: trees checked out from bundle, warm: checkouts and parse caches in place).
+    Exports of live run and rebuild must be identical.
+    """
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"snapshot            building corpus (scale {scale})")
+        with Silenced():
+            urls, pages = BuildSourceCorpus(tmp, scale, "")
+        bundle = os.path.join(tmp, "bundle.lotsnap")
+        for run in ["live", "rebuild"]:
+            os.makedirs(os.path.join(tmp, run, "export"))
+        try:
+            server = StandIn(pages)
+            urls = {k: server.url + v if v.startswith("/") else v for k, v in urls.items()}
+            with server, Settings(crawl_rate=1000.0, crawl_per_host=8, index=None, urls=urls):
+                os.chdir(os.path.join(tmp, "live"))
+                LotCSV.snapshot_writer = LotCSV.SnapshotWriter(bundle)
+                try:
+                    results["live_seconds"], ok = Measure(LotCSV.RunSources, dict(LotCSV.SOURCES), 4)
+                    results["write_seconds"], _ = Measure(LotCSV.FinishSnapshot, LotCSV.snapshot_writer, ok)
+                finally:
+                    LotCSV.snapshot_writer = None
+                print(f"snapshot            live         {results['live_seconds']:8.3f}s  ok={sum(ok.values())}/{len(ok)}  bundle written in {results['write_seconds']:.3f}s, "
+                      f"{os.path.getsize(bundle) / 2**20:.1f} MiB")
+            # Same URLs as the live run, but the stand-in is stopped, everything has to come from the bundle
+            with Settings(index=None, from_snapshot=bundle, urls=urls):
+                os.chdir(os.path.join(tmp, "rebuild"))
+                for run in ["cold", "warm"]:
+                    results[f"{run}_seconds"], ok = Measure(LotCSV.RunSources, dict(LotCSV.SOURCES), 4)
+                    print(f"snapshot            rebuild {run:<4} {results[f'{run}_seconds']:8.3f}s  ok={sum(ok.values())}/{len(ok)}")
+        finally:
+            os.chdir(cwd)
+        exports = sorted(os.listdir(os.path.join(tmp, "live", "export")))
+        same = all(open(os.path.join(tmp, "live", "export", i), "rb").read() == open(os.path.join(tmp, "rebuild", "export", i), "rb").read() for i in exports)
+        print(f"snapshot            identical exports: {same} ({len(exports)} files)")
+    return results
+
+def BenchYamlEngines(scale: float = 1.0) -> dict[str, float]:
+    """
+    ReadFiles with serial and parallel YAML engine on synthetic LOLBAS-style corpus.
+    """
+    count = Scaled(2000, scale)
+    with tempfile.TemporaryDirectory() as tmp:
+        files = WriteYamlCorpus(tmp, count)
+        results = {}
+        outputs = {}
+        for engine in ["serial", "parallel"]:
+            results[f"{engine}_seconds"], (keys, values) = Measure(LotCSV.ReadFiles, files, engine)
+            outputs[engine] = keys, list(values)
+            print(f"yaml_engines        {engine:<10} {count} files  {results[f'{engine}_seconds']:8.3f}s  loader={LotCSV.GetYamlLoader().__name__}")
+        print(f"yaml_engines        identical output: {outputs['serial'] == outputs['parallel']}")
+    return results
+
+def LegacyLoadMarkdown(file: str) -> tuple[list, str | None]:
+    """
+    Markdown loading of previous version: whole file is read, alias fix regex runs over all of it and everything goes through YAML.
+    """
+    import re
+    import yaml
+    with open(file, "r", errors="ignore") as f:
+        content = f.read()
+    content_raw = content.splitlines()
+    if content_raw and not content_raw[-1].strip():
+        content_raw.pop()
+    content = re.sub(r':\s+\*([^\s]+)', r': "\1"', "\n".join(content_raw))
+    try:
+        return [doc for doc in yaml.load_all(content, Loader=LotCSV.GetYamlLoader()) if doc is not None], None
+    except yaml.YAMLError as e:
+        return [], f"Error parsing YAML file {file}: {e}"
+
+def BenchFrontMatter(scale: float = 1.0) -> dict[str, float]:
+    """
+    Loading of GTFOBins-style markdown files with bodies: previous whole file loading vs front matter only, front matters must be equal.
+    """
+    count = Scaled(2000, scale)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        files = WriteMarkdownCorpus(tmp, count, True, 40)
+        outputs = {}
+        for label, loader in [("legacy", LegacyLoadMarkdown), ("front_matter", lambda file: LotCSV.LoadYamlFile(file, True))]:
+            results[f"{label}_seconds"], outputs[label] = Measure(lambda: [loader(file) for file in files])
+            print(f"front_matter        {label:<12} {count} files  {results[f'{label}_seconds']:8.3f}s")
+        # Body is plain paragraphs so previous version can load it at all, it comes out as extra string document per file
+        print(f"front_matter        identical front matter: {[i[0][:1] for i in outputs['legacy']] == [i[0] for i in outputs['front_matter']]}"
+              f"  bodies loaded as documents by legacy: {sum(len(i[0]) - 1 for i in outputs['legacy'])}")
+    return results
+
+def BenchRecordStore(scale: float = 1.0) -> dict[str, float]:
+    """
+    Memory retained by parsed synthetic LOLBAS-style corpus held as list of dicts vs RecordStore, and CSV write from both.
+    Repository rows go through ReadRepositoryFiles, cold (empty parse cache) and warm (every file cached).
+    """
+    count = Scaled(10000, scale)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        files = WriteYamlCorpus(os.path.join(tmp, "yml"), count)
+
+        def dicts() -> tuple[list[str], list[dict]]:
+            keys = {}
+            values = []
+            for _, file_keys, file_values in LotCSV.ParseFiles(files):
+                keys.update(dict.fromkeys(file_keys))
+                values.extend(file_values)
+            return list(keys), values
+
+        git = ["git", "-c", "user.name=bench", "-c", "user.email=bench@localhost"]
+        subprocess.run(git + ["init", "-q", os.path.join(tmp, "yml")], check=True)
+        subprocess.run(git + ["-C", os.path.join(tmp, "yml"), "add", "-A"], check=True)
+        subprocess.run(git + ["-C", os.path.join(tmp, "yml"), "commit", "-q", "-m", "corpus"], check=True)
+
+        def repository() -> tuple[list[str], LotCSV.RecordStore]:
+            with Settings(parse_cache=os.path.join(tmp, "parse"), streaming=False):
+                return LotCSV.ReadRepositoryFiles("bench", os.path.join(tmp, "yml"), files)
+
+        for label, reader in [("dicts", dicts), ("store", lambda: LotCSV.ReadFiles(files)), ("repo_cold", repository), ("repo_warm", repository)]:
+            tracemalloc.start()
+            seconds, (keys, values) = Measure(reader)
+            retained, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            write, _ = Measure(LotCSV.WriteExportCsv, os.path.join(tmp, f"{label}.csv"), values, keys)
+            results.update({f"{label}_retained_mib": retained / 2**20, f"{label}_peak_mib": peak / 2**20, f"{label}_write_seconds": write})
+            print(f"record_store        {label:<10} {count} files  retained {retained / 2**20:8.1f} MiB  peak {peak / 2**20:8.1f} MiB  parse {seconds:7.3f}s  write {write:7.3f}s")
+            del keys, values
+        with open(os.path.join(tmp, "dicts.csv"), "rb") as f: expected = f.read()
+        identical = []
+        for label in ["store", "repo_cold", "repo_warm"]:
+            with open(os.path.join(tmp, f"{label}.csv"), "rb") as f: identical.append(f.read() == expected)
+        print(f"record_store        identical output: {all(identical)}")
+    return results
+
+def LegacyFlatten(documents: list) -> tuple[list[str], list[dict]]:
+    """
+    Copy of the recursive_parse previously duplicated in ReadFiles/ReadMDFiles, kept as baseline.
+    """
+    keys = []
+    values = []
+
+    def recursive_parse(data: dict | list | str, collected_data: dict, parent_key: str = "") -> None:
+        if isinstance(data, dict):
+            for key, val in data.items():
+                new_key = f"{parent_key}_{key}" if parent_key else key
+                if new_key.strip() not in keys:
+                    keys.append(new_key.strip())
+                recursive_parse(val, collected_data, new_key.strip())
+        elif isinstance(data, list):
+            for item in data:
+                recursive_parse(item, collected_data, parent_key)
+        else:
+            if "{'" not in str(data) and "'}" not in str(data):
+                if parent_key in collected_data:
+                    if isinstance(collected_data[parent_key], list):
+                        collected_data[parent_key].append(data)
+                    else:
+                        collected_data[parent_key] = [collected_data[parent_key], data]
+                else:
+                    collected_data[parent_key] = data
+
+    for doc in documents:
+        collected_data = {}
+        recursive_parse(doc, collected_data)
+        values.append(collected_data)
+    return keys, values
+
+def NestedDocuments(count: int, depth: int = 4, width: int = 3, variety: int = 40) -> list[dict]:
+    """
+    Synthetic deeply nested documents. Deepest keys differ between documents, so the column set grows to width**depth * variety.
+    """
+    def node(i: int, level: int) -> dict | list | str:
+        if level == depth:
+            return [f"value {i} {j}" for j in range(2)]
+        suffix = f"_{i % variety}" if level == depth - 1 else ""
+        return {f"k{level}_{j}{suffix}": node(i, level + 1) for j in range(width)}
+    return [{"Name": f"doc{i}", "Body": node(i, 0)} for i in range(count)]
+
+def BenchFlatten(scale: float = 1.0) -> dict[str, float]:
+    """
+    Legacy recursive_parse vs shared Flattener on synthetic deeply nested corpus.
+    """
+    count = Scaled(2000, scale)
+    documents = NestedDocuments(count)
+    seconds_legacy, (keys_legacy, values_legacy) = Measure(LegacyFlatten, documents)
+
+    def flatten() -> tuple[list[str], list[dict]]:
+        flattener = LotCSV.Flattener()
+        values = [flattener.flatten(doc) for doc in documents]
+        return flattener.keys, values
+    seconds, (keys, values) = Measure(flatten)
+    print(f"flatten             legacy     {count} docs  {seconds_legacy:8.3f}s  {len(keys_legacy)} columns")
+    print(f"flatten             flattener  {count} docs  {seconds:8.3f}s  {len(keys)} columns  speedup {seconds_legacy / seconds:.1f}x  identical: {(keys, values) == (keys_legacy, values_legacy)}")
+    return {"legacy_seconds": seconds_legacy, "flattener_seconds": seconds}
+
+def BenchStreaming(scale: float = 1.0) -> dict[str, float]:
+    """
+    Peak traced memory of in-memory parse + CSV write vs streaming (RowSpool) mode on synthetic YAML corpus.
+    """
+    count = Scaled(4000, scale)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        files = WriteYamlCorpus(os.path.join(tmp, "yml"), count)
+        for label, reader in [("in-memory", LotCSV.ReadFiles), ("streaming", LotCSV.SpoolFiles)]:
+            def run() -> bool:
+                keys, values = reader(files)
+                return LotCSV.WriteExportCsv(os.path.join(tmp, f"{label}.csv"), values, keys)
+            tracemalloc.start()
+            seconds, _ = Measure(run)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results[f"{label}_seconds"], results[f"{label}_peak_mib"] = seconds, peak / 2**20
+            print(f"streaming           {label:<10} {count} files  {seconds:8.3f}s  peak {peak / 2**20:8.1f} MiB")
+        with open(os.path.join(tmp, "in-memory.csv"), "rb") as a, open(os.path.join(tmp, "streaming.csv"), "rb") as b:
+            print(f"streaming           identical output: {a.read() == b.read()}")
+    return results
+
+def LegacyStringifyCsv(content: str, output: str) -> bool:
+    """
+    Copy of the character by character StringifyExistingCsv, kept as baseline.
+    """
+    result = []
+    for line in content.splitlines():
+        row = []
+        value = ""
+        in_quotes = False
+        i = 0
+        while i < len(line):
+            char = line[i]
+            if char == '"' and (i == 0 or line[i - 1] != "\\"):
+                in_quotes = not in_quotes
+            elif char == "," and not in_quotes:
+                row.append(value.strip())
+                value = ""
+            else:
+                value += char
+            i += 1
+        row.append(value.strip())
+        result.append([str(cell) for cell in row])
+    with open(output, "w", encoding="utf-8", errors="ignore") as f:
+        for j, i in enumerate(result):
+            f.write('"' + '","'.join(i) + '","is_legit"' + "\n") if j == 0 else f.write('"' + '","'.join(i) + '","false"' + "\n")
+    return os.path.exists(output)
+
+def BenchCsvIngest(scale: float = 1.0) -> dict[str, float]:
+    """
+    Legacy safe_request + char by char CSV parse vs safe_stream + csv module, both against local stand-in.
+    """
+    rows = Scaled(100000, scale)
+    body = SyntheticCsv(rows)
+    results = {}
+    with StandIn({"/drivers.csv": (body, "text/csv; charset=utf-8")}) as server, tempfile.TemporaryDirectory() as tmp, Settings(http_cache=None):
+        url = server.url + "/drivers.csv"
+        seconds, _ = Measure(lambda: LegacyStringifyCsv(LotCSV.safe_request(url), os.path.join(tmp, "legacy.csv")))
+        results["legacy_seconds"] = seconds
+        print(f"csv_ingest          legacy     {rows} rows  {len(body) / 2**20:6.1f} MiB  {seconds:8.3f}s")
+
+        def stream() -> bool:
+            with LotCSV.safe_stream(url) as content:
+                return LotCSV.StringifyExistingCsv(content, os.path.join(tmp, "stream.csv"))
+        seconds, _ = Measure(stream)
+        results["streaming_seconds"] = seconds
+        print(f"csv_ingest          streaming  {rows} rows  {len(body) / 2**20:6.1f} MiB  {seconds:8.3f}s")
+    return results
+
+def LegacyWriteCsv(output: str, values: list[dict], keys: list[str]) -> bool:
+    """
+    Copy of the per-cell .replace chain and per-row f.write writer, kept as baseline.
+    """
+    def sanitize(val: list | tuple):
+        if isinstance(val, (list, tuple)):
+            val = "[" + "-|-".join(f"''{str(item)}''" for item in val) + "]"
+        else:
+            val = str(val)
+        val = val.replace('"', '""')
+        val = val.replace('\n', ' ').replace('\r', ' ')
+        return val.strip()
+    with open(output, "w", encoding="utf-8", errors="ignore") as f:
+        f.write('"' + '","'.join([k.strip() for k in keys]) + '","is_legit"' + '\n')
+        for value in values:
+            line_items = [sanitize(value.get(key, "")) for key in keys]
+            f.write('"' + '","'.join(line_items) + '","false"' + '\n')
+    return os.path.exists(output)
+
+def SyntheticTable(rows: int) -> tuple[list[str], list[dict]]:
+    keys = ["Name", "Description", "Commands_Command", "Commands_Category", "Commands_Privileges", "Full_Path_Path", "Detection_IOC"]
+    values = []
+    for i in range(rows):
+        values.append({
+            "Name": f"binary{i}.exe",
+            "Description": f'Binary "{i}" used for\nproxy execution',
+            "Commands_Command": [f"binary{i}.exe /run payload.dll", f"binary{i}.exe -x"],
+            "Commands_Category": "Execute",
+            "Commands_Privileges": "User",
+            "Full_Path_Path": f"C:\\Windows\\System32\\binary{i}.exe",
+        })
+    return keys, values
+
+def BenchCsvWrite(scale: float = 1.0) -> dict[str, float]:
+    """
+    Write throughput of legacy writer vs WriteExportCsv on synthetic million row table.
+    """
+    rows = Scaled(1000000, scale)
+    results = {}
+    keys, values = SyntheticTable(rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, writer in [("legacy", LegacyWriteCsv), ("engine", LotCSV.WriteExportCsv)]:
+            path = os.path.join(tmp, f"{label}.csv")
+            seconds, _ = Measure(writer, path, values, keys)
+            results[f"{label}_seconds"] = seconds
+            print(f"csv_write           {label:<10} {rows} rows  {seconds:8.3f}s  {rows / seconds:10.0f} rows/s  {os.path.getsize(path) / 2**20:7.1f} MiB")
+        with open(os.path.join(tmp, "legacy.csv"), "rb") as a, open(os.path.join(tmp, "engine.csv"), "rb") as b:
+            print(f"csv_write           identical output: {a.read() == b.read()}")
+    return results
+
+def SyntheticEvents(path: str, count: int, binaries: int, domains: int, hashes: int) -> None:
+    """
+    NDJSON process events, about 4% of them mention known binary, tunnel domain, webhook host or driver hash.
+    """
+    with open(path, "w") as f:
+        for i in range(count):
+            kind = i % 100
+            if kind == 0: command = f"C:\\\\Windows\\\\System32\\\\Binary{i % binaries}.exe /run"
+            elif kind == 1: command = f"connect a.tunnel{i % domains}.example.net:443"
+            elif kind == 2: command = f"load driver {i % hashes:064x}"
+            elif kind == 3: command = f"POST https://hooks{i % domains}.example.com/x"
+            else: command = f"C:\\\\Windows\\\\System32\\\\svchost.exe -k netsvcs -p user{i} host{i}.corp.local"
+            f.write(json.dumps({"ts": i, "host": "ws01", "process": command, "user": "bob"}) + "\n")
+
+def BenchMatch(scale: float = 1.0) -> dict[str, float]:
+    """
+    Match mode throughput over synthetic NDJSON event log, single process vs process pool over all cores.
+    """
+    events = Scaled(500000, scale)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        export = os.path.join(tmp, "export")
+        os.makedirs(export)
+        with Silenced():
+            LotCSV.WriteExportCsv(os.path.join(export, "lolbas.csv"), [{"Name": f"Binary{i}.exe"} for i in range(2000)], ["Name"])
+            LotCSV.WriteExportCsv(os.path.join(export, "lottunnels.csv"), [{"Name": f"t{i}", "Detection_Domain": [f"*.tunnel{i}.example.net"]} for i in range(2000)], ["Name", "Detection_Domain"])
+            LotCSV.WriteExportCsv(os.path.join(export, "lotwebhooks.csv"), [{"URL": f"https://hooks{i}.example.com/"} for i in range(2000)], ["URL"])
+            LotCSV.WriteExportCsv(os.path.join(export, "loldrivers.csv"), [{"KnownVulnerableSamples_SHA256": f"{i:064x}"} for i in range(20000)], ["KnownVulnerableSamples_SHA256"])
+            matcher = LotCSV.BuildMatcher(export)
+        log = os.path.join(tmp, "events.ndjson")
+        SyntheticEvents(log, events, 2000, 2000, 20000)
+        for workers in sorted({1, os.cpu_count() or 1}):
+            with open(os.devnull, "w") as out:
+                seconds, (count, hits) = Measure(LotCSV.MatchStreams, matcher, [log], out, workers)
+            results[f"workers_{workers}_seconds"] = seconds
+            print(f"match               {workers:>2} workers {count} events  {seconds:8.3f}s  {count / seconds:10.0f} events/s  {hits} with hits")
+    return results
+
+def BenchMerge(scale: float = 1.0) -> dict[str, float]:
+    """
+    MergeEntities over synthetic exports with overlapping binaries, domains and driver hashes, read from csv and from ndjson.
+    """
+    drivers = Scaled(20000, scale)
+    binaries = Scaled(2000, scale)
+    domains = Scaled(2000, scale)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        tables = {
+            "lolbas": ([{"Name": f"Binary{i}.exe", "Full_Path_Path": [f"C:\\Windows\\System32\\Binary{i}.exe"]} for i in range(binaries)], ["Name", "Full_Path_Path"]),
+            "hijacklibs": ([{"Name": f"binary{i}.exe" if i % 4 == 0 else f"library{i}.dll"} for i in range(binaries)], ["Name"]),
+            "gtfobins": ([{"Name": f"tool{i}"} for i in range(binaries)], ["Name"]),
+            "lottunnels_domain": ([{"Name": f"t{i}", "Domain": f"*.tunnel{i}.example{i % 50}.net"} for i in range(domains)], ["Name", "Domain"]),
+            "lolrmm": ([{"Name": f"rmm{i}", "Artifacts_Network_Domains": [f"relay{i}.example{i % 50}.net", f"api.rmm{i}.co.uk"]} for i in range(domains)], ["Name", "Artifacts_Network_Domains"]),
+            "lotwebhooks": ([{"URL": f"https://hooks.rmm{i}.co.uk/x", "Webhook Name": f"w{i}"} for i in range(domains)], ["Webhook Name", "URL"]),
+            "loldrivers": ([{"Id": f"driver{i}", **{f"KnownVulnerableSamples_{kind}": [f"{i * 3 + j:0{size}x}" for j in range(3)] for kind, size in [("MD5", 32), ("SHA1", 40), ("SHA256", 64)]}}
+                            for i in range(drivers)], ["Id", "KnownVulnerableSamples_MD5", "KnownVulnerableSamples_SHA1", "KnownVulnerableSamples_SHA256"]),
+            "bootloaders": ([{"Id": f"boot{i}", "KnownVulnerableSamples_SHA256": [f"{i * 30:064x}"]} for i in range(drivers // 10)], ["Id", "KnownVulnerableSamples_SHA256"]),
+        }
+        outputs = {}
+        for format in ["csv", "ndjson"]:
+            export = os.path.join(tmp, format)
+            os.makedirs(export)
+            with Silenced():
+                for name, (values, keys) in tables.items():
+                    LotCSV.WriteExport(os.path.join(export, name + ".csv"), values, keys, formats=[format])
+            output = os.path.join(tmp, f"merged_{format}.csv")
+            with Silenced():
+                seconds, ok = Measure(LotCSV.MergeEntities, output, export)
+            results[f"{format}_seconds"] = seconds
+            with open(output, "rb") as f: outputs[format] = f.read()
+            rows = outputs[format].count(b"\n") - 1
+            print(f"merge               {format:<10} {sum(len(i[0]) for i in tables.values())} records  {seconds:8.3f}s  {rows} entities  ok={ok}")
+        print(f"merge               identical output: {outputs['csv'] == outputs['ndjson']}")
+    return results
+
+def BenchHashIndex(scale: float = 1.0) -> dict[str, float]:
+    """
+    Hash indexes of synthetic LOLDrivers export: writing them, opening, single lookups in memory-mapped index (with and without
+    Bloom filter) and batch lookups, against searching the csv text for every hash.
+    """
+    import random
+    drivers = Scaled(20000, scale)
+    queries = Scaled(1000000, scale)
+    rng = random.Random(1)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        rows = [{"Id": f"driver{i}", **{f"KnownVulnerableSamples_{kind.upper()}": [rng.randbytes(size).hex() for _ in range(3)] for kind, size in LotCSV.HASH_TYPES.items()}}
+                for i in range(drivers)]
+        output = os.path.join(tmp, "loldrivers.csv")
+        with Silenced():
+            LotCSV.WriteExportCsv(output, rows, list(rows[0]))
+        known = [i for row in rows for i in row["KnownVulnerableSamples_SHA256"]]
+        # 1% of queries are known hashes, as when checking file hashes of a host
+        values = [known[rng.randrange(len(known))] if i % 100 == 0 else rng.randbytes(32).hex() for i in range(queries)]
+        with Settings(hash_index=True), Silenced():
+            results["write_seconds"], _ = Measure(LotCSV.WriteHashIndexes, output)
+        print(f"hash_index          write      {len(known) * 3} hashes  {results['write_seconds']:8.3f}s  "
+              f"{sum(os.path.getsize(os.path.join(tmp, i)) for i in os.listdir(tmp) if i.endswith('.idx')) / 2**20:.1f} MiB")
+        results["open_seconds"], _ = Measure(LotCSV.HashIndexes, tmp)
+        print(f"hash_index          open       {results['open_seconds'] * 1000:8.3f}ms")
+        found = {}
+        for label, bloom in [("single", False), ("single_bloom", True)]:
+            LotCSV.HashIndexes.cache_clear()
+            seconds, found[label] = Measure(lambda: sum(bool(LotCSV.LookupHash(i, tmp, bloom)) for i in values[:Scaled(200000, scale)]))
+            results[f"{label}_seconds"] = seconds
+            print(f"hash_index          {label:<12} {Scaled(200000, scale)} lookups  {seconds:8.3f}s  {Scaled(200000, scale) / seconds:10.0f} lookups/s  {found[label]} found")
+        LotCSV.HashIndexes.cache_clear()
+        results["batch_seconds"], found["batch"] = Measure(lambda: sum(bool(exports) for _, exports in LotCSV.LookupHashes(values, tmp)))
+        print(f"hash_index          batch      {queries} lookups  {results['batch_seconds']:8.3f}s  {queries / results['batch_seconds']:10.0f} lookups/s  {found['batch']} found")
+        with open(output, "r", encoding="utf-8") as f: text = f.read()
+        sample = values[:Scaled(200, scale)]
+        seconds, hits = Measure(lambda: sum(i in text for i in sample))
+        results["text_scan_seconds"] = seconds
+        print(f"hash_index          text scan  {len(sample)} lookups  {seconds:8.3f}s  {len(sample) / seconds:10.0f} lookups/s  {hits} found")
+    return results
+
+def BenchStartup(scale: float = 1.0) -> dict[str, float]:
+    """
+    Wall time of CLI entry point (-v, -h) and plain import in fresh interpreters, median of several runs. Bare interpreter
+    start is measured too, so the numbers can be read as overhead of LotCSV itself.
+    """
+    runs = max(3, Scaled(15, scale))
+    script = os.path.abspath(LotCSV.__file__)
+    heavy = ["requests", "bs4", "yaml", "multiprocessing"]
+    commands = {
+        "interpreter": [sys.executable, "-c", "pass"],
+        "import": [sys.executable, "-c", f"import sys, LotCSV; print(' '.join(m for m in {heavy!r} if m in sys.modules))"],
+        "version": [sys.executable, script, "-v"],
+        "help": [sys.executable, script, "-h"],
+    }
+    # Bytecode of imported module is cached by normal installs, make sure it is even with PYTHONDONTWRITEBYTECODE set
+    import py_compile
+    py_compile.compile(script, cfile=LotCSV.__cached__)
+    results = {}
+    for label, command in commands.items():
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            done = subprocess.run(command, cwd=os.path.dirname(script), capture_output=True, text=True)
+            timings.append(time.perf_counter() - start)
+        results[f"{label}_seconds"] = sorted(timings)[len(timings) // 2]
+        extra = f"  heavy modules loaded: {done.stdout.strip() or 'none'}" if label == "import" else ""
+        print(f"startup             {label:<12} {results[f'{label}_seconds'] * 1000:8.1f} ms (median of {runs}){extra}")
+    return results
+
+def BenchExportServer(scale: float = 1.0) -> dict[str, float]:
+    """
+    Polling of export served by daemon export server: full downloads vs revalidation with If-None-Match (304) vs gzip.
+    """
+    import urllib.request
+    rows = Scaled(100000, scale)
+    polls = 200
+    results = {}
+    keys, values = SyntheticTable(rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        with Silenced():
+            LotCSV.WriteExportCsv(os.path.join(tmp, "table.csv"), values, keys)
+        server = LotCSV.StartExportServer("127.0.0.1", 0, tmp, {}, threading.Lock())
+        url = f"http://127.0.0.1:{server.server_address[1]}/table.csv"
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, method="HEAD")) as response:
+                etag = response.headers["ETag"]
+            for label, headers in [("full", {}), ("gzip", {"Accept-Encoding": "gzip"}), ("conditional", {"If-None-Match": etag})]:
+                received = 0
+                start = time.perf_counter()
+                for _ in range(polls):
+                    try:
+                        with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as response:
+                            received += len(response.read())
+                    except urllib.error.HTTPError as e:
+                        if e.code != 304:
+                            raise
+                results[f"{label}_seconds"] = time.perf_counter() - start
+                print(f"export_server       {label:<12} {polls} polls  {results[f'{label}_seconds']:8.3f}s  {received / 2**20:9.1f} MiB received")
+        finally:
+            server.shutdown()
+            server.server_close()
+    return results
+
+BENCHMARKS = {
+    "flatten": BenchFlatten,
+    "streaming": BenchStreaming,
+    "record_store": BenchRecordStore,
+    "csv_ingest": BenchCsvIngest,
+    "csv_write": BenchCsvWrite,
+    "yaml_engines": BenchYamlEngines,
+    "front_matter": BenchFrontMatter,
+    "lots_project_crawl": BenchLotsProjectCrawl,
+    "crawl_journal": BenchCrawlJournal,
+    "html_tables": BenchHtmlTables,
+    "match": BenchMatch,
+    "merge": BenchMerge,
+    "hash_index": BenchHashIndex,
+    "sources": BenchSources,
+    "snapshot": BenchSnapshot,
+    "export_server": BenchExportServer,
+    "startup": BenchStartup,
+}
+
+def Revision() -> str:
+    """
+    Commit the benchmark runs against, "-dirty" is appended when work tree has local changes.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(["git", "-C", here, "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "-C", here, "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return commit + ("-dirty" if dirty else "")
+
+def Compare(results: dict, baseline: dict, threshold: float = 1.2, floor: float = 0.05) -> bool:
+    """
+    Prints ratio of every result present in both runs (all results are "lower is better"). Returns False when any
+    of them got slower than threshold times baseline. Baseline values under floor are too noisy and are skipped.
+    """
+    print(f"\ncompared to {baseline.get('commit', 'unknown')} (scale {baseline.get('scale')})")
+    ok = True
+    for bench, values in results.items():
+        for key, value in values.items():
+            base = baseline.get("results", {}).get(bench, {}).get(key)
+            if not base or base < floor:
+                continue
+            ratio = value / base
+            flag = ""
+            if ratio > threshold:
+                flag = "  REGRESSION"
+                ok = False
+            print(f"{bench + '.' + key:<60} {base:10.3f} -> {value:10.3f}  x{ratio:5.2f}{flag}")
+    return ok
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="LotCSV benchmarks against synthetic corpora and local stand-ins.")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier of corpus sizes (default: 1.0)")
+    parser.add_argument("--sources", help="comma separated sources for the sources benchmark (default: all)")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of earlier run to compare with, exits with 1 on regression")
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown ratio counted as regression (default: 1.2)")
+    options = parser.parse_args()
+
+    for name in options.names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark: {name} (available: {', '.join(BENCHMARKS)})")
+            exit(1)
+    results = {}
+    for name in options.names or list(BENCHMARKS):
+        if name == "sources" and options.sources:
+            results[name] = BENCHMARKS[name](options.scale, options.sources.split(","))
+        else:
+            results[name] = BENCHMARKS[name](options.scale)
+
+    report = {"commit": Revision(), "python": sys.version.split()[0], "scale": options.scale, "results": results}
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if options.compare:
+        with open(options.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("scale") != options.scale:
+            print(f"Warning: baseline was run with scale {baseline.get('scale')}, this run with {options.scale}")
+        if not Compare(results, baseline, options.threshold):
+            exit(1)